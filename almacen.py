@@ -0,0 +1,206 @@
+# almacen.py — histórico local multiperiodo de Inscritos/Egresados.
+# Sólo está activo si REPORTES_ALMACEN indica la raíz (los archivos subidos no se guardan en
+# disco sin que el servidor lo pida). Cada carga se agrega como particiones Parquet nuevas
+# (sólo-anexar), una por valor de la columna "Periodo" de los propios datos, bajo
+#   <raíz>/<dataset>/periodo=<2025-2>/part-<hash>.parquet
+# y las filas se deduplican por hash de fila contra lo ya almacenado del mismo dataset y periodo.
+# Las consultas leen sólo las particiones (y columnas) de los periodos pedidos.
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+from compartidos import tabla_arrow
+
+RAIZ_DEFAULT = os.environ.get("REPORTES_ALMACEN")     # None: histórico desactivado
+DATASETS = ("inscritos", "egresados")
+COLUMNA_PERIODO = "Periodo"
+
+_lock = threading.Lock()
+
+
+# ================= UTILIDADES ================= #
+def _slug_periodo(periodo: str) -> str:
+    return str(periodo).strip().replace(" ", "_").replace("/", "-")
+
+
+def hash_filas(df: pd.DataFrame) -> pd.Series:
+    """
+    Hash uint64 por fila con los tipos nativos (como incremental.hash_filas), independiente
+    del orden de columnas y del índice.
+    """
+    cols = sorted(df.columns, key=str)
+    return pd.util.hash_pandas_object(df[cols], index=False)
+
+
+def huella_bytes(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+# ================= ALMACÉN ================= #
+class AlmacenPeriodos:
+    """Almacén particionado por (dataset, periodo); sólo se anexan particiones."""
+
+    def __init__(self, raiz: str = RAIZ_DEFAULT):
+        # absoluta: no depende del directorio desde el que se lance la app
+        self.raiz = os.path.abspath(raiz) if raiz else None
+
+    @property
+    def activo(self) -> bool:
+        return self.raiz is not None
+
+    # ---- manifiesto ---- #
+    def _ruta_manifiesto(self, dataset):
+        return os.path.join(self.raiz, dataset, "_manifiesto.json")
+
+    def manifiesto(self, dataset) -> list:
+        if not self.activo:
+            return []
+        ruta = self._ruta_manifiesto(dataset)
+        if not os.path.exists(ruta):
+            return []
+        with open(ruta, encoding="utf-8") as fh:
+            return json.load(fh)
+
+    def _guardar_manifiesto(self, dataset, entradas):
+        ruta = self._ruta_manifiesto(dataset)
+        tmp = ruta + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(entradas, fh, ensure_ascii=False, indent=1)
+        os.replace(tmp, ruta)
+
+    def periodos(self, dataset) -> list:
+        vistos = []
+        for e in self.manifiesto(dataset):
+            if e["periodo"] not in vistos:
+                vistos.append(e["periodo"])
+        return vistos
+
+    def contiene_archivo(self, dataset, huella: str) -> bool:
+        return any(e.get("huella_archivo") == huella for e in self.manifiesto(dataset))
+
+    # ---- escritura ---- #
+    def anexar_por_periodo(self, dataset: str, df: pd.DataFrame, huella_archivo: str = "",
+                           columna: str = COLUMNA_PERIODO) -> list:
+        """
+        anexar() una partición por cada valor de `columna`: el periodo lo dan los datos.
+        Las filas sin periodo (o df sin la columna) no se guardan. Devuelve las entradas.
+        """
+        if not self.activo or columna not in df.columns:
+            return []
+        periodo = df[columna].astype("string").str.strip()
+        return [
+            self.anexar(dataset, p, df[(periodo == p).fillna(False).to_numpy()], huella_archivo)
+            for p in sorted(periodo.dropna().unique()) if p
+        ]
+
+    def anexar(self, dataset: str, periodo: str, df: pd.DataFrame, huella_archivo: str = "") -> dict:
+        """
+        Agrega df como partición nueva del periodo. Descarta filas cuyo hash ya exista
+        en ese periodo (o repetidas dentro del propio df); sólo se leen los hashes del periodo.
+        Devuelve la entrada del manifiesto (filas=0 si no había nada nuevo).
+        """
+        if dataset not in DATASETS:
+            raise ValueError(f"Dataset desconocido: {dataset}")
+        if not self.activo:
+            raise RuntimeError("Histórico desactivado: define REPORTES_ALMACEN")
+        with _lock:
+            entradas = self.manifiesto(dataset)
+            if huella_archivo and any(e.get("huella_archivo") == huella_archivo and e["periodo"] == periodo
+                                      for e in entradas):
+                return {"periodo": periodo, "filas": 0, "huella_archivo": huella_archivo}
+
+            hashes = hash_filas(df)
+            nuevas = ~hashes.duplicated().to_numpy()
+            existentes = self._hashes(dataset, [periodo])
+            if len(existentes):
+                nuevas &= ~hashes.isin(existentes).to_numpy()
+            df_nuevo = df[nuevas]
+            entrada = {
+                "periodo": periodo,
+                "filas": int(len(df_nuevo)),
+                "huella_archivo": huella_archivo,
+                "creado": time.strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            if df_nuevo.empty:
+                return entrada
+
+            dir_part = os.path.join(self.raiz, dataset, f"periodo={_slug_periodo(periodo)}")
+            os.makedirs(dir_part, exist_ok=True)
+            nombre = f"part-{huella_archivo[:12] or format(int(hashes.iloc[0]), 'x')}-{len(entradas):05d}.parquet"
+            ruta = os.path.join(dir_part, nombre)
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            # tipos nativos; sólo las columnas object con mezcla de tipos (típico de Excel) como texto
+            tabla = tabla_arrow(df_nuevo).append_column("_hash", pa.array(hashes[nuevas].to_numpy()))
+            pq.write_table(tabla, ruta + ".tmp")
+            os.replace(ruta + ".tmp", ruta)
+
+            entrada["archivo"] = os.path.relpath(ruta, self.raiz)
+            entradas.append(entrada)
+            self._guardar_manifiesto(dataset, entradas)
+            return entrada
+
+    # ---- lectura ---- #
+    def _particiones(self, dataset, periodos=None):
+        return [
+            os.path.join(self.raiz, e["archivo"]) for e in self.manifiesto(dataset)
+            if e.get("archivo") and (periodos is None or e["periodo"] in periodos)
+        ]
+
+    @staticmethod
+    def _columnas_de(ruta) -> list:
+        import pyarrow.parquet as pq
+        return pq.read_schema(ruta).names
+
+    def columnas(self, dataset, periodos=None) -> list:
+        """Columnas presentes en alguna partición (sin leer datos)."""
+        vistas = []
+        for ruta in self._particiones(dataset, periodos):
+            vistas += [c for c in self._columnas_de(ruta) if c not in vistas and c != "_hash"]
+        return vistas
+
+    def _hashes(self, dataset, periodos=None) -> pd.Series:
+        partes = [pd.read_parquet(r, columns=["_hash"])["_hash"] for r in self._particiones(dataset, periodos)]
+        return pd.concat(partes, ignore_index=True) if partes else pd.Series(dtype="uint64")
+
+    def leer(self, dataset: str, periodos=None, columnas=None) -> pd.DataFrame:
+        """Lee sólo las particiones de los periodos pedidos (y sólo las columnas pedidas)."""
+        partes = []
+        por_archivo = {e.get("archivo"): e["periodo"] for e in self.manifiesto(dataset)}
+        for ruta in self._particiones(dataset, periodos):
+            cols = None if columnas is None else [c for c in columnas if c in self._columnas_de(ruta)]
+            df = pd.read_parquet(ruta, columns=cols)
+            df["Periodo carga"] = por_archivo[os.path.relpath(ruta, self.raiz)]
+            partes.append(df)
+        if not partes:
+            return pd.DataFrame(columns=(columnas or []) + ["Periodo carga"])
+        out = pd.concat(partes, ignore_index=True)
+        return out.drop(columns=["_hash"], errors="ignore")
+
+    # ---- consultas ---- #
+    def conteos_por_periodo(self, dataset: str, columna: str, periodos=None) -> pd.DataFrame:
+        """Tabla columna × periodo con el número de filas."""
+        df = self.leer(dataset, periodos, columnas=[columna])
+        if df.empty:
+            return pd.DataFrame()
+        return (df.groupby([columna, "Periodo carga"]).size()
+                .unstack("Periodo carga", fill_value=0)
+                .reindex(columns=[p for p in (periodos or self.periodos(dataset)) if p in set(df["Periodo carga"])]))
+
+    def retencion(self, periodo_a: str, periodo_b: str, col_id: str, por: str = "Carrera") -> pd.DataFrame:
+        """Alumnos inscritos en periodo_a que siguen inscritos (o egresaron) en periodo_b."""
+        cols = [col_id] + ([por] if por else [])
+        a = self.leer("inscritos", [periodo_a], columnas=cols).drop_duplicates(col_id)
+        b_ins = self.leer("inscritos", [periodo_b], columnas=[col_id]).get(col_id, pd.Series(dtype="string"))
+        b_eg = self.leer("egresados", [periodo_b], columnas=[col_id]).get(col_id, pd.Series(dtype="string"))
+        a["Retenido"] = a[col_id].isin(b_ins) | a[col_id].isin(b_eg)
+        clave = por if por else "Periodo carga"
+        out = a.groupby(clave).agg(Base=(col_id, "size"), Retenidos=("Retenido", "sum")).reset_index()
+        out["Retención"] = out["Retenidos"] / out["Base"]
+        return out
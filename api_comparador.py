@@ -0,0 +1,502 @@
+# api_comparador.py — servicio HTTP local que expone el motor del comparativo (comparativo.py).
+# Servidor HTTP/1.1 con keep-alive y pool fijo de hilos; sin sesión de navegador.
+#
+# Uso:
+#   python api_comparador.py --host 127.0.0.1 --puerto 8502 --hilos 16
+#   python carga.py --api --clientes 1,8       (prueba de carga del servicio)
+#
+# Los hilos del pool atienden solicitudes, no conexiones: las conexiones keep-alive ociosas
+# esperan en un selector y se cierran tras REPORTES_API_KEEPALIVE s. Cuerpos de más de
+# REPORTES_API_MAX_MB responden 413. Metas enviadas en el cuerpo se preparan una vez por
+# contenido y las respuestas de /comparar se recuerdan por huella de la solicitud
+# (REPORTES_API_CACHE_MB), así que las consultas repetidas no recalculan nada.
+#
+# Endpoints:
+#   GET  /salud
+#   PUT  /metas/<nombre>?periodo=May-Ago   cuerpo: metas (Hoja2) en JSON o Arrow; quedan preparadas en memoria
+#   POST /comparar?periodo=May-Ago         cuerpo JSON {"metas": [...], "resultados": [...]}
+#                                          o Arrow: stream de metas seguido del stream de resultados
+#   POST /comparar?metas=<nombre>          sólo resultados (JSON {"resultados": [...]} o un stream Arrow)
+#
+# JSON = lista de registros ({"Indicador": ..., "Responsable": ..., "Resultado": ...}).
+# Arrow = IPC stream (Content-Type: application/vnd.apache.arrow.stream). La respuesta usa Arrow
+# si el cliente lo pide en Accept; si no, JSON {"comparativo": [...], "conteos": {...}}.
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import queue
+import selectors
+import socket
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from comparativo import (
+    COLUMNAS_RESULTADOS, PERIODOS, columnas_faltantes, comparar, conteo_estatus,
+    formatear_comparativo, preparar_metas, preparar_resultados,
+)
+
+MIME_ARROW = "application/vnd.apache.arrow.stream"
+MIME_JSON = "application/json"
+# Tamaño máximo del cuerpo (MB) y segundos que una conexión keep-alive ociosa sigue abierta
+MAX_CUERPO = int(float(os.environ.get("REPORTES_API_MAX_MB", "64")) * 1024 * 1024)
+KEEPALIVE = float(os.environ.get("REPORTES_API_KEEPALIVE", "30"))
+MAX_METAS_EN_LINEA = 32
+MAX_CACHE_RESPUESTAS = int(float(os.environ.get("REPORTES_API_CACHE_MB", "64")) * 1024 * 1024)
+
+
+class ErrorSolicitud(Exception):
+    """Error del cliente (respuesta 4xx)."""
+
+    def __init__(self, mensaje, estado=400):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+# ================= REGISTRO DE METAS ================= #
+class RegistroMetas:
+    """Metas registradas por nombre; se preparan una vez por periodo y se reutilizan."""
+
+    def __init__(self):
+        self._crudas = {}
+        self._preparadas = {}
+        self._en_linea = OrderedDict()
+        self._versiones = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, nombre, df_metas):
+        with self._lock:
+            self._crudas[nombre] = df_metas
+            self._versiones[nombre] = self._versiones.get(nombre, 0) + 1
+            self._preparadas = {k: v for k, v in self._preparadas.items() if k[0] != nombre}
+
+    def version(self, nombre) -> int:
+        """Cambia cada vez que se vuelven a registrar las metas `nombre` (0 = no registradas)."""
+        with self._lock:
+            return self._versiones.get(nombre, 0)
+
+    def en_linea(self, df_metas, periodo):
+        """Metas enviadas en el cuerpo: se preparan una vez por huella de contenido y periodo."""
+        huella = (hashlib.sha1(pickle.dumps((list(map(str, df_metas.columns)), df_metas.to_numpy(dtype=object)),
+                                            protocol=5)).hexdigest(), periodo)
+        with self._lock:
+            metas = self._en_linea.get(huella)
+            if metas is not None:
+                self._en_linea.move_to_end(huella)
+                return metas
+        metas = preparar_metas(df_metas, periodo)
+        with self._lock:
+            self._en_linea[huella] = metas
+            while len(self._en_linea) > MAX_METAS_EN_LINEA:
+                self._en_linea.popitem(last=False)
+        return metas
+
+    def preparadas(self, nombre, periodo):
+        with self._lock:
+            if (nombre, periodo) not in self._preparadas:
+                if nombre not in self._crudas:
+                    raise ErrorSolicitud(f"Metas no registradas: {nombre}", 404)
+                self._preparadas[(nombre, periodo)] = preparar_metas(self._crudas[nombre], periodo)
+            return self._preparadas[(nombre, periodo)]
+
+
+class RespuestasRecientes:
+    """Respuestas de /comparar por huella de la solicitud, acotadas por bytes totales (LRU)."""
+
+    def __init__(self, limite_bytes=MAX_CACHE_RESPUESTAS):
+        self.limite = limite_bytes
+        self._respuestas = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def obtener(self, clave):
+        with self._lock:
+            respuesta = self._respuestas.get(clave)
+            if respuesta is not None:
+                self._respuestas.move_to_end(clave)
+            return respuesta
+
+    def guardar(self, clave, respuesta):
+        tam = len(respuesta[0])
+        if tam > self.limite:
+            return
+        with self._lock:
+            if clave in self._respuestas:
+                return
+            self._respuestas[clave] = respuesta
+            self._bytes += tam
+            while self._bytes > self.limite:
+                _, (cuerpo, _) = self._respuestas.popitem(last=False)
+                self._bytes -= len(cuerpo)
+
+
+# ================= (DE)SERIALIZACIÓN ================= #
+def _leer_arrow(cuerpo: bytes) -> list:
+    """Uno o más IPC streams concatenados -> lista de DataFrames."""
+    import pyarrow as pa
+    buf = pa.BufferReader(cuerpo)
+    tablas = []
+    while buf.tell() < buf.size():
+        with pa.ipc.open_stream(buf) as lector:
+            tablas.append(lector.read_all().to_pandas())
+    return tablas
+
+
+def _escribir_arrow(df: pd.DataFrame) -> bytes:
+    import pyarrow as pa
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, tabla.schema) as escritor:
+        escritor.write_table(tabla)
+    return sink.getvalue().to_pybytes()
+
+
+def _validar_metas(df):
+    faltantes = columnas_faltantes(df)
+    if faltantes:
+        raise ErrorSolicitud(f"Faltan columnas en metas: {faltantes}")
+    return df
+
+
+def _validar_resultados(df):
+    faltantes = [c for c in COLUMNAS_RESULTADOS if c not in df.columns]
+    if faltantes:
+        raise ErrorSolicitud(f"Faltan columnas en resultados: {faltantes}")
+    return df
+
+
+def _periodo(query):
+    periodo = query.get("periodo", ["May-Ago"])[0]
+    if periodo not in PERIODOS:
+        raise ErrorSolicitud(f"Periodo inválido: {periodo} (usa {PERIODOS})")
+    return periodo
+
+
+# ================= HANDLER ================= #
+class ManejadorComparativo(BaseHTTPRequestHandler):
+    """
+    Manejador por conexión: ServidorPool lo crea al aceptar y llama handle_one_request()
+    por cada solicitud que llega (no bloquea un hilo esperando la siguiente).
+    """
+
+    protocol_version = "HTTP/1.1"   # keep-alive
+    disable_nagle_algorithm = True  # encabezados y cuerpo van en dos escrituras
+    timeout = 10                    # s para terminar de recibir una solicitud ya iniciada
+    registro = RegistroMetas()
+    respuestas = RespuestasRecientes()
+    verboso = False
+
+    def __init__(self, request, client_address, server):
+        # sólo setup(): las solicitudes las despacha el servidor una a una (Conexion.atender)
+        self.request = request
+        self.client_address = client_address
+        self.server = server
+        self.close_connection = True
+        self.setup()
+
+    def log_message(self, fmt, *args):
+        if self.verboso:
+            super().log_message(fmt, *args)
+
+    # ---- utilidades ---- #
+    def _cuerpo(self) -> bytes:
+        try:
+            n = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            raise ErrorSolicitud("Content-Length inválido")
+        if n < 0:
+            raise ErrorSolicitud("Content-Length inválido")
+        if n > MAX_CUERPO:
+            self.close_connection = True    # el cuerpo no se lee: la conexión queda inservible
+            raise ErrorSolicitud(f"Cuerpo de {n} bytes excede el máximo de {MAX_CUERPO} bytes", 413)
+        return self.rfile.read(n) if n else b""
+
+    def _es_arrow(self) -> bool:
+        return MIME_ARROW in (self.headers.get("Content-Type") or "")
+
+    def _tablas(self, claves, cuerpo=None):
+        """Lee el cuerpo como JSON ({clave: registros}) o Arrow (un stream por clave, en orden)."""
+        cuerpo = self._cuerpo() if cuerpo is None else cuerpo
+        if self._es_arrow():
+            tablas = _leer_arrow(cuerpo)
+            if len(tablas) != len(claves):
+                raise ErrorSolicitud(f"Se esperaban {len(claves)} streams Arrow ({', '.join(claves)})")
+            return tablas
+        try:
+            datos = json.loads(cuerpo or b"{}")
+        except ValueError as e:
+            raise ErrorSolicitud(f"JSON inválido: {e}")
+        if isinstance(datos, list) and len(claves) == 1:
+            datos = {claves[0]: datos}
+        if not isinstance(datos, dict) or any(k not in datos for k in claves):
+            raise ErrorSolicitud(f"Se esperaban las claves {claves}")
+        return [pd.DataFrame(datos[k]) for k in claves]
+
+    def _responder(self, estado, cuerpo: bytes, tipo):
+        self.send_response(estado)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _json(self, estado, obj):
+        self._responder(estado, json.dumps(obj, ensure_ascii=False, default=_json_default).encode("utf-8"), MIME_JSON)
+
+    def _despachar(self, metodo):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        try:
+            ruta = url.path.rstrip("/")
+            if metodo == "GET" and ruta == "/salud":
+                return self._json(200, {"ok": True})
+            if metodo == "PUT" and ruta.startswith("/metas/"):
+                return self._registrar_metas(ruta[len("/metas/"):])
+            if metodo == "POST" and ruta == "/comparar":
+                return self._comparar(query)
+            raise ErrorSolicitud(f"Ruta no encontrada: {metodo} {url.path}", 404)
+        except ErrorSolicitud as e:
+            self._json(e.estado, {"error": str(e)})
+        except Exception as e:  # error inesperado: 500 sin tumbar el worker
+            self._json(500, {"error": f"{type(e).__name__}: {e}"})
+
+    def do_GET(self):
+        self._despachar("GET")
+
+    def do_POST(self):
+        self._despachar("POST")
+
+    def do_PUT(self):
+        self._despachar("PUT")
+
+    # ---- endpoints ---- #
+    def _registrar_metas(self, nombre):
+        if not nombre:
+            raise ErrorSolicitud("Falta el nombre de las metas")
+        (df_metas,) = self._tablas(["metas"])
+        self.registro.registrar(nombre, _validar_metas(df_metas))
+        self._json(200, {"metas": nombre, "indicadores": len(df_metas)})
+
+    def _comparar(self, query):
+        periodo = _periodo(query)
+        nombre = query.get("metas", [None])[0]
+        cuerpo = self._cuerpo()
+        arrow = MIME_ARROW in (self.headers.get("Accept") or "")
+        # la misma solicitud (cuerpo, periodo, metas registradas y formato) da la misma respuesta
+        clave = (hashlib.sha1(cuerpo).digest(), periodo, nombre, self.registro.version(nombre) if nombre else 0,
+                 self._es_arrow(), arrow)
+        guardada = self.respuestas.obtener(clave)
+        if guardada is not None:
+            return self._responder(200, *guardada)
+
+        if nombre:
+            (df_res,) = self._tablas(["resultados"], cuerpo)
+            metas = self.registro.preparadas(nombre, periodo)
+        else:
+            df_metas, df_res = self._tablas(["metas", "resultados"], cuerpo)
+            metas = self.registro.en_linea(_validar_metas(df_metas), periodo)
+        comp = comparar(metas, preparar_resultados(_validar_resultados(df_res)))
+        comp_out = formatear_comparativo(comp)
+
+        if arrow:
+            respuesta = (_escribir_arrow(comp_out), MIME_ARROW)
+        else:
+            # to_json serializa los registros en C (las celdas de comp_out ya son texto)
+            respuesta = ('{"comparativo": %s, "conteos": %s}' % (
+                comp_out.to_json(orient="records", force_ascii=False),
+                json.dumps(conteo_estatus(comp), ensure_ascii=False),
+            )).encode("utf-8"), MIME_JSON
+        self.respuestas.guardar(clave, respuesta)
+        self._responder(200, *respuesta)
+
+
+def _json_default(o):
+    if isinstance(o, (np.integer,)):
+        return int(o)
+    if isinstance(o, (np.floating,)):
+        return None if np.isnan(o) else float(o)
+    if isinstance(o, (np.bool_,)):
+        return bool(o)
+    return str(o)
+
+
+# ================= SERVIDOR ================= #
+class ServidorPool(HTTPServer):
+    """
+    HTTPServer con un pool fijo de hilos que atiende solicitudes, no conexiones: un selector
+    en el hilo del servidor vigila el socket de escucha y las conexiones keep-alive ociosas;
+    cuando una trae una solicitud se pasa al pool, y al responder vuelve al selector. Una
+    conexión ociosa no ocupa un worker y se cierra tras KEEPALIVE segundos.
+    """
+
+    request_queue_size = 256
+
+    def __init__(self, direccion, manejador, hilos=8, keepalive=KEEPALIVE):
+        super().__init__(direccion, manejador)
+        self.keepalive = keepalive
+        self.pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="api-comparador")
+        self._selector = selectors.DefaultSelector()
+        self._devueltas = queue.SimpleQueue()
+        self._despertar_r, self._despertar_w = socket.socketpair()
+        self._despertar_r.setblocking(False)
+        self._detener = threading.Event()
+        self._detenido = threading.Event()
+        self._detenido.set()
+
+    # ---- bucle del selector ---- #
+    def serve_forever(self, poll_interval=0.5):
+        self._detenido.clear()
+        sel = self._selector
+        sel.register(self.socket, selectors.EVENT_READ, None)
+        sel.register(self._despertar_r, selectors.EVENT_READ, "despertar")
+        ociosas = {}    # Conexion -> instante desde el que espera
+        try:
+            while not self._detener.is_set():
+                for clave, _ in sel.select(timeout=min(poll_interval, self.keepalive)):
+                    if clave.data is None:
+                        self._aceptar(ociosas)
+                    elif clave.data == "despertar":
+                        try:
+                            while self._despertar_r.recv(4096):
+                                pass
+                        except BlockingIOError:
+                            pass
+                    else:
+                        conexion = clave.data
+                        sel.unregister(conexion.sock)
+                        ociosas.pop(conexion, None)
+                        self.pool.submit(self._atender, conexion)
+                while True:
+                    try:
+                        conexion = self._devueltas.get_nowait()
+                    except queue.Empty:
+                        break
+                    sel.register(conexion.sock, selectors.EVENT_READ, conexion)
+                    ociosas[conexion] = time.monotonic()
+                vencidas = [c for c, t in ociosas.items() if time.monotonic() - t > self.keepalive]
+                for conexion in vencidas:
+                    sel.unregister(conexion.sock)
+                    del ociosas[conexion]
+                    conexion.cerrar()
+        finally:
+            for conexion in ociosas:
+                conexion.cerrar()
+            for sock in (self.socket, self._despertar_r):
+                try:
+                    sel.unregister(sock)
+                except (KeyError, ValueError):
+                    pass
+            self._detener.clear()
+            self._detenido.set()
+
+    def _aceptar(self, ociosas):
+        try:
+            request, client_address = self.get_request()
+        except OSError:
+            return
+        conexion = Conexion(request, client_address, self)
+        self._selector.register(request, selectors.EVENT_READ, conexion)
+        ociosas[conexion] = time.monotonic()
+
+    def _atender(self, conexion):
+        """Una solicitud en un worker; la conexión vuelve al selector si sigue abierta."""
+        try:
+            seguir = conexion.atender()
+        except Exception:
+            self.handle_error(conexion.sock, conexion.direccion)
+            seguir = False
+        if not seguir:
+            conexion.cerrar()
+        elif conexion.hay_pendiente():
+            self.pool.submit(self._atender, conexion)     # solicitud ya recibida (pipelining)
+        else:
+            self._devueltas.put(conexion)
+            try:
+                self._despertar_w.send(b"x")
+            except OSError:
+                pass
+
+    def shutdown(self):
+        self._detener.set()
+        try:
+            self._despertar_w.send(b"x")
+        except OSError:
+            pass
+        self._detenido.wait()
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self._selector.close()
+        self._despertar_r.close()
+        self._despertar_w.close()
+
+
+class Conexion:
+    """Conexión keep-alive con su manejador (conserva el búfer de lectura entre solicitudes)."""
+
+    def __init__(self, sock, direccion, servidor):
+        self.sock = sock
+        self.direccion = direccion
+        self.manejador = servidor.RequestHandlerClass(sock, direccion, servidor)
+
+    def atender(self) -> bool:
+        """Atiende una solicitud; False si hay que cerrar la conexión."""
+        self.sock.setblocking(True)
+        self.sock.settimeout(self.manejador.timeout)
+        self.manejador.handle_one_request()
+        return not self.manejador.close_connection
+
+    def hay_pendiente(self) -> bool:
+        self.sock.setblocking(False)
+        try:
+            return bool(self.manejador.rfile.peek(1))
+        except OSError:
+            return False
+
+    def cerrar(self):
+        try:
+            self.manejador.finish()
+        except OSError:
+            pass
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+def crear_servidor(host="127.0.0.1", puerto=8502, hilos=8, verboso=False):
+    ManejadorComparativo.verboso = verboso
+    return ServidorPool((host, puerto), ManejadorComparativo, hilos=hilos)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="API HTTP local del comparativo de indicadores vs metas")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--puerto", type=int, default=8502)
+    p.add_argument("--hilos", type=int, default=8, help="workers del pool (solicitudes en paralelo)")
+    p.add_argument("--verboso", action="store_true")
+    args = p.parse_args(argv)
+
+    servidor = crear_servidor(args.host, args.puerto, args.hilos, args.verboso)
+    print(f"API del comparativo en http://{args.host}:{args.puerto} ({args.hilos} hilos)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+# carga.py — prueba de carga con sesiones concurrentes (streamlit.testing AppTest).
+# Cada sesión es un AppTest en su propio hilo dentro de este proceso, igual que el servidor
+# de Streamlit atiende cada navegador con un hilo: comparten cachés, gobernador de memoria
+# y datasets mapeados. Cada sesión sube los libros sintéticos, mueve filtros, pagina la
+# captura y dispara las exportaciones; se mide la latencia de cada rerun.
+#
+#   python carga.py --sesiones 1,4,8 --presupuesto-p95 4000 --salida carga.json
+#   python carga.py --sesiones 4 --linea-base carga.json --tolerancia 0.25
+#   python carga.py --api --clientes 1,8 --hilos 4 --presupuesto-p95 50
+#
+# Termina con código 1 si algún nivel excede el presupuesto o empeora más que `tolerancia`
+# respecto a la línea base (p95 por nivel de concurrencia).
+
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "streamlit_app.py")
+CARRERAS = [
+    "Técnico Superior Universitario en Aviónica",
+    "Ingeniería Aeronáutica en Manufactura",
+    "Ingeniería en Mantenimiento Aeronáutico",
+    "Maestría en Ingeniería Aeroespacial",
+    "TSU en Mantenimiento Aeronáutico Área Planeador y Motor",
+]
+
+
+# ================= LIBROS SINTÉTICOS ================= #
+def libros_sinteticos(directorio, filas=5000, indicadores=60, semilla=0) -> dict:
+    """Escribe inscritos/egresados/indicadores .xlsx con el esquema de la app: {dataset: ruta}."""
+    rng = np.random.default_rng(semilla)
+    ins = pd.DataFrame({
+        "Matrícula": [f"A{i:06d}" for i in range(filas)],
+        "Carrera": rng.choice(CARRERAS, filas),
+        "Sexo": rng.choice(["H", "M"], filas),
+        "Periodo": "2025-2",
+        "Grupo": [f"G{i % 40}" for i in range(filas)],
+        "Ciclo": "2025",
+        "Generación": rng.choice(["2021", "2022", "2023"], filas),
+    })
+    eg = ins.sample(max(1, filas // 3), random_state=semilla)
+    responsables = ["TSUA", "IMA", "IAM", "DIR", "SAC"]
+    nombres = [f"Indicador {i:03d}" for i in range(indicadores)]
+    captura = pd.DataFrame({"Indicador": nombres, "Responsable": [responsables[i % 5] for i in range(indicadores)]})
+    metas = captura.assign(
+        proceso=[["Académico", "Calidad", "Vinculación"][i % 3] for i in range(indicadores)],
+        Periodicidad="C", **{"Ene-Abr": "80%", "May-Ago": "85%", "Sep-Dic": "90%"},
+    )[["Indicador", "proceso", "Periodicidad", "Responsable", "Ene-Abr", "May-Ago", "Sep-Dic"]]
+
+    rutas = {d: os.path.join(directorio, f"{d}.xlsx") for d in ("inscritos", "egresados", "indicadores")}
+    ins.to_excel(rutas["inscritos"], index=False)
+    eg.to_excel(rutas["egresados"], index=False)
+    with pd.ExcelWriter(rutas["indicadores"]) as w:
+        captura.to_excel(w, sheet_name="Hoja1", index=False)
+        metas.to_excel(w, sheet_name="Hoja2", index=False)
+    return rutas
+
+
+# ================= ESCENARIO DE UNA SESIÓN ================= #
+def _subir(at, clave, ruta):
+    uploader = next(f for f in at.get("file_uploader") if f.key == clave)
+    with open(ruta, "rb") as fh:
+        uploader.upload(os.path.basename(ruta), fh.read())
+
+
+def _paso(at, nombre, accion, medidas, timeout):
+    t = time.perf_counter()
+    accion()
+    at.run(timeout=timeout)
+    medidas.append((nombre, time.perf_counter() - t))
+    if at.exception:
+        raise RuntimeError(f"{nombre}: {at.exception[0].value}")
+
+
+def escenario(rutas, medidas, timeout=300, paginas=3):
+    """Una sesión completa; agrega (paso, segundos) a `medidas`."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP, default_timeout=timeout)
+    _paso(at, "inicio", lambda: None, medidas, timeout)
+    for dataset in ("inscritos", "egresados", "indicadores"):
+        _paso(at, f"subir_{dataset}", lambda d=dataset: _subir(at, d, rutas[d]), medidas, timeout)
+
+    # filtros: quitar y volver a poner una carrera
+    filtro = next((m for m in at.multiselect if m.key == "fi_Carrera"), None)
+    if filtro is not None and len(filtro.value) > 1:
+        completo = list(filtro.value)
+        _paso(at, "filtro", lambda: filtro.set_value(completo[1:]), medidas, timeout)
+        filtro = next(m for m in at.multiselect if m.key == "fi_Carrera")
+        _paso(at, "filtro", lambda: filtro.set_value(completo), medidas, timeout)
+
+    # paginación de la captura
+    for n in range(2, paginas + 1):
+        pagina = next((x for x in at.number_input if x.label == "Página"), None)
+        if pagina is None or getattr(pagina.proto, "max", 1) < n:
+            break
+        _paso(at, "pagina", lambda p=pagina, n=n: p.set_value(n), medidas, timeout)
+
+    # exportaciones bajo demanda (Excel/PDF se generan al mostrar los botones)
+    zip_toggle = next((t for t in at.toggle if t.key == "generar_zip_responsables"), None)
+    if zip_toggle is not None:
+        _paso(at, "exportar_zip", lambda: zip_toggle.set_value(True), medidas, timeout)
+    return at
+
+
+# ================= CARGA DE LA API ================= #
+def _cuerpo_api(indicadores=50, variante=0) -> bytes:
+    """JSON {"metas", "resultados"} con el esquema de la API; `variante` cambia los resultados."""
+    responsables = ["TSUA", "IMA", "IAM", "DIR", "SAC"]
+    metas = [{"Indicador": f"Indicador {i:03d}", "proceso": "Calidad", "Periodicidad": "C",
+              "Responsable": responsables[i % 5], "Ene-Abr": "80%", "May-Ago": "85%", "Sep-Dic": "90%"}
+             for i in range(indicadores)]
+    resultados = [{"Indicador": m["Indicador"], "Responsable": m["Responsable"],
+                   "Resultado": f"{70 + (i + variante) % 30}.{variante:07d}%"} for i, m in enumerate(metas)]
+    return json.dumps({"metas": metas, "resultados": resultados}).encode()
+
+
+def nivel_api(puerto, clientes, solicitudes=200, indicadores=50, distintas=False, ociosas=0, timeout=5.0) -> dict:
+    """
+    `clientes` conexiones keep-alive haciendo `solicitudes` POST /comparar cada una, con
+    `ociosas` conexiones keep-alive abiertas sin enviar nada. distintas=True: cada solicitud
+    lleva resultados diferentes (sin aciertos en la caché de respuestas).
+    """
+    import http.client
+
+    base = int(time.time() * 1000) % 1_000_000 * 1000      # variantes nuevas en cada corrida
+    medidas, errores = [], []
+    lock = threading.Lock()
+    quietas = []
+    for _ in range(ociosas):
+        c = http.client.HTTPConnection("127.0.0.1", puerto, timeout=timeout)
+        c.request("GET", "/salud")
+        c.getresponse().read()
+        quietas.append(c)
+
+    def cliente(k):
+        propias = []
+        cuerpos = [_cuerpo_api(indicadores, base + k * solicitudes + v) for v in range(solicitudes if distintas else 1)]
+        try:
+            c = http.client.HTTPConnection("127.0.0.1", puerto, timeout=timeout)
+            for i in range(solicitudes):
+                t = time.perf_counter()
+                c.request("POST", "/comparar?periodo=May-Ago", cuerpos[i % len(cuerpos)],
+                          {"Content-Type": "application/json"})
+                r = c.getresponse()
+                r.read()
+                if r.status != 200:
+                    raise RuntimeError(f"estado {r.status}")
+                propias.append(time.perf_counter() - t)
+            c.close()
+        except Exception as e:
+            errores.append(repr(e))
+        with lock:
+            medidas.extend(propias)
+
+    t_ini = time.perf_counter()
+    hilos = [threading.Thread(target=cliente, args=(k,)) for k in range(clientes)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    pared = time.perf_counter() - t_ini
+    for c in quietas:
+        c.close()
+    ms = np.array(medidas) * 1000 if medidas else np.array([np.nan])
+    return {
+        "clientes": clientes, "ociosas": ociosas, "distintas": distintas, "solicitudes": len(medidas),
+        "errores": errores, "req_s": round(len(medidas) / pared, 1),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2), "p95_ms": round(float(np.percentile(ms, 95)), 2),
+        "max_ms": round(float(np.max(ms)), 2),
+    }
+
+
+def carga_api(niveles, hilos=4, solicitudes=200, indicadores=50) -> list:
+    """Servidor de la API en este proceso; por nivel: repetidas, distintas y con conexiones ociosas."""
+    from api_comparador import crear_servidor
+
+    servidor = crear_servidor("127.0.0.1", 0, hilos)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    puerto = servidor.server_address[1]
+    resultados = []
+    try:
+        for n in niveles:
+            for distintas, ociosas in ((False, 0), (True, 0), (False, 2 * hilos)):
+                r = nivel_api(puerto, n, solicitudes, indicadores, distintas, ociosas)
+                resultados.append(r)
+                print(f"{n:>3} clientes | {'distintas ' if distintas else 'repetidas '} | ociosas {ociosas:>3}"
+                      f" | {r['req_s']:>8} req/s | p50 {r['p50_ms']:>7} ms | p95 {r['p95_ms']:>7} ms"
+                      f" | max {r['max_ms']:>7} ms | errores {len(r['errores'])}", flush=True)
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+    return resultados
+
+
+# ================= MEDICIÓN ================= #
+def rss_mb() -> float:
+    """RSS actual (Linux /proc); si no existe, el pico de getrusage."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico / 2**20 if sys.platform == "darwin" else pico / 1024
+
+
+def nivel(rutas, sesiones, timeout=300) -> dict:
+    """Corre `sesiones` escenarios a la vez; latencias por rerun, CPU y RSS del proceso."""
+    medidas, errores = [], []
+    lock = threading.Lock()
+    rss_pico = [rss_mb()]
+    fin = threading.Event()
+
+    def muestrear():
+        while not fin.wait(0.2):
+            rss_pico[0] = max(rss_pico[0], rss_mb())
+
+    def correr():
+        propias = []
+        try:
+            escenario(rutas, propias, timeout)
+        except Exception as e:
+            errores.append(str(e))
+        with lock:
+            medidas.extend(propias)
+
+    rss_ini, cpu_ini, t_ini = rss_mb(), time.process_time(), time.perf_counter()
+    muestreo = threading.Thread(target=muestrear, daemon=True)
+    muestreo.start()
+    hilos = [threading.Thread(target=correr, name=f"sesion-{i}") for i in range(sesiones)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    fin.set()
+    pared = time.perf_counter() - t_ini
+    cpu = time.process_time() - cpu_ini
+
+    ms = np.array([s for _, s in medidas]) * 1000 if medidas else np.array([np.nan])
+    por_paso = pd.DataFrame(medidas, columns=["paso", "s"]).groupby("paso")["s"].median().mul(1000).round(1)
+    return {
+        "sesiones": sesiones,
+        "reruns": len(medidas),
+        "errores": errores,
+        "p50_ms": round(float(np.percentile(ms, 50)), 1),
+        "p95_ms": round(float(np.percentile(ms, 95)), 1),
+        "p99_ms": round(float(np.percentile(ms, 99)), 1),
+        "max_ms": round(float(np.max(ms)), 1),
+        "pared_s": round(pared, 2),
+        "cpu_s": round(cpu, 2),
+        "cpu_pct": round(100 * cpu / pared / (os.cpu_count() or 1), 1),
+        "rss_ini_mb": round(rss_ini, 1),
+        "rss_pico_mb": round(rss_pico[0], 1),
+        "mediana_por_paso_ms": por_paso.to_dict(),
+    }
+
+
+def evaluar(resultados, presupuesto_p95=None, presupuesto_p99=None, linea_base=None, tolerancia=0.2) -> list:
+    """Lista de fallas (vacía = pasa)."""
+    fallas = []
+    base = {r["sesiones"]: r for r in (linea_base or [])}
+    for r in resultados:
+        n = r["sesiones"]
+        if r["errores"]:
+            fallas.append(f"{n} sesiones: {len(r['errores'])} con error ({r['errores'][0]})")
+        if presupuesto_p95 is not None and r["p95_ms"] > presupuesto_p95:
+            fallas.append(f"{n} sesiones: p95 {r['p95_ms']} ms > presupuesto {presupuesto_p95} ms")
+        if presupuesto_p99 is not None and r["p99_ms"] > presupuesto_p99:
+            fallas.append(f"{n} sesiones: p99 {r['p99_ms']} ms > presupuesto {presupuesto_p99} ms")
+        if n in base and r["p95_ms"] > base[n]["p95_ms"] * (1 + tolerancia):
+            fallas.append(f"{n} sesiones: p95 {r['p95_ms']} ms vs línea base {base[n]['p95_ms']} ms "
+                          f"(+{100 * (r['p95_ms'] / base[n]['p95_ms'] - 1):.0f}%, tolerancia {100 * tolerancia:.0f}%)")
+    return fallas
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Prueba de carga con sesiones concurrentes de la app")
+    ap.add_argument("--sesiones", default="1,2,4", help="niveles de concurrencia, p.ej. 1,4,8")
+    ap.add_argument("--filas", type=int, default=5000, help="filas de Inscritos sintéticos")
+    ap.add_argument("--indicadores", type=int, default=60)
+    ap.add_argument("--presupuesto-p95", type=float, help="ms; falla si algún nivel lo excede")
+    ap.add_argument("--presupuesto-p99", type=float, help="ms")
+    ap.add_argument("--linea-base", help="JSON de una corrida previa (--salida) para detectar regresiones")
+    ap.add_argument("--tolerancia", type=float, default=0.2, help="aumento de p95 permitido vs línea base")
+    ap.add_argument("--salida", help="guarda los resultados en JSON")
+    ap.add_argument("--timeout", type=float, default=300, help="s por rerun")
+    ap.add_argument("--api", action="store_true", help="prueba el servicio HTTP (api_comparador.py), no la app")
+    ap.add_argument("--clientes", default="1,8", help="--api: conexiones keep-alive concurrentes")
+    ap.add_argument("--hilos", type=int, default=4, help="--api: workers del servidor")
+    ap.add_argument("--solicitudes", type=int, default=200, help="--api: solicitudes por cliente")
+    args = ap.parse_args(argv)
+
+    if args.api:
+        niveles = [int(x) for x in args.clientes.split(",") if x.strip()]
+        resultados = carga_api(niveles, args.hilos, args.solicitudes, args.indicadores)
+        if args.salida:
+            with open(args.salida, "w", encoding="utf-8") as fh:
+                json.dump(resultados, fh, ensure_ascii=False, indent=2)
+        fallas = [f"{r['clientes']} clientes: {r['errores'][0]}" for r in resultados if r["errores"]]
+        fallas += [f"{r['clientes']} clientes: p95 {r['p95_ms']} ms > presupuesto {args.presupuesto_p95} ms"
+                   for r in resultados if args.presupuesto_p95 is not None and r["p95_ms"] > args.presupuesto_p95]
+        for f in fallas:
+            print(f"FALLA: {f}", file=sys.stderr)
+        return 1 if fallas else 0
+
+    niveles = [int(x) for x in args.sesiones.split(",") if x.strip()]
+    with tempfile.TemporaryDirectory(prefix="carga_") as tmp:
+        # cachés y almacenes de la app aislados de los reales
+        for var, sub in (("REPORTES_COMPARTIDOS_DIR", "compartidos"), ("REPORTES_DERRAME_DIR", "derrame"),
+                         ("REPORTES_DETALLE_DIR", "detalle"), ("REPORTES_ALMACEN", "almacen")):
+            os.environ.setdefault(var, os.path.join(tmp, sub))
+        rutas = libros_sinteticos(tmp, args.filas, args.indicadores)
+        resultados = []
+        for n in niveles:
+            r = nivel(rutas, n, args.timeout)
+            resultados.append(r)
+            print(f"{n:>3} sesiones | reruns {r['reruns']:>4} | p50 {r['p50_ms']:>8} ms | p95 {r['p95_ms']:>8} ms"
+                  f" | p99 {r['p99_ms']:>8} ms | CPU {r['cpu_s']:>6} s ({r['cpu_pct']}%)"
+                  f" | RSS pico {r['rss_pico_mb']} MB | errores {len(r['errores'])}", flush=True)
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as fh:
+            json.dump(resultados, fh, ensure_ascii=False, indent=2)
+    linea_base = None
+    if args.linea_base:
+        with open(args.linea_base, encoding="utf-8") as fh:
+            linea_base = json.load(fh)
+    fallas = evaluar(resultados, args.presupuesto_p95, args.presupuesto_p99, linea_base, args.tolerancia)
+    for f in fallas:
+        print(f"FALLA: {f}", file=sys.stderr)
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
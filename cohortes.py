@@ -0,0 +1,212 @@
+# cohortes.py — eficiencia terminal por cohorte (programa × generación).
+# Los ingresos por cohorte se derivan de la matrícula (Inscritos, carga actual + histórico
+# multiperiodo) y cada egresado se asigna a su cohorte de ingreso: por matrícula/ID si ambas
+# fuentes la traen, si no por Generación.
+
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+CODIGOS_PROGRAMA = ["TSUA", "TSUM", "TSUF", "IAM", "IDMA", "IECSA", "IMA", "MIA"]
+
+# Nombres de columna aceptados como identificador de alumno (comparados sin acentos ni mayúsculas)
+COLUMNAS_ID = ["matricula", "no. matricula", "id", "id alumno", "no. control", "numero de control", "expediente"]
+
+
+# ---------------- Mapeo Carrera → Código de Programa ---------------- #
+# TSUA, TSUM, TSUF, IAM, IDMA, IECSA, IMA, MIA
+def map_program_code(carrera: str) -> str:
+    t = str(carrera).strip().lower() if pd.notna(carrera) else ""
+    # Posgrado
+    if "maestría en ingeniería aeroespacial" in t:
+        return "MIA"
+    # Ingeniería
+    if "ingeniería aeronáutica en manufactura" in t:
+        return "IAM"
+    if "ingeniería en diseño mecánico aeronáutico" in t:
+        return "IDMA"
+    if "electrónica y control de sistemas de aeronaves" in t:
+        return "IECSA"
+    if "ingeniería en mantenimiento aeronáutico" in t:
+        return "IMA"
+    # TSU (Técnico)
+    if ("técnico" in t or "tsu" in t) and "aviónica" in t:
+        return "TSUA"
+    if ("técnico" in t or "tsu" in t) and ("mantenimiento" in t or "planeador y motor" in t):
+        return "TSUM"
+    if ("técnico" in t or "tsu" in t) and ("manufactura" in t or "maquinados de precisión" in t or "manufactura de aeronaves" in t):
+        return "TSUF"
+    # Casos no mapeados (Esp. Valuación, Maestría en Ciencias, etc.)
+    return ""
+
+
+def codigos_programa(carreras: pd.Series) -> pd.Series:
+    """Aplica map_program_code una sola vez por carrera distinta."""
+    unicos = pd.unique(carreras)
+    mapa = {c: map_program_code(c) for c in unicos}
+    return carreras.map(mapa).fillna("")
+
+
+# ================= UTILIDADES ================= #
+def _sin_acentos(s: str) -> str:
+    return "".join(ch for ch in unicodedata.normalize("NFKD", s) if not unicodedata.combining(ch))
+
+
+def columna_id(*dfs):
+    """Primera columna de identificador de alumno presente en todos los DataFrames (o None)."""
+    comunes = None
+    for df in dfs:
+        nombres = {_sin_acentos(str(c)).strip().lower(): c for c in df.columns}
+        comunes = nombres if comunes is None else {k: v for k, v in comunes.items() if k in nombres}
+    for cand in COLUMNAS_ID:
+        if comunes and cand in comunes:
+            return comunes[cand]
+    return None
+
+
+def _norm_gen(s: pd.Series) -> pd.Series:
+    """Generación como texto comparable entre archivos (2021, 2021.0 y '2021 ' -> '2021')."""
+    t = s.astype("string").str.strip().str.replace(r"\.0$", "", regex=True)
+    return t.where(t != "")
+
+
+def _norm_id(s: pd.Series) -> pd.Series:
+    t = s.astype("string").str.strip().str.upper().str.replace(r"\.0$", "", regex=True)
+    return t.where(t != "")
+
+
+# ================= MOTOR DE COHORTES ================= #
+def inscripciones(df_ins: pd.DataFrame, historico: pd.DataFrame = None, col_id=None) -> pd.DataFrame:
+    """
+    Inscripciones de la carga actual y del histórico multiperiodo (almacen.py) en un solo
+    DataFrame: Programa, Generación, _id (si hay) y _periodo ("actual" para la carga en curso).
+    Los egresados y bajas ya no aparecen en la matrícula vigente, pero sí en periodos anteriores.
+    """
+    partes = []
+    for df, periodo in ((df_ins, "actual"), (historico, None)):
+        if df is None or df.empty or not {"Carrera", "Generación"} <= set(df.columns):
+            continue
+        parte = pd.DataFrame({
+            "Programa": codigos_programa(df["Carrera"]).to_numpy(dtype=object),
+            "Generación": _norm_gen(df["Generación"]).to_numpy(dtype=object),
+            "_periodo": periodo if periodo else df["Periodo carga"].astype(str).to_numpy(dtype=object),
+        })
+        if col_id is not None:
+            parte["_id"] = _norm_id(df[col_id]).to_numpy(dtype=object) if col_id in df.columns else None
+        partes.append(parte)
+    if not partes:
+        return pd.DataFrame(columns=["Programa", "Generación", "_periodo"] + (["_id"] if col_id else []))
+    ins = pd.concat(partes, ignore_index=True)
+    return ins[(ins["Programa"] != "") & ins["Generación"].notna()]
+
+
+def _primer_ingreso(ins: pd.DataFrame) -> pd.DataFrame:
+    """
+    Una fila por alumno: la generación más antigua en la que aparece. Las filas sin ID (p.ej.
+    periodos del histórico guardados sin la columna) no entran: ver periodos_sin_id().
+    """
+    ins = ins.dropna(subset=["_id"])
+    return ins.sort_values("Generación", kind="stable").drop_duplicates("_id", keep="first")
+
+
+def periodos_sin_id(historico: pd.DataFrame, col_id) -> list:
+    """Periodos del histórico que no traen `col_id`: no cuentan en los ingresos por alumno."""
+    if historico is None or historico.empty or col_id is None:
+        return []
+    periodo = historico["Periodo carga"].astype(str)
+    if col_id not in historico.columns:
+        return sorted(periodo.unique())
+    con_id = historico[col_id].notna().groupby(periodo).any()
+    return sorted(con_id.index[~con_id])
+
+
+def ingresos_por_cohorte(ins: pd.DataFrame, col_id=None, egresados: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Ingresos por (Programa, Generación) a partir de inscripciones().
+    - Con ID: cada alumno cuenta una sola vez, en su primera generación; los egresados
+      asignados a una cohorte cuentan como ingreso de ella aunque no estén en Inscritos.
+    - Sin ID: la foto más grande de la cohorte entre los periodos cargados (una cohorte sólo
+      pierde alumnos con el tiempo; sumar periodos contaría a cada alumno varias veces).
+    """
+    claves = ["Programa", "Generación"]
+    if col_id is not None:
+        alumnos = _primer_ingreso(ins)[claves + ["_id"]]
+        if egresados is not None and "_id" in egresados.columns:
+            eg = egresados.dropna(subset=["_id"])
+            alumnos = pd.concat([alumnos, eg.loc[~eg["_id"].isin(alumnos["_id"]), claves + ["_id"]]])
+        return alumnos.groupby(claves).size().rename("Ingresos").reset_index()
+    return (ins.groupby(claves + ["_periodo"]).size().groupby(level=claves).max()
+            .rename("Ingresos").reset_index())
+
+
+def cohorte_de_egresados(df_eg: pd.DataFrame, ins: pd.DataFrame, col_id=None) -> pd.DataFrame:
+    """
+    Asigna cada egresado a su cohorte de ingreso (Programa, Generación).
+    - Con ID: join contra la primera generación en la que aparece el alumno (inscripciones()).
+    - Sin ID o sin coincidencia: se usan el programa y la Generación del propio egresado.
+    Con ID se conserva la columna _id (ingresos_por_cohorte la usa).
+    """
+    prog_eg = df_eg["_prog"] if "_prog" in df_eg.columns else codigos_programa(df_eg["Carrera"])
+    gen_eg = _norm_gen(df_eg["Generación"]) if "Generación" in df_eg.columns else pd.Series(pd.NA, index=df_eg.index, dtype="string")
+    eg = pd.DataFrame({"Programa": prog_eg.values, "Generación": gen_eg.values}, index=df_eg.index)
+
+    if col_id is not None and col_id in df_eg.columns and "_id" in ins.columns:
+        primero = _primer_ingreso(ins)[["_id", "Programa", "Generación"]].rename(
+            columns={"Programa": "_prog_ing", "Generación": "_gen_ing"})
+        eg["_id"] = _norm_id(df_eg[col_id]).values
+        eg = eg.merge(primero, on="_id", how="left")
+        hay = eg["_gen_ing"].notna()
+        eg["Programa"] = eg["_prog_ing"].where(hay, eg["Programa"])
+        eg["Generación"] = eg["_gen_ing"].where(hay, eg["Generación"])
+        # un egresado repetido en el archivo cuenta una vez
+        eg = pd.concat([eg[eg["_id"].isna()], eg.dropna(subset=["_id"]).drop_duplicates("_id")])
+        eg = eg[["Programa", "Generación", "_id"]]
+
+    return eg[(eg["Programa"] != "") & eg["Generación"].notna()]
+
+
+def eficiencia_por_cohorte(df_ins: pd.DataFrame, df_eg: pd.DataFrame, programas=None,
+                           historico: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Eficiencia Terminal por cohorte para todos los programa×generación a la vez.
+    `historico`: Inscritos de periodos anteriores (AlmacenPeriodos.leer, con "Periodo carga").
+    Sólo las generaciones que cubren los egresados (selección y filtros de `df_eg`): las demás
+    sumarían ingresos sin sus egresados y diluirían la eficiencia por programa.
+    Devuelve columnas: Programa, Generación, Ingresos, Egresados, Eficiencia (proporción 0..1).
+    """
+    cols = ["Programa", "Generación", "Ingresos", "Egresados", "Eficiencia"]
+    if df_ins is None or df_eg is None or df_ins.empty \
+       or not {"Carrera", "Generación"} <= set(df_ins.columns):
+        return pd.DataFrame(columns=cols)
+
+    col_id = columna_id(df_ins, df_eg)
+    ins = inscripciones(df_ins, historico, col_id)
+    cohorte_eg = cohorte_de_egresados(df_eg, ins, col_id)
+    ingresos = ingresos_por_cohorte(ins, col_id, cohorte_eg)
+    egresados = cohorte_eg.groupby(["Programa", "Generación"]).size().rename("Egresados").reset_index()
+
+    out = ingresos.merge(egresados, on=["Programa", "Generación"], how="outer")
+    out = out[out["Generación"].isin(cohorte_eg["Generación"].unique())]
+    out[["Ingresos", "Egresados"]] = out[["Ingresos", "Egresados"]].fillna(0).astype(int)
+    ing = out["Ingresos"].to_numpy(dtype=float)
+    out["Eficiencia"] = np.divide(out["Egresados"].to_numpy(dtype=float), ing,
+                                  out=np.full(len(out), np.nan), where=ing > 0)
+    if programas is not None:
+        out = out[out["Programa"].isin(programas)]
+    orden = {c: i for i, c in enumerate(CODIGOS_PROGRAMA)}
+    out = out.sort_values(["Programa", "Generación"], key=lambda s: s.map(orden) if s.name == "Programa" else s)
+    return out[cols].reset_index(drop=True)
+
+
+def eficiencia_por_programa(cohortes: pd.DataFrame, programas=CODIGOS_PROGRAMA) -> pd.DataFrame:
+    """
+    Agrega la tabla de cohortes a un único valor por programa (Σ egresados / Σ ingresos);
+    `cohortes` ya viene acotada a las generaciones de los egresados (eficiencia_por_cohorte).
+    """
+    tot = (cohortes.groupby("Programa")[["Ingresos", "Egresados"]].sum()
+           .reindex(programas).fillna(0).astype(int))
+    ing = tot["Ingresos"].to_numpy(dtype=float)
+    tot["Eficiencia"] = np.divide(tot["Egresados"].to_numpy(dtype=float), ing,
+                                  out=np.full(len(tot), np.nan), where=ing > 0)
+    return tot.rename_axis("Programa").reset_index()
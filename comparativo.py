@@ -0,0 +1,406 @@
+# comparativo.py — motor del comparativo de indicadores vs metas (Hoja2).
+# Sin dependencias de Streamlit: lo usan la app, la API HTTP (api_comparador.py) y los
+# procesos en segundo plano.
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from emparejamiento import MARGEN, UMBRAL, emparejar, plegar
+
+PERIODOS = ["Ene-Abr", "May-Ago", "Sep-Dic"]
+COLUMNAS_METAS = ["Indicador", "proceso", "Periodicidad", "Responsable"] + PERIODOS
+COLUMNAS_RESULTADOS = ["Indicador", "Responsable", "Resultado"]
+# Opcionales: "Sentido" (Mayor/Menor es mejor) y "Muestra mínima" en metas; "Muestra" en resultados
+COLUMNA_SENTIDO = "Sentido"
+COLUMNA_MUESTRA_MIN = "Muestra mínima"
+COLUMNA_MUESTRA = "Muestra"
+
+# Margen de la leyenda ("🟡 Margen ± 1% la meta planteada"), relativo a la meta
+TOLERANCIA = float(os.environ.get("REPORTES_TOLERANCIA", "0.01"))
+
+# === Semáforo (emojis, alineado con la leyenda de los reportes) ===
+SEMAFORO = {
+    "verde": "🟢 Verde",
+    "amarillo": "🟡 Margen ±1%",
+    "rojo": "🔴 Rojo",
+    "n/a": "⚪ N/A",
+    "no representativa": "🔵 Muestra no representativa",
+    "pendiente": "⏳ Pendiente",
+    "sin dato": "⚪ Sin dato",
+}
+
+
+# ================= UTILIDADES ================= #
+def norm_txt(s):
+    return str(s).strip().lower() if pd.notna(s) else ""
+
+def to_num(x):
+    """'58.0%' -> 58.0 ; 'N/A' -> NaN ; '1830' -> 1830.0"""
+    if pd.isna(x):
+        return np.nan
+    s = str(x).strip().replace(",", ".")
+    if s.upper() in ["N/A", "NA", "NONE", ""]:
+        return np.nan
+    if s.endswith("%"):
+        s = s[:-1].strip()
+        try:
+            return float(s)
+        except Exception:
+            return np.nan
+    try:
+        return float(s)
+    except Exception:
+        return np.nan
+
+def a_proporcion(serie: pd.Series) -> pd.Series:
+    """Celdas con '%' a proporción ('58%' -> 0.58, '0.5%' -> 0.005); las demás tal cual (1.05 -> 1.05)."""
+    v, con_pct = numeros(serie)
+    return v.mask(con_pct, v / 100)
+
+def es_na(x):
+    """Celda marcada explícitamente como 'N/A' (no se evalúa en el periodo)."""
+    return pd.notna(x) and str(x).strip().upper() in ("N/A", "NA")
+
+def sentido_de(x):
+    """+1 si mayor es mejor (default), -1 si menor es mejor."""
+    t = norm_txt(x)
+    return -1 if t.startswith(("menor", "desc", "min", "<", "↓")) else 1
+
+def es_porcentaje(df, cols=("Ene-Abr", "May-Ago", "Sep-Dic")):
+    """Indicador de porcentaje: alguna meta del renglón trae '%'."""
+    return np.logical_or.reduce([df[c].astype(str).str.contains("%", regex=False).to_numpy() for c in cols])
+
+def meta_efectiva(metas, preferida_col):
+    """Regla: usa la del periodo preferido; si es NaN y sólo una de las otras tiene dato, usa esa; si no, NaN."""
+    prefer = metas[preferida_col].to_numpy(dtype=float)
+    otras = metas[[c for c in PERIODOS if c != preferida_col]].to_numpy(dtype=float)
+    con_dato = ~np.isnan(otras)
+    unica = np.where(con_dato[:, 0], otras[:, 0], otras[:, 1])
+    return np.where(~np.isnan(prefer), prefer, np.where(con_dato.sum(axis=1) == 1, unica, np.nan))
+
+
+# ================= REGLAS DE ESTATUS ================= #
+# Declarativas y vectorizadas: cada regla es (estatus, condición sobre arreglos) y se
+# evalúan todas de una vez con np.select; gana la primera que se cumple, si ninguna -> rojo.
+REGLAS_ESTATUS = (
+    ("n/a",               lambda c: c["no_aplica"]),
+    ("pendiente",         lambda c: np.isnan(c["meta"])),
+    ("sin dato",          lambda c: np.isnan(c["resultado"])),
+    ("no representativa", lambda c: c["muestra"] < c["muestra_min"]),
+    ("verde",             lambda c: c["brecha"] >= 0),
+    ("amarillo",          lambda c: c["brecha"] >= -c["tolerancia"]),
+)
+ESTATUS_DEFAULT = "rojo"
+
+
+def _arreglo(x, forma, default, dtype=float):
+    if x is None:
+        return np.full(forma, default, dtype=dtype)
+    return np.asarray(x, dtype=dtype)
+
+
+def evaluar_estatus(meta, resultado, sentido=None, muestra=None, muestra_min=None,
+                    no_aplica=None, tolerancia=TOLERANCIA):
+    """
+    Estatus por indicador en una sola pasada (arreglos alineados: 1-D, o escenarios ×
+    indicadores con los parámetros por indicador de forma (n,), ver escenarios.py).
+    - meta y resultado ya en la misma escala: las celdas con '%' se convierten a proporción
+      al parsear (a_proporcion), nunca se adivina la escala por la magnitud del valor.
+    - sentido: +1 mayor es mejor, -1 menor es mejor.
+    - muestra < muestra_min -> 'no representativa'; no_aplica -> 'n/a'.
+    - Fuera de meta pero a menos de `tolerancia` (relativa a la meta) -> 'amarillo'.
+    """
+    meta = np.asarray(meta, dtype=float)
+    forma = meta.shape
+    resultado = np.asarray(resultado, dtype=float)
+
+    ctx = {
+        "meta": meta,
+        "resultado": resultado,
+        "brecha": (resultado - meta) * _arreglo(sentido, forma, 1),
+        "tolerancia": np.abs(meta) * tolerancia,
+        "muestra": _arreglo(muestra, forma, np.nan),
+        "muestra_min": _arreglo(muestra_min, forma, np.nan),
+        "no_aplica": _arreglo(no_aplica, forma, False, bool),
+    }
+    return np.select([cond(ctx) for _, cond in REGLAS_ESTATUS],
+                     [estatus for estatus, _ in REGLAS_ESTATUS], default=ESTATUS_DEFAULT)
+
+
+def comparador(resultado, meta):
+    """Estatus de un solo indicador (mismas reglas que evaluar_estatus)."""
+    return str(evaluar_estatus([meta], [resultado])[0])
+
+def fmt_val(v, is_pct):
+    if pd.isna(v):
+        return ""
+    x = float(v)
+    if is_pct:
+        return f"{x * 100:.1f}%"    # proporción (ver a_proporcion)
+    return f"{x:.0f}" if abs(x - round(x)) < 1e-9 else f"{x:.1f}"
+
+
+# ================= MOTOR ================= #
+def columnas_faltantes(df_metas: pd.DataFrame) -> list:
+    return [c for c in COLUMNAS_METAS if c not in df_metas.columns]
+
+
+def preparar_metas(df_metas: pd.DataFrame, periodo_col: str) -> pd.DataFrame:
+    """
+    Metas numéricas + bandera de porcentaje + meta efectiva del periodo + claves de join,
+    y los parámetros de las reglas de estatus (sentido, muestra mínima, N/A del periodo).
+    """
+    # detectar si el indicador es de porcentaje por presencia de "%" en metas
+    metas = df_metas.copy()
+    metas["_es_pct"] = es_porcentaje(metas)
+    metas["_no_aplica"] = metas[periodo_col].map(es_na).astype(bool)
+
+    # convertir metas a número ('85%' -> 0.85: la escala la da el '%' de la celda)
+    for col in PERIODOS:
+        metas[col] = a_proporcion(metas[col]).to_numpy()
+
+    # elegir meta efectiva según cuatrimestre elegido ('N/A' explícito no toma la de otro periodo)
+    metas["MetaEfectiva"] = np.where(metas["_no_aplica"], np.nan, meta_efectiva(metas, periodo_col))
+
+    metas["_sentido"] = metas[COLUMNA_SENTIDO].map(sentido_de) if COLUMNA_SENTIDO in metas.columns else 1
+    metas["_muestra_min"] = (
+        metas[COLUMNA_MUESTRA_MIN].map(to_num) if COLUMNA_MUESTRA_MIN in metas.columns else np.nan
+    )
+
+    # claves del join plegadas (acentos, mayúsculas, espacios y puntuación)
+    metas["_ind"] = plegar(metas["Indicador"])
+    metas["_resp"] = plegar(metas["Responsable"])
+    return metas
+
+
+def preparar_resultados(resultados: pd.DataFrame) -> pd.DataFrame:
+    """Claves normalizadas, resultado numérico y tamaño de muestra (si viene) para el join."""
+    out = resultados[COLUMNAS_RESULTADOS].copy()
+    out["_ind"] = plegar(out["Indicador"])
+    out["_resp"] = plegar(out["Responsable"])
+    out["_resultado_num"] = a_proporcion(out["Resultado"]).to_numpy()
+    out["_muestra"] = resultados[COLUMNA_MUESTRA].map(to_num) if COLUMNA_MUESTRA in resultados.columns else np.nan
+    return out
+
+
+def emparejar_resultados(metas: pd.DataFrame, resultados: pd.DataFrame, umbral: float = UMBRAL,
+                         margen: float = MARGEN) -> pd.DataFrame:
+    """
+    Resultados cuya clave (Indicador, Responsable) no existe en metas, comparados por
+    trigramas contra las metas que se quedaron sin resultado (mismo Responsable).
+    """
+    llaves_metas = set(zip(metas["_ind"], metas["_resp"]))
+    llaves_res = list(zip(resultados["_ind"], resultados["_resp"]))
+    en_metas = np.fromiter((k in llaves_metas for k in llaves_res), dtype=bool, count=len(llaves_res))
+    sueltos = resultados.loc[~en_metas & resultados["_ind"].ne("").to_numpy(),
+                             ["Indicador", "_ind", "_resp"]].drop_duplicates(["_ind", "_resp"])
+    if sueltos.empty:
+        # todo coincide exacto (el caso común): no hay nada que comparar por trigramas
+        return pd.DataFrame(columns=["Indicador capturado", "Indicador en metas", "clave", "bloque", "destino",
+                                     "Puntaje", "Coincidencia", "Alternativas"])
+    con_resultado = set(llaves_res)
+    libres = metas.loc[[k not in con_resultado for k in zip(metas["_ind"], metas["_resp"])],
+                       ["Indicador", "_ind", "_resp"]].drop_duplicates(["_ind", "_resp"])
+
+    emp = emparejar(
+        sueltos.rename(columns={"_ind": "clave", "_resp": "bloque"}),
+        libres.rename(columns={"_ind": "clave", "_resp": "bloque"}),
+        umbral, margen,
+    )
+    nombres = dict(zip(zip(libres["_ind"], libres["_resp"]), libres["Indicador"]))
+    emp.insert(0, "Indicador capturado", sueltos["Indicador"].to_numpy())
+    emp.insert(1, "Indicador en metas", [nombres.get((d, b)) for d, b in zip(emp["destino"], emp["bloque"])])
+    return emp
+
+
+def comparar(metas: pd.DataFrame, resultados: pd.DataFrame, emparejamiento: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    LEFT JOIN desde metas (ya preparadas) y estatus por indicador (reglas vectorizadas).
+    Los resultados con nombre aproximado (ver emparejar_resultados) se enlazan a su meta;
+    los ambiguos se quedan fuera (la meta queda "sin dato") y se reportan aparte.
+    """
+    if emparejamiento is None:
+        emparejamiento = emparejar_resultados(metas, resultados)
+    enlaces = emparejamiento[emparejamiento["Coincidencia"].eq("aproximada")]
+    mapa = dict(zip(zip(enlaces["clave"], enlaces["bloque"]), enlaces["destino"]))
+    claves = [mapa.get(k, k[0]) for k in zip(resultados["_ind"], resultados["_resp"])]
+    resultados = resultados.assign(
+        _coincidencia=np.where(np.asarray(claves, dtype=object) != resultados["_ind"].to_numpy(dtype=object),
+                               "aproximada", "exacta"),
+        _ind=claves,
+    )
+
+    comp = metas.merge(
+        resultados[["_ind", "_resp", "_resultado_num", "_muestra", "_coincidencia"]],
+        on=["_ind", "_resp"],
+        how="left",
+    )
+    comp["Estatus"] = evaluar_estatus(
+        comp["MetaEfectiva"], comp["_resultado_num"],
+        sentido=comp["_sentido"],
+        muestra=comp["_muestra"], muestra_min=comp["_muestra_min"], no_aplica=comp["_no_aplica"],
+    )
+    return comp
+
+
+def formatear_comparativo(comp: pd.DataFrame) -> pd.DataFrame:
+    """Salida para pantalla/exportaciones: metas y resultado formateados + Semáforo."""
+    out = comp[[
+        "Indicador", "proceso", "Periodicidad", "Responsable",
+        "Ene-Abr", "May-Ago", "Sep-Dic", "MetaEfectiva", "_resultado_num", "_es_pct", "Estatus",
+    ]].rename(columns={
+        "proceso": "Proceso",
+        "MetaEfectiva": "Meta efectiva",
+        "_resultado_num": "Resultado",
+    })
+
+    # Formateos: si es porcentaje, se muestra como % (0.8 -> 80.0%)
+    out["Meta Ene-Abr"] = [fmt_val(v, p) for v, p in zip(out["Ene-Abr"], out["_es_pct"])]
+    out["Meta May-Ago"] = [fmt_val(v, p) for v, p in zip(out["May-Ago"], out["_es_pct"])]
+    out["Meta Sep-Dic"] = [fmt_val(v, p) for v, p in zip(out["Sep-Dic"], out["_es_pct"])]
+    out["Meta efectiva"] = [fmt_val(v, p) for v, p in zip(out["Meta efectiva"], out["_es_pct"])]
+    out["Resultado"]     = [fmt_val(v, p) for v, p in zip(out["Resultado"],     out["_es_pct"])]
+
+    comp_out = out[[
+        "Indicador", "Proceso", "Periodicidad", "Responsable",
+        "Meta Ene-Abr", "Meta May-Ago", "Meta Sep-Dic", "Meta efectiva", "Resultado", "Estatus",
+    ]]
+    if not comp_out.empty:
+        comp_out.insert(
+            comp_out.columns.get_loc("Estatus") + 1,
+            "Semáforo",
+            comp_out["Estatus"].map(SEMAFORO).fillna("⚪ Sin dato")
+        )
+    return comp_out
+
+
+def construir_comparativo(df_metas: pd.DataFrame, resultados: pd.DataFrame, periodo_col: str):
+    """Hoja2 + resultados -> (comp, comp_out). Valida antes con columnas_faltantes()."""
+    comp = comparar(preparar_metas(df_metas, periodo_col), preparar_resultados(resultados))
+    return comp, formatear_comparativo(comp)
+
+
+def conteo_estatus(comp: pd.DataFrame) -> dict:
+    return {k: int(v) for k, v in comp["Estatus"].value_counts().items()}
+
+
+# ================= CAPTURA MASIVA ================= #
+# Variables 1 y 2 capturadas por los responsables en su propia hoja: se enlazan a las
+# claves de captura ("ind::<indicador>::<responsable>") y se calcula Variable 2 ÷ Variable 1
+# para todas las filas a la vez, con las mismas reglas que el formulario (_parse_val).
+COLUMNAS_CAPTURA = ["Indicador", "Responsable", "Variable 1", "Variable 2", "Comentarios", "Porcentaje"]
+VERDADEROS = ("si", "sí", "s", "x", "true", "verdadero", "1", "1.0", "%", "pct")
+
+
+def numeros(serie: pd.Series):
+    """to_num vectorizado: (valores float, termina en '%')."""
+    s = serie.astype("string").str.strip().str.replace(",", ".", regex=False)
+    con_pct = s.str.endswith("%").fillna(False).astype(bool)
+    s = s.where(~con_pct, s.str[:-1].str.strip())
+    s = s.mask(s.str.upper().isin(["N/A", "NA", "NONE", ""]))
+    return pd.to_numeric(s, errors="coerce").astype(float), con_pct
+
+
+def valores_captura(serie: pd.Series, pct) -> pd.Series:
+    """_parse_val vectorizado: en modo porcentaje '50' o '50%' -> 0.5; 0..1 se deja igual."""
+    v, con_pct = numeros(serie)
+    pct = pd.Series(pct, index=serie.index).astype(bool)
+    return v.mask(pct & (con_pct | (v > 1)), v / 100.0)
+
+
+def calcular_captura(v1: pd.Series, v2: pd.Series, pct):
+    """(Variable 1, Variable 2, Resultado = V2 ÷ V1) numéricos; NaN si V1 es 0 o falta algo."""
+    n1, n2 = valores_captura(v1, pct), valores_captura(v2, pct)
+    return n1, n2, (n2 / n1).where(n1.notna() & n1.ne(0) & n2.notna())
+
+
+def clave_captura(indicadores: pd.Series, responsables: pd.Series) -> pd.Series:
+    """Claves del formulario de captura: f"ind::{norm_txt(ind)}::{norm_txt(resp)}"."""
+    def norm(s):
+        return s.astype("string").str.strip().str.lower().fillna("").astype(object)
+    return "ind::" + norm(indicadores) + "::" + norm(responsables)
+
+
+def importar_captura(importada: pd.DataFrame, df_manual: pd.DataFrame, pct_default: bool = False,
+                     umbral: float = UMBRAL, margen: float = MARGEN) -> pd.DataFrame:
+    """
+    Enlaza cada fila de la hoja importada con un indicador de la hoja de captura (exacto por
+    nombre plegado y Responsable; si no, por trigramas como emparejar_resultados) y calcula
+    el resultado. Sin columna Responsable se enlaza sólo por Indicador. Coincidencia:
+    exacta | aproximada | ambigua | sin candidato | repetida (gana la última fila).
+    """
+    con_resp = "Responsable" in importada.columns
+    imp = importada.reindex(columns=COLUMNAS_CAPTURA).reset_index(drop=True)
+    base = df_manual.reindex(columns=["Indicador", "Responsable"]).drop_duplicates().reset_index(drop=True)
+    base["clave"] = plegar(base["Indicador"])
+    base["bloque"] = plegar(base["Responsable"]) if con_resp else ""
+    consulta = pd.DataFrame({"clave": plegar(imp["Indicador"]),
+                             "bloque": plegar(imp["Responsable"]) if con_resp else ""})
+
+    # Sin Responsable, un nombre repetido en la hoja de captura no se puede enlazar solo
+    repetidas = base.duplicated(["clave", "bloque"], keep=False)
+    unicas = base[~repetidas].reset_index(drop=True)
+    pos = pd.MultiIndex.from_frame(unicas[["clave", "bloque"]]).get_indexer(pd.MultiIndex.from_frame(consulta))
+    coincidencia = np.where(pos >= 0, "exacta", "sin candidato").astype(object)
+    puntaje = np.where(pos >= 0, 1.0, 0.0)
+    ambiguas = pd.MultiIndex.from_frame(consulta).isin(pd.MultiIndex.from_frame(base[repetidas][["clave", "bloque"]]))
+    coincidencia[ambiguas] = "ambigua"
+
+    sueltas = np.flatnonzero((pos < 0) & ~ambiguas & consulta["clave"].ne("").to_numpy())
+    if len(sueltas):
+        libres = unicas.drop(index=np.unique(pos[pos >= 0]))
+        emp = emparejar(consulta.iloc[sueltas], libres[["clave", "bloque"]], umbral, margen)
+        posicion = {k: i for i, k in enumerate(zip(unicas["clave"], unicas["bloque"]))}
+        for i, d, b, p, c in zip(sueltas, emp["destino"], emp["bloque"], emp["Puntaje"], emp["Coincidencia"]):
+            coincidencia[i], puntaje[i] = c, p
+            if c == "aproximada":
+                pos[i] = posicion[(d, b)]
+
+    enlazada = pos >= 0
+    destino = unicas.iloc[np.where(enlazada, pos, 0)] if len(unicas) else unicas.reindex(range(len(pos)))
+    indicador = np.where(enlazada, destino["Indicador"].to_numpy(dtype=object), None)
+    responsable = np.where(enlazada, destino["Responsable"].to_numpy(dtype=object), None)
+
+    pct = imp["Porcentaje"].astype("string").str.strip().str.lower().isin(VERDADEROS)
+    pct = pct.where(imp["Porcentaje"].notna(), pct_default).astype(bool)
+    _, _, resultado = calcular_captura(imp["Variable 1"], imp["Variable 2"], pct)
+
+    out = pd.DataFrame({
+        "Fila": np.arange(len(imp)) + 2,                  # fila de la hoja (encabezado en la 1)
+        "Indicador importado": imp["Indicador"],
+        "Indicador": indicador,
+        "Responsable": responsable,
+        "Variable 1": imp["Variable 1"].astype("string").fillna("").astype(object),
+        "Variable 2": imp["Variable 2"].astype("string").fillna("").astype(object),
+        "Porcentaje": pct,
+        "Resultado": resultado,
+        "Comentarios": imp["Comentarios"],
+        "Coincidencia": coincidencia,
+        "Puntaje": puntaje,
+    })
+    out["_key"] = clave_captura(out["Indicador"], out["Responsable"]).where(enlazada)
+    # Dos filas al mismo indicador: vale la última (como escribir dos veces en el formulario)
+    repetida = enlazada & out["_key"].duplicated(keep="last").to_numpy()
+    out.loc[repetida, "Coincidencia"] = "repetida"
+    return out
+
+
+def cambios_captura(importacion: pd.DataFrame) -> tuple:
+    """
+    (valores, quitar) para aplicar de una vez sobre el estado de captura: v1/v2/pct/res de
+    las filas enlazadas (exacta o aproximada) y comentarios sólo si vienen en la hoja.
+    """
+    ok = importacion[importacion["Coincidencia"].isin(["exacta", "aproximada"])]
+    valores, quitar = {}, []
+    for kb, v1, v2, pct, res, com in zip(ok["_key"], ok["Variable 1"], ok["Variable 2"], ok["Porcentaje"],
+                                         ok["Resultado"], ok["Comentarios"]):
+        valores[kb + "::v1"], valores[kb + "::v2"], valores[kb + "::pct"] = v1, v2, bool(pct)
+        if pd.notna(com):
+            valores[kb + "::com"] = str(com)
+        if pd.notna(res):
+            valores[kb + "::res"] = float(res)
+        else:
+            quitar.append(kb + "::res")
+    return valores, quitar
@@ -0,0 +1,145 @@
+# compartidos.py — datasets parseados compartidos entre sesiones y procesos.
+# Cada carga se guarda una sola vez como archivo Arrow IPC (sin compresión) con nombre =
+# huella del contenido del archivo subido. Todas las sesiones (y procesos de trabajo) lo
+# abren con memory-map: las columnas numéricas y de texto apuntan a las mismas páginas
+# físicas del archivo en vez de tener una copia en el heap por sesión.
+
+import os
+import tempfile
+import threading
+import uuid
+
+import pandas as pd
+
+from memoria import olvidar_mapeo, registrar_mapeo
+from vuelo_unico import LECTURAS
+
+DIR_COMPARTIDOS = os.environ.get(
+    "REPORTES_COMPARTIDOS_DIR", os.path.join(tempfile.gettempdir(), "reportes_compartidos")
+)
+LIMITE_MB = float(os.environ.get("REPORTES_COMPARTIDOS_MB", "4096"))
+
+_abiertos = {}            # ruta -> pa.Table mapeada (una por proceso)
+_lock = threading.Lock()
+
+
+def _ruta(clave: str, directorio: str) -> str:
+    return os.path.join(directorio, f"{clave}.arrow")
+
+
+def tabla_arrow(df: pd.DataFrame):
+    """DataFrame -> pa.Table; columnas object con tipos mezclados se guardan como texto."""
+    import pyarrow as pa
+
+    cols = {}
+    for c in df.columns:
+        s = df[c]
+        try:
+            cols[str(c)] = pa.array(s, from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            cols[str(c)] = pa.array(s.where(s.isna(), s.astype(str)), from_pandas=True)
+    return pa.table(cols)
+
+
+def _mapeo_tipos():
+    """Texto como StringDtype respaldado por Arrow (sin copia) también en pandas 2."""
+    import pyarrow as pa
+
+    try:
+        if pd.get_option("future.infer_string"):   # pandas 3: ya es el default
+            return None
+    except KeyError:
+        pass
+    texto = pd.StringDtype("pyarrow")
+    return {pa.string(): texto, pa.large_string(): texto}.get
+
+
+def publicado(clave: str, directorio: str = DIR_COMPARTIDOS) -> bool:
+    return os.path.exists(_ruta(clave, directorio))
+
+
+def publicar(clave: str, df: pd.DataFrame, directorio: str = DIR_COMPARTIDOS) -> str:
+    """Escribe el dataset (a .tmp + rename, seguro con varios procesos) si aún no existe."""
+    import pyarrow as pa
+
+    ruta = _ruta(clave, directorio)
+    if os.path.exists(ruta):
+        return ruta
+    os.makedirs(directorio, exist_ok=True)
+    tabla = tabla_arrow(df)
+    tmp = f"{ruta}.{uuid.uuid4().hex}.tmp"
+    with pa.OSFile(tmp, "wb") as fh, pa.ipc.new_file(fh, tabla.schema) as escritor:
+        escritor.write_table(tabla)
+    os.replace(tmp, ruta)
+    _recortar(directorio, conservar=ruta)
+    return ruta
+
+
+def abrir(clave: str, directorio: str = DIR_COMPARTIDOS) -> pd.DataFrame:
+    """DataFrame respaldado por el archivo mapeado en memoria (vistas de sólo lectura)."""
+    import pyarrow as pa
+
+    ruta = _ruta(clave, directorio)
+    with _lock:
+        tabla = _abiertos.get(ruta)
+        if tabla is None:
+            # todo el archivo como un buffer del mapeo: memoria.py descuenta sus columnas
+            buffer = pa.memory_map(ruta, "r").read_buffer()
+            tabla = pa.ipc.open_file(buffer).read_all()
+            _abiertos[ruta] = tabla
+            registrar_mapeo(ruta, buffer.address, buffer.address + buffer.size)
+    try:
+        os.utime(ruta)  # marca de uso para el recorte por antigüedad
+    except OSError:
+        pass
+    return tabla.to_pandas(split_blocks=True, types_mapper=_mapeo_tipos())
+
+
+def con_columna(df: pd.DataFrame, nombre: str, valores) -> pd.DataFrame:
+    """
+    df más la columna `nombre` sin copiar las demás: copia superficial + asignación. Con
+    pandas 2 sin copy-on-write, df.assign() copia a fondo el frame mapeado.
+    """
+    out = df.copy(deep=False)
+    out[nombre] = valores
+    return out
+
+
+def compartido(clave: str, leer, directorio: str = DIR_COMPARTIDOS) -> pd.DataFrame:
+    """
+    Abre el dataset `clave`; si nadie lo ha publicado, lo parsea con `leer()` y lo publica.
+    Sesiones que suben el mismo archivo a la vez esperan el único parseo en curso.
+    """
+    if not publicado(clave, directorio):
+        LECTURAS.hacer(
+            ("compartido", directorio, clave),
+            lambda: publicado(clave, directorio) or publicar(clave, leer(), directorio),
+        )
+    return abrir(clave, directorio)
+
+
+def _recortar(directorio: str, conservar: str = None):
+    """Si el directorio excede LIMITE_MB borra los archivos usados hace más tiempo."""
+    try:
+        archivos = [
+            (e.stat().st_mtime, e.stat().st_size, e.path)
+            for e in os.scandir(directorio) if e.name.endswith(".arrow")
+        ]
+    except OSError:
+        return
+    total = sum(t for _, t, _ in archivos)
+    limite = LIMITE_MB * 1024 * 1024
+    for _, tam, ruta in sorted(archivos):
+        if total <= limite:
+            break
+        if ruta == conservar:
+            continue
+        try:
+            # En POSIX las sesiones que ya lo tienen mapeado siguen leyendo sus páginas
+            os.remove(ruta)
+            total -= tam
+        except OSError:
+            pass
+        with _lock:
+            _abiertos.pop(ruta, None)
+            olvidar_mapeo(ruta)     # sin la tabla el mapeo se libera y sus direcciones se reusan
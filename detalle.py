@@ -0,0 +1,113 @@
+# detalle.py — exportación del detalle filtrado (fila por alumno) a CSV o Parquet.
+# Se escribe por bloques directamente a disco: nunca se arma una segunda copia completa
+# del DataFrame (ni del texto CSV) en memoria, sólo un bloque de filas a la vez. (La descarga
+# con st.download_button sí lee el archivo terminado completo a memoria.)
+# Los archivos preparados se borran por antigüedad y cuando el directorio excede su límite.
+
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+FILAS_POR_BLOQUE = 100_000
+DIR_DETALLE = os.environ.get("REPORTES_DETALLE_DIR", os.path.join(tempfile.gettempdir(), "reportes_detalle"))
+LIMITE_MB = float(os.environ.get("REPORTES_DETALLE_MB", "2048"))
+MAX_HORAS = float(os.environ.get("REPORTES_DETALLE_HORAS", "24"))
+
+FORMATOS = {
+    "CSV": (".csv", "text/csv"),
+    "Parquet": (".parquet", "application/vnd.apache.parquet"),
+}
+
+
+def bloques(df: pd.DataFrame, columnas=None, renombrar=None, filas_por_bloque=FILAS_POR_BLOQUE):
+    """Rebanadas consecutivas de df (sólo `columnas`, con `renombrar` aplicado)."""
+    cols = list(df.columns) if columnas is None else [c for c in columnas if c in df.columns]
+    for ini in range(0, len(df), filas_por_bloque):
+        bloque = df.iloc[ini:ini + filas_por_bloque][cols]
+        yield bloque.rename(columns=renombrar) if renombrar else bloque
+
+
+def _para_arrow(bloque: pd.DataFrame) -> pd.DataFrame:
+    """Columnas object como texto para que todos los bloques compartan esquema."""
+    obj = [c for c in bloque.columns if bloque[c].dtype == object]
+    if not obj:
+        return bloque
+    return bloque.astype({c: "string" for c in obj})
+
+
+def escribir_csv(df, destino, columnas=None, renombrar=None, progreso=None,
+                 filas_por_bloque=FILAS_POR_BLOQUE):
+    escritas = 0
+    # utf-8-sig para que Excel abra bien los acentos
+    with open(destino, "w", encoding="utf-8-sig", newline="") as fh:
+        for i, bloque in enumerate(bloques(df, columnas, renombrar, filas_por_bloque)):
+            bloque.to_csv(fh, index=False, header=(i == 0))
+            escritas += len(bloque)
+            if progreso:
+                progreso(escritas, len(df))
+        if len(df) == 0:
+            pd.DataFrame(columns=[(renombrar or {}).get(c, c) for c in (columnas or df.columns)]).to_csv(fh, index=False)
+    return destino
+
+
+def escribir_parquet(df, destino, columnas=None, renombrar=None, progreso=None,
+                     filas_por_bloque=FILAS_POR_BLOQUE):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    escritas = 0
+    try:
+        for bloque in bloques(df, columnas, renombrar, filas_por_bloque):
+            tabla = pa.Table.from_pandas(_para_arrow(bloque), preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(destino, tabla.schema)
+            writer.write_table(tabla.cast(writer.schema))   # un row group por bloque
+            escritas += len(bloque)
+            if progreso:
+                progreso(escritas, len(df))
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        vacio = df.iloc[:0] if columnas is None else df.iloc[:0][[c for c in columnas if c in df.columns]]
+        _para_arrow(vacio.rename(columns=renombrar) if renombrar else vacio).to_parquet(destino, index=False)
+    return destino
+
+
+def _recortar(directorio: str, conservar: str = None, limite_mb: float = LIMITE_MB, max_horas: float = MAX_HORAS):
+    """Borra los archivos de más de `max_horas` y, si aún excede `limite_mb`, los más viejos."""
+    try:
+        archivos = [(e.stat().st_mtime, e.stat().st_size, e.path) for e in os.scandir(directorio) if e.is_file()]
+    except OSError:
+        return
+    total = sum(t for _, t, _ in archivos)
+    limite = limite_mb * 1024 * 1024
+    vencido = time.time() - max_horas * 3600
+    for mtime, tam, ruta in sorted(archivos):
+        if ruta == conservar or (mtime >= vencido and total <= limite):
+            continue
+        try:
+            os.remove(ruta)
+            total -= tam
+        except OSError:
+            pass
+
+
+def exportar_detalle(df, formato, nombre, columnas=None, renombrar=None, progreso=None,
+                     dir_destino=DIR_DETALLE):
+    """
+    Escribe el detalle en `dir_destino/<nombre><ext>` (escritura a .tmp + rename) y devuelve
+    (ruta, mime).
+    """
+    ext, mime = FORMATOS[formato]
+    os.makedirs(dir_destino, exist_ok=True)
+    ruta = os.path.join(dir_destino, f"{nombre}{ext}")
+    tmp = ruta + ".tmp"
+    escribir = escribir_parquet if formato == "Parquet" else escribir_csv
+    escribir(df, tmp, columnas=columnas, renombrar=renombrar, progreso=progreso)
+    os.replace(tmp, ruta)
+    _recortar(dir_destino, conservar=ruta)
+    return ruta, mime
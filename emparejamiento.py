@@ -0,0 +1,139 @@
+# emparejamiento.py — emparejamiento aproximado de nombres de indicador.
+# Los nombres capturados (hoja 0, automáticos) y los de metas (Hoja2) suelen diferir en
+# acentos, espacios o pequeñas erratas. Primero se pliegan (sin acentos, minúsculas,
+# puntuación y espacios colapsados); lo que aún no coincide se compara por trigramas de
+# caracteres, pero sólo contra los candidatos del mismo bloque (mismo Responsable y algún
+# trigrama en común), así que no se calcula la matriz completa N×M.
+
+import os
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Puntaje Dice (0–1) desde el cual se enlaza solo, y ventaja mínima sobre el segundo lugar
+UMBRAL = float(os.environ.get("REPORTES_UMBRAL_COINCIDENCIA", "0.85"))
+MARGEN = float(os.environ.get("REPORTES_MARGEN_COINCIDENCIA", "0.05"))
+UMBRAL_SUGERENCIA = 0.5
+# Trigramas presentes en más de esta fracción de las claves no sirven para bloquear
+FRACCION_BLOQUE = 0.2
+
+
+def _plegar(serie: pd.Series) -> pd.Series:
+    s = serie.astype("string").fillna("")
+    s = s.str.normalize("NFKD").str.encode("ascii", errors="ignore").str.decode("ascii")
+    return s.str.lower().str.replace(r"[\W_]+", " ", regex=True).str.strip().astype(object)
+
+
+# Los mismos nombres (indicadores, responsables) se pliegan una y otra vez entre reruns y
+# llamadas a la API: se recuerdan los ya plegados (texto -> clave)
+_plegados = {}
+MAX_PLEGADOS = 200_000
+
+
+def plegar(serie: pd.Series) -> pd.Series:
+    """'  Matrícula   TOTAL.' -> 'matricula total' (vectorizado; NaN -> '')."""
+    global _plegados
+    valores = serie.to_numpy(dtype=object)
+    es_texto = np.fromiter((isinstance(v, str) for v in valores), dtype=bool, count=len(valores))
+    if not es_texto.all():
+        # números, NaN, fechas: sin memoria
+        out = _plegar(serie)
+        if es_texto.any():
+            out[es_texto] = plegar(serie[es_texto]).to_numpy()
+        return out
+    cache = _plegados
+    nuevos = [v for v in pd.unique(valores) if v not in cache]
+    if nuevos:
+        if len(cache) + len(nuevos) > MAX_PLEGADOS:
+            cache = _plegados = {}
+        cache.update(zip(nuevos, _plegar(pd.Series(nuevos, dtype=object))))
+    return pd.Series([cache[v] for v in valores], index=serie.index, dtype=object)
+
+
+def trigramas(clave: str) -> frozenset:
+    t = f"  {clave} "
+    return frozenset(t[i:i + 3] for i in range(len(t) - 2))
+
+
+def dice(a: frozenset, b: frozenset) -> float:
+    return 2 * len(a & b) / (len(a) + len(b)) if a or b else 0.0
+
+
+class IndiceTrigramas:
+    """Índice invertido (bloque, trigrama) -> posiciones de las claves objetivo."""
+
+    def __init__(self, claves, bloques=None):
+        self.claves = list(claves)
+        self.bloques = list(bloques) if bloques is not None else [None] * len(self.claves)
+        self.gramas = [trigramas(k) for k in self.claves]
+        self.indice = defaultdict(list)
+        for i, (b, gs) in enumerate(zip(self.bloques, self.gramas)):
+            for g in gs:
+                self.indice[(b, g)].append(i)
+        tam_bloque = Counter(self.bloques)
+        # Trigramas muy comunes dentro de su bloque ("de ", "por") sólo agregan ruido
+        for llave in [k for k, v in self.indice.items()
+                      if len(v) > max(50, FRACCION_BLOQUE * tam_bloque[k[0]])]:
+            del self.indice[llave]
+
+    def candidatos(self, clave: str, bloque=None, n: int = 3) -> list:
+        """[(posición, puntaje Dice)] de los n mejores candidatos dentro del bloque."""
+        q = trigramas(clave)
+        comunes = Counter()
+        for g in q:
+            comunes.update(self.indice.get((bloque, g), ()))
+        if not comunes:
+            return []
+        # El conteo de trigramas compartidos preselecciona; el puntaje exacto sólo para esos
+        puntajes = [(i, dice(q, self.gramas[i])) for i, _ in comunes.most_common(max(20, n * 5))]
+        puntajes.sort(key=lambda t: -t[1])
+        return puntajes[:n]
+
+
+@lru_cache(maxsize=32)
+def indice_de(claves: tuple, bloques: tuple) -> IndiceTrigramas:
+    """Índice de las mismas claves objetivo (p.ej. las metas de un mismo Hoja2) construido una vez."""
+    return IndiceTrigramas(claves, bloques)
+
+
+def emparejar(consultas: pd.DataFrame, objetivos: pd.DataFrame, umbral: float = UMBRAL,
+              margen: float = MARGEN) -> pd.DataFrame:
+    """
+    consultas/objetivos: columnas "clave" y "bloque" (ya plegadas). Devuelve por consulta:
+    clave, bloque, destino, Puntaje, Coincidencia ("aproximada" | "ambigua" | "sin candidato")
+    y Alternativas. Cada objetivo se enlaza a lo más con una consulta (gana el mejor puntaje).
+    """
+    columnas = ["clave", "bloque", "destino", "Puntaje", "Coincidencia", "Alternativas"]
+    if consultas.empty or objetivos.empty:
+        out = consultas[["clave", "bloque"]].assign(destino=None, Puntaje=0.0, Coincidencia="sin candidato",
+                                                    Alternativas="")
+        return out.reindex(columns=columnas)
+
+    indice = indice_de(tuple(objetivos["clave"]), tuple(objetivos["bloque"]))
+    filas = []
+    for clave, bloque in zip(consultas["clave"], consultas["bloque"]):
+        cands = indice.candidatos(clave, bloque)
+        mejor = cands[0] if cands else (None, 0.0)
+        segundo = cands[1][1] if len(cands) > 1 else 0.0
+        if mejor[1] >= umbral and mejor[1] - segundo >= margen:
+            estado = "aproximada"
+        elif mejor[1] >= UMBRAL_SUGERENCIA:
+            estado = "ambigua"
+        else:
+            estado = "sin candidato"
+        filas.append({
+            "clave": clave, "bloque": bloque,
+            "destino": indice.claves[mejor[0]] if mejor[0] is not None else None,
+            "Puntaje": round(mejor[1], 3), "Coincidencia": estado,
+            "Alternativas": " | ".join(indice.claves[i] for i, p in cands[1:] if p >= UMBRAL_SUGERENCIA),
+        })
+    out = pd.DataFrame(filas, columns=columnas)
+
+    # Un objetivo reclamado por varias consultas: se queda con la de mayor puntaje
+    auto = out["Coincidencia"].eq("aproximada")
+    orden = out[auto].sort_values("Puntaje", ascending=False, kind="stable")
+    repetidas = orden.index[orden.duplicated(["bloque", "destino"])]
+    out.loc[repetidas, "Coincidencia"] = "ambigua"
+    return out
@@ -0,0 +1,119 @@
+# escenarios.py — simulación "¿qué pasa si?" sobre el comparativo ya calculado (comparar()).
+# Cada escenario ajusta metas o resultados (factor y/o delta) de los indicadores que cumplen
+# un filtro por Proceso / Responsable / Indicador. Todos los escenarios se evalúan de una vez:
+# matrices escenarios × indicadores con las mismas reglas de evaluar_estatus, y los conteos
+# por escenario × grupo × estatus salen de un solo bincount.
+#
+#   Escenario   Ajusta  Factor  Delta  Proceso  Responsable  Indicador
+#   Metas −5%   meta    0.95
+#   IMA +3 pts  resultado       3               IMA
+#
+# Varias filas con el mismo Escenario se aplican en orden sobre el mismo escenario. Delta va en
+# las unidades del indicador; en los de porcentaje son puntos (3 -> +3%). Filtro vacío = todos.
+
+import numpy as np
+import pandas as pd
+
+from comparativo import SEMAFORO, TOLERANCIA, evaluar_estatus
+from emparejamiento import plegar
+
+COLUMNAS_ESCENARIOS = ["Escenario", "Ajusta", "Factor", "Delta", "Proceso", "Responsable", "Indicador"]
+AJUSTES = ("meta", "resultado")
+# filtro del escenario -> columna de comp
+FILTROS = {"Proceso": "proceso", "Responsable": "Responsable", "Indicador": "Indicador"}
+BASE = "Base"
+ESTATUS = list(SEMAFORO)
+
+
+class EscenarioInvalido(ValueError):
+    pass
+
+
+def barrido(pasos, ajusta: str = "meta", **filtro) -> pd.DataFrame:
+    """Un escenario por paso relativo (-0.05 -> factor 0.95), p.ej. barrido([-0.05, -0.1], Proceso="Calidad")."""
+    sujeto = "Metas" if ajusta == "meta" else "Resultados"
+    detalle = " ".join(str(v) for v in filtro.values() if v)
+    return pd.DataFrame([
+        {"Escenario": f"{sujeto} {p:+.0%}" + (f" ({detalle})" if detalle else ""), "Ajusta": ajusta,
+         "Factor": 1 + p, "Delta": 0.0, **filtro}
+        for p in pasos
+    ], columns=COLUMNAS_ESCENARIOS)
+
+
+def _normalizar(escenarios: pd.DataFrame) -> pd.DataFrame:
+    esc = escenarios.reindex(columns=COLUMNAS_ESCENARIOS).copy()
+    esc["Escenario"] = esc["Escenario"].astype("string").str.strip()
+    esc = esc[esc["Escenario"].fillna("").ne("") & esc["Escenario"].ne(BASE)]
+    esc["Ajusta"] = esc["Ajusta"].astype("string").str.strip().str.lower().fillna("meta")
+    invalidos = sorted(set(esc["Ajusta"]) - set(AJUSTES))
+    if invalidos:
+        raise EscenarioInvalido(f"'Ajusta' debe ser meta o resultado (se recibió: {', '.join(invalidos)})")
+    esc["Factor"] = pd.to_numeric(esc["Factor"], errors="coerce").fillna(1.0)
+    esc["Delta"] = pd.to_numeric(esc["Delta"], errors="coerce").fillna(0.0)
+    return esc.reset_index(drop=True)
+
+
+def matrices(comp: pd.DataFrame, escenarios: pd.DataFrame) -> tuple:
+    """
+    (nombres, metas, resultados): fila 0 = Base (sin ajustes) y una fila por escenario;
+    metas/resultados de porcentaje en proporción, como los deja comparar().
+    """
+    esc = _normalizar(escenarios)
+    nombres = [BASE] + list(pd.unique(esc["Escenario"]))
+    pct = comp["_es_pct"].to_numpy(dtype=bool)
+    base = {
+        "meta": comp["MetaEfectiva"].to_numpy(dtype=float),
+        "resultado": comp["_resultado_num"].to_numpy(dtype=float),
+    }
+    m = {k: np.broadcast_to(v, (len(nombres), len(v))).copy() for k, v in base.items()}
+
+    plegadas = {}
+    fila = {n: i for i, n in enumerate(nombres)}
+    escala = np.where(pct, 0.01, 1.0)
+    for e in esc.itertuples(index=False):
+        sel = np.ones(len(comp), dtype=bool)
+        for filtro, col in FILTROS.items():
+            valor = getattr(e, filtro)
+            if pd.notna(valor) and str(valor).strip():
+                if col not in plegadas:
+                    plegadas[col] = plegar(comp[col]).to_numpy(dtype=object)
+                sel &= plegadas[col] == plegar(pd.Series([valor]))[0]
+        x = m[e.Ajusta][fila[e.Escenario]]
+        x[sel] = x[sel] * e.Factor + e.Delta * escala[sel]
+    return nombres, m["meta"], m["resultado"]
+
+
+def simular(comp: pd.DataFrame, escenarios: pd.DataFrame, por=("proceso", "Responsable"),
+            tolerancia: float = TOLERANCIA) -> pd.DataFrame:
+    """
+    Conteo de estatus por escenario y grupo (`por`, columnas de comp) en una sola llamada:
+    una fila por (Escenario, grupo) con una columna por estatus y Total. Incluye Base.
+    """
+    nombres, metas, resultados = matrices(comp, escenarios)
+    estatus = evaluar_estatus(
+        metas, resultados, sentido=comp["_sentido"], muestra=comp["_muestra"],
+        muestra_min=comp["_muestra_min"], no_aplica=comp["_no_aplica"], tolerancia=tolerancia,
+    )
+
+    por = list(por)
+    grupos = comp[por].astype("string").fillna("")
+    codigos, unicos = pd.factorize(pd.MultiIndex.from_frame(grupos)) if por else (np.zeros(len(comp), int), [()])
+    n_esc, n_grp, n_est = len(nombres), len(unicos), len(ESTATUS)
+    cod_estatus = pd.Categorical(estatus.ravel(), categories=ESTATUS).codes.reshape(estatus.shape)
+    idx = (np.arange(n_esc)[:, None] * n_grp + codigos[None, :]) * n_est + cod_estatus
+    conteos = np.bincount(idx.ravel(), minlength=n_esc * n_grp * n_est).reshape(n_esc * n_grp, n_est)
+
+    indice = pd.MultiIndex.from_tuples(
+        [(e, *g) for e in nombres for g in unicos], names=["Escenario"] + [c.capitalize() for c in por],
+    )
+    out = pd.DataFrame(conteos, index=indice, columns=ESTATUS)
+    out["Total"] = conteos.sum(axis=1)
+    return out.reset_index()
+
+
+def resumen(conteos: pd.DataFrame) -> pd.DataFrame:
+    """Totales por escenario (salida de simular) y verdes ganados/perdidos contra Base."""
+    tot = conteos.groupby("Escenario", sort=False)[ESTATUS + ["Total"]].sum()
+    tot = tot.loc[:, (tot != 0).any() | tot.columns.isin(["verde", "Total"])]
+    tot["Δ verde"] = tot["verde"] - tot.loc[BASE, "verde"]
+    return tot.reset_index()
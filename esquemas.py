@@ -0,0 +1,235 @@
+# esquemas.py — validación de archivos subidos leyendo sólo la lista de hojas y la fila
+# de encabezados (xlsx en streaming, primeras filas de pyxlsb/xlrd, primera línea del
+# CSV, esquema del Parquet), antes del parseo
+# completo. Devuelve una lista estructurada de problemas y el mapeo de encabezados que se
+# pueden corregir automáticamente (acentos, mayúsculas, espacios, sinónimos conocidos).
+
+import io
+import re
+import unicodedata
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from cohortes import COLUMNAS_ID
+from comparativo import COLUMNAS_METAS, COLUMNA_MUESTRA_MIN, COLUMNA_SENTIDO
+from lectores import encabezados_csv, encabezados_parquet, es_tabla, extension, filas_iniciales_xlsx
+
+
+@dataclass(frozen=True)
+class EsquemaHoja:
+    candidatas: tuple            # nombres o índices de hoja, en orden de preferencia
+    requeridas: tuple = ()
+    opcionales: tuple = ()
+
+
+ESQUEMAS = {
+    "inscritos": {
+        "datos": EsquemaHoja((0,), requeridas=("Carrera",),
+                             opcionales=("Sexo", "Periodo", "Grupo", "Ciclo", "Generación", "Matrícula")),
+    },
+    "egresados": {
+        "datos": EsquemaHoja((0,), opcionales=("Carrera", "Sexo", "Periodo", "Grupo", "Ciclo",
+                                               "Generación", "Matrícula")),
+    },
+    "indicadores": {
+        "captura": EsquemaHoja((0,), opcionales=("Indicador", "Responsable")),
+        "metas": EsquemaHoja(("Hoja2", 1), requeridas=tuple(COLUMNAS_METAS),
+                             opcionales=(COLUMNA_SENTIDO, COLUMNA_MUESTRA_MIN)),
+    },
+    # Hoja de variables capturadas por un responsable (importación masiva)
+    "captura_masiva": {
+        "datos": EsquemaHoja((0,), requeridas=("Indicador", "Variable 1", "Variable 2"),
+                             opcionales=("Responsable", "Comentarios", "Porcentaje")),
+    },
+}
+
+# Sinónimos aceptados (comparados ya normalizados) -> columna esperada
+ALIAS = {
+    "programa educativo": "Carrera",
+    "programa": "Carrera",
+    "carrera o programa": "Carrera",
+    "cohorte": "Generación",
+    "gen": "Generación",
+    "genero": "Sexo",
+    "nombre del indicador": "Indicador",
+    "v1": "Variable 1",
+    "var 1": "Variable 1",
+    "variable1": "Variable 1",
+    "v2": "Variable 2",
+    "var 2": "Variable 2",
+    "variable2": "Variable 2",
+    "comentario": "Comentarios",
+    "observaciones": "Comentarios",
+    "es porcentaje": "Porcentaje",
+    "%": "Porcentaje",
+    **{c: "Matrícula" for c in COLUMNAS_ID},
+}
+
+
+def clave_columna(nombre) -> str:
+    """Encabezado normalizado: sin acentos, minúsculas, espacios/guiones bajos colapsados."""
+    s = "".join(ch for ch in unicodedata.normalize("NFKD", str(nombre)) if not unicodedata.combining(ch))
+    return re.sub(r"[\s_]+", " ", s).strip().lower()
+
+
+@dataclass
+class Problema:
+    nivel: str          # "error" | "aviso"
+    mensaje: str
+    hoja: str = ""
+    columna: str = ""
+
+
+@dataclass
+class Validacion:
+    dataset: str
+    hojas: dict = field(default_factory=dict)      # rol -> hoja real del archivo
+    columnas: dict = field(default_factory=dict)   # rol -> encabezados leídos
+    mapeo: dict = field(default_factory=dict)      # rol -> {encabezado: columna esperada}
+    problemas: list = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errores()
+
+    def errores(self, rol=None) -> list:
+        hoja = self.hojas.get(rol, rol)
+        return [p for p in self.problemas
+                if p.nivel == "error" and (rol is None or p.hoja in (rol, str(hoja)))]
+
+    def tabla(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            [{"Nivel": p.nivel, "Hoja": p.hoja, "Columna": p.columna, "Detalle": p.mensaje} for p in self.problemas],
+            columns=["Nivel", "Hoja", "Columna", "Detalle"],
+        )
+
+
+# ================= LECTURA DE ENCABEZADOS ================= #
+def _encabezados_xlsx(data: bytes) -> dict:
+    try:
+        # primera fila de cada hoja sin cargar todos los textos compartidos (ver lectores)
+        return {hoja: filas[0] if filas else [] for hoja, filas in filas_iniciales_xlsx(data, 1).items()}
+    except Exception:
+        pass
+    from openpyxl import load_workbook
+    wb = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    try:
+        return {ws.title: list(next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ()))
+                for ws in wb.worksheets}
+    finally:
+        wb.close()
+
+
+def _encabezados_xlsb(data: bytes) -> dict:
+    from pyxlsb import open_workbook
+    out = {}
+    with open_workbook(io.BytesIO(data)) as wb:
+        for nombre in wb.sheets:
+            with wb.get_sheet(nombre) as ws:
+                fila = next(iter(ws.rows()), [])
+                out[nombre] = [c.v for c in fila]
+    return out
+
+
+def _encabezados_xls(data: bytes) -> dict:
+    import xlrd
+    wb = xlrd.open_workbook(file_contents=data, on_demand=True)
+    try:
+        out = {}
+        for nombre in wb.sheet_names():
+            ws = wb.sheet_by_name(nombre)
+            out[nombre] = ws.row_values(0) if ws.nrows else []
+            wb.unload_sheet(nombre)
+        return out
+    finally:
+        wb.release_resources()
+
+
+LECTORES_ENCABEZADOS = {
+    ".xlsx": _encabezados_xlsx,
+    ".xlsm": _encabezados_xlsx,
+    ".xlsb": _encabezados_xlsb,
+    ".xls": _encabezados_xls,
+    # tablas sin hojas: una sola "hoja" con el nombre del formato
+    ".csv": lambda data: {"CSV": encabezados_csv(data)},
+    ".parquet": lambda data: {"Parquet": encabezados_parquet(data)},
+}
+
+
+def leer_encabezados(nombre: str, data: bytes) -> dict:
+    """{hoja: [encabezados]} en el orden del libro, sin parsear las filas de datos."""
+    ext = extension(nombre)
+    lector = LECTORES_ENCABEZADOS.get(ext)
+    if lector is None:
+        raise ValueError(f"Formato no soportado: {ext or nombre}")
+    return {h: [c for c in cols if c is not None and str(c).strip() != ""] for h, cols in lector(data).items()}
+
+
+# ================= VALIDACIÓN ================= #
+def _resolver_hoja(hojas: list, candidatas: tuple):
+    for c in candidatas:
+        if isinstance(c, int):
+            if c < len(hojas):
+                return hojas[c]
+        elif c in hojas:
+            return c
+    return None
+
+
+def validar_columnas(encabezados: list, esquema: EsquemaHoja, hoja: str = ""):
+    """(mapeo, problemas) de una hoja contra su esquema."""
+    problemas, mapeo = [], {}
+    presentes = {str(c) for c in encabezados}
+    por_clave = {}
+    for c in encabezados:
+        por_clave.setdefault(clave_columna(c), str(c))
+
+    if not encabezados:
+        return mapeo, [Problema("error", "La hoja no tiene fila de encabezados", hoja)]
+
+    for esperada in esquema.requeridas + esquema.opcionales:
+        if esperada in presentes:
+            continue
+        k = clave_columna(esperada)
+        original = por_clave.get(k) or next(
+            (por_clave[a] for a, destino in ALIAS.items() if destino == esperada and a in por_clave), None
+        )
+        if original is not None and original not in mapeo \
+                and original not in esquema.requeridas + esquema.opcionales:
+            mapeo[original] = esperada
+            problemas.append(Problema("aviso", f"'{original}' se usará como '{esperada}'", hoja, esperada))
+        elif esperada in esquema.requeridas:
+            problemas.append(Problema("error", f"Falta la columna requerida '{esperada}'", hoja, esperada))
+
+    duplicadas = sorted({c for c in map(str, encabezados) if list(map(str, encabezados)).count(c) > 1})
+    for c in duplicadas:
+        problemas.append(Problema("aviso", f"Encabezado repetido '{c}' (pandas lo renombra con sufijo)", hoja, c))
+    return mapeo, problemas
+
+
+def validar_archivo(nombre: str, data: bytes, dataset: str) -> Validacion:
+    """Valida hojas y encabezados de `data` contra ESQUEMAS[dataset]."""
+    val = Validacion(dataset)
+    try:
+        encabezados = leer_encabezados(nombre, data)
+    except Exception as e:
+        val.problemas.append(Problema("error", f"No se pudo leer el archivo: {e}"))
+        return val
+
+    hojas = list(encabezados)
+    for rol, esquema in ESQUEMAS[dataset].items():
+        # CSV/Parquet traen una sola tabla: sirve para todos los roles (p.ej. captura y metas)
+        hoja = hojas[0] if es_tabla(nombre) else _resolver_hoja(hojas, esquema.candidatas)
+        if hoja is None:
+            nombres = [c for c in esquema.candidatas if isinstance(c, str)]
+            val.problemas.append(Problema(
+                "error" if esquema.requeridas else "aviso",
+                f"No se encontró la hoja {' / '.join(map(repr, nombres)) or rol} (hojas: {hojas})", rol,
+            ))
+            continue
+        val.hojas[rol] = hoja
+        val.columnas[rol] = [str(c) for c in encabezados[hoja]]
+        val.mapeo[rol], problemas = validar_columnas(encabezados[hoja], esquema, hoja)
+        val.problemas.extend(problemas)
+    return val
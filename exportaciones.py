@@ -0,0 +1,666 @@
+# exportaciones.py — generación de reportes PDF (ReportLab) y Excel corporativo (XlsxWriter).
+# ReportLab y XlsxWriter se importan la primera vez que se exporta algo, no al arrancar la app.
+# Las partes estáticas inmutables (estilos, bytes del logo, comandos de estilo de tabla,
+# formatos XLSX) se compilan una sola vez por proceso (el script de Streamlit se re-ejecuta
+# en cada rerun, este módulo no); los flowables se crean nuevos en cada documento.
+
+import atexit
+import os
+import re
+import threading
+import datetime
+from functools import lru_cache
+from io import BytesIO
+from types import SimpleNamespace
+
+import pandas as pd
+
+
+# ================= CARGA DIFERIDA ================= #
+@lru_cache(maxsize=None)
+def _rl():
+    """Importa ReportLab en el primer uso y devuelve sus piezas en un namespace."""
+    from reportlab.lib.pagesizes import letter, landscape
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib import colors
+    from reportlab.lib.colors import HexColor
+    from reportlab.pdfbase import pdfmetrics
+    return SimpleNamespace(**locals())
+
+
+@lru_cache(maxsize=None)
+def estilos_pdf():
+    """Hoja de estilos y colores del PDF, compilados una vez por proceso."""
+    rl = _rl()
+    estilos = rl.getSampleStyleSheet()
+    return SimpleNamespace(
+        normal=estilos['Normal'],
+        titulo=estilos['Title'],
+        sub=estilos['Heading2'],
+        celda=rl.ParagraphStyle(name='TablaNormal', fontSize=7, leading=8),
+        header=rl.ParagraphStyle(name='TablaHeader', fontSize=7, leading=8,
+                                 textColor=rl.colors.white, fontName='Helvetica-Bold'),
+        azul_rey=rl.HexColor("#003366"),
+        gris_zebra=rl.HexColor("#f2f2f2"),
+    )
+
+
+@lru_cache(maxsize=8)
+def _logo_bytes(logo_path, mtime):
+    with open(logo_path, "rb") as fh:
+        return fh.read()
+
+
+def logo_bytes(logo_path):
+    """Bytes del logo leídos una vez por proceso (se invalida si cambia el archivo)."""
+    if not os.path.exists(logo_path):
+        return None
+    return _logo_bytes(os.path.abspath(logo_path), os.path.getmtime(logo_path))
+
+
+# ================= PLANTILLAS ================= #
+TITULO_PDF = "Matriz de Seguimiento a Metas e Indicadores 2025"
+
+TEXTOS_ALCANCE = (
+    "Alcance de la certificación ISO 9001:2015 Servicio Educativo de Técnico Superior Universitario, "
+    "Ingeniería y Educación Continua.",
+    "Para los valores meta que no se cumplan, el responsable del indicador toma acciones de "
+    "acuerdo al procedimiento <b>P030-SIG-Servicio No Conforme, Acciones Correctivas y Mejora</b>.",
+    "Los criterios para determinar una muestra representativa son los determinados por la Dirección General de "
+    "Universidades Tecnológicas y Politécnicas (DGUTyP) en su Modelo de Evaluación de la Calidad del Subsistema "
+    "de Universidades Tecnológicas y Politécnicas (MECASUTyP).",
+)
+
+LEYENDA = (
+    "🟢 Cumple la meta planteada.",
+    "🟡 Margen ± 1% la meta planteada.",
+    "⚪ N/A No se aplica evaluación en el periodo.",
+    "🔴 No cumple la meta.",
+    "🔵 No cumple los criterios para determinar una muestra representativa.",
+)
+
+MAPA_PERIODOS = {"Ene-Abr": "Enero – Abril", "May-Ago": "Mayo – Agosto", "Sep-Dic": "Septiembre – Diciembre"}
+
+
+def _sin_marcas(texto):
+    return re.sub(r"<[^>]+>", "", texto)
+
+
+@lru_cache(maxsize=None)
+def estilo_tabla_pdf():
+    """Comandos base del estilo de tabla (tupla de valores inmutables, compartible)."""
+    rl = _rl()
+    return (
+        ('BACKGROUND', (0, 0), (-1, 0), estilos_pdf().azul_rey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), rl.colors.white),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('GRID', (0, 0), (-1, -1), 0.25, rl.colors.black),
+        ('BOX', (0, 0), (-1, -1), 0.25, rl.colors.black),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
+    )
+
+
+def encabezado_pdf(logo_path="unaq_logo.png"):
+    """
+    Encabezado (logo + título) nuevo para cada documento: los flowables guardan estado en
+    wrap/split y los reportes se generan en hilos concurrentes; sólo se cachean los bytes
+    del logo y los estilos.
+    """
+    rl = _rl()
+    est = estilos_pdf()
+    datos = logo_bytes(logo_path)
+    if datos is None:
+        return rl.Paragraph(TITULO_PDF, est.titulo)
+    logo = rl.Image(BytesIO(datos), width=90, height=45)
+    return rl.Table([[logo, rl.Paragraph(f"<b>{TITULO_PDF}</b>", est.titulo)]], colWidths=[100, 500])
+
+
+def alcance_pdf():
+    """Párrafos de alcance/criterios (nuevos en cada documento)."""
+    est = estilos_pdf()
+    return [_rl().Paragraph(t, est.normal) for t in TEXTOS_ALCANCE]
+
+
+# Formatos del Excel corporativo (se registran de una vez en cada workbook)
+FORMATOS_XLSX = {
+    "title": {'bold': True, 'font_size': 16, 'align': 'center', 'valign': 'vcenter',
+              'font_color': 'white', 'bg_color': "#58AAF7"},
+    "band_top": {'bold': True, 'font_size': 11, 'align': 'center', 'valign': 'vcenter',
+                 'font_color': 'white', 'bg_color': "#2E75B6"},  # navy
+    "band_blue": {'bold': True, 'font_color': 'white', 'bg_color': '#2E75B6', 'border': 1},
+    "band_gray": {'bold': True, 'font_color': 'white', 'bg_color': '#5F7383', 'border': 1},
+    "meta": {'font_size': 10, 'italic': True, 'align': 'left'},
+    "section": {'bold': True, 'font_size': 12},
+    "hdr": {'bold': True, 'align': 'center', 'valign': 'vcenter',
+            'font_color': 'white', 'bg_color': '#0B2E59', 'border': 1},
+    "cell": {'align': 'left', 'valign': 'top', 'border': 1},
+    "num": {'align': 'right', 'valign': 'vcenter', 'border': 1},
+    "est_verde": {'align': 'center', 'border': 1, 'bg_color': '#C6E0B4'},
+    "est_rojo": {'align': 'center', 'border': 1, 'bg_color': '#F8CBAD'},
+    "est_amarillo": {'align': 'center', 'border': 1, 'bg_color': '#FFE699'},
+    "est_azul": {'align': 'center', 'border': 1, 'bg_color': '#BDD7EE'},
+    "est_pend": {'align': 'center', 'border': 1, 'bg_color': '#FFE699'},
+    "est_sin": {'align': 'center', 'border': 1, 'bg_color': '#D9D9D9'},
+    "scope_title": {'bold': True, 'align': 'center', 'valign': 'vcenter',
+                    'font_color': 'white', 'bg_color': '#4F9ED1'},
+    "scope_dark": {'bold': True, 'align': 'center', 'valign': 'vcenter',
+                   'font_color': 'white', 'bg_color': '#1F2E55'},
+    "text": {'text_wrap': True, 'valign': 'top'},
+    "leg": {'align': 'left'},
+}
+
+# Columnas del comparativo en el XLSX (sin "Semáforo") y sus anchos
+COLUMNAS_XLSX = (
+    "Indicador", "Responsable", "Periodicidad",
+    "Meta Ene-Abr", "Meta May-Ago", "Meta Sep-Dic",
+    "Meta efectiva", "Resultado", "Estatus",
+)
+ANCHOS_XLSX = {
+    "Indicador": 48, "Responsable": 12, "Periodicidad": 12,
+    "Meta Ene-Abr": 12, "Meta May-Ago": 12, "Meta Sep-Dic": 12,
+    "Meta efectiva": 14, "Resultado": 12, "Estatus": 12,
+}
+COLUMNAS_NUM_XLSX = frozenset(("Meta Ene-Abr", "Meta May-Ago", "Meta Sep-Dic", "Meta efectiva", "Resultado"))
+LOGO_XLSX = {'x_scale': 0.25, 'y_scale': 0.25, 'x_offset': 6, 'y_offset': 4}
+
+
+def formatos_xlsx(wb):
+    """Registra todos los formatos de FORMATOS_XLSX en el workbook: {nombre: Format}."""
+    return {nombre: wb.add_format(props) for nombre, props in FORMATOS_XLSX.items()}
+
+
+# ================= PDF ================= #
+def _table_col_widths(df, max_total_width):
+    if df is None or df.empty:
+        return []
+    pdfmetrics = _rl().pdfmetrics
+    font_name, font_size = "Helvetica", 7
+    cols = df.columns.tolist()
+    widths = []
+    for col in cols:
+        header_w = pdfmetrics.stringWidth(str(col), font_name, font_size + 1)
+        sample_rows = df[col].astype(str).head(30).tolist()
+        body_w = max([pdfmetrics.stringWidth(s, font_name, font_size) for s in ([""] + sample_rows)])
+        widths.append(max(header_w, body_w) + 12)
+    total = sum(widths)
+    if total <= 0:
+        return [max_total_width / max(1, len(cols))] * len(cols)
+    ratio = min(1.0, max_total_width / total)
+    widths = [w * ratio for w in widths]
+    diff = max_total_width - sum(widths)
+    if widths:
+        widths[-1] += diff
+    return widths
+
+
+MARGENES_PDF = dict(leftMargin=24, rightMargin=24, topMargin=36, bottomMargin=36)
+
+
+def _pagina_pdf():
+    rl = _rl()
+    return rl.landscape(rl.letter)
+
+
+def _ancho_util():
+    return _pagina_pdf()[0] - (MARGENES_PDF["leftMargin"] + MARGENES_PDF["rightMargin"])
+
+
+def _flowables_inicio(cuatri_texto, periodo_ext, logo_path):
+    """Encabezado (plantilla) + línea de periodo."""
+    rl = _rl()
+    est = estilos_pdf()
+    fecha = datetime.date.today().strftime("%d/%m/%Y")
+    return [
+        encabezado_pdf(logo_path),
+        rl.Paragraph(f"Periodo: {cuatri_texto} = {periodo_ext} — Generado el {fecha}", est.normal),
+        rl.Spacer(1, 12),
+    ]
+
+
+def _flowables_tabla(titulo, df, col_widths):
+    """Título opcional + tabla con fila de encabezado repetida y zebra."""
+    rl = _rl()
+    est = estilos_pdf()
+    out = []
+    if titulo:
+        out.append(rl.Paragraph(titulo, est.sub))
+
+    data = [[rl.Paragraph(str(col), est.header) for col in df.columns]]
+    for row in df.itertuples(index=False, name=None):
+        data.append([rl.Paragraph(str(cell), est.celda) for cell in row])
+
+    tabla = rl.Table(data, repeatRows=1, colWidths=col_widths)
+    estilo_tabla = list(estilo_tabla_pdf())
+    estilo_tabla += [('BACKGROUND', (0, i), (-1, i), est.gris_zebra) for i in range(2, len(data), 2)]
+    tabla.setStyle(rl.TableStyle(estilo_tabla))
+
+    out.append(tabla)
+    out.append(rl.Spacer(1, 12))
+    return out
+
+
+def _flowables_cierre():
+    """Pie con alcance y criterios (párrafos de la plantilla)."""
+    return [_rl().Spacer(1, 20)] + alcance_pdf()
+
+
+def _periodo_ext(periodo_col, anio):
+    return MAPA_PERIODOS.get(periodo_col, periodo_col) + f" {anio}"
+
+
+def _tablas_reporte(df_indicadores, df_inscritos, df_egresados):
+    return [
+        (titulo, df) for titulo, df in (
+            ("Indicadores (Comparativo)", df_indicadores),
+            ("Inscritos (conteo por carrera)", df_inscritos),
+            ("Egresados (conteo por carrera)", df_egresados),
+        ) if df is not None and not df.empty
+    ]
+
+
+def generar_reporte_pdf(
+    df_indicadores,
+    df_inscritos,
+    df_egresados,
+    cuatri_texto,
+    periodo_col,
+    anio,
+    logo_path="unaq_logo.png",
+    paralelo=None,
+):
+    """
+    PDF corporativo. `paralelo=None` decide solo: con muchas filas, varios núcleos y pypdf
+    instalado usa generar_reporte_pdf_paralelo; True/False lo fuerzan.
+    """
+    tablas = _tablas_reporte(df_indicadores, df_inscritos, df_egresados)
+    if paralelo is None:
+        paralelo = (sum(len(df) for _, df in tablas) >= UMBRAL_FILAS_PARALELO
+                    and PROCESOS_PDF > 1 and _hay_pypdf())
+    if paralelo:
+        return generar_reporte_pdf_paralelo(
+            df_indicadores, df_inscritos, df_egresados, cuatri_texto, periodo_col, anio, logo_path
+        )
+
+    rl = _rl()
+    pagina = _pagina_pdf()
+    periodo_ext = _periodo_ext(periodo_col, anio)
+
+    buffer = BytesIO()
+    doc = rl.SimpleDocTemplate(buffer, pagesize=pagina, **MARGENES_PDF)
+
+    # ==== ENCABEZADO ====
+    elementos = _flowables_inicio(cuatri_texto, periodo_ext, logo_path)
+
+    # ==== TABLAS ====
+    for titulo, df in tablas:
+        elementos += _flowables_tabla(titulo, df, _table_col_widths(df, _ancho_util()))
+
+    # ==== PIE CON ALCANCE Y CRITERIOS ====
+    elementos += _flowables_cierre()
+
+    def _footer(canvas, doc):
+        canvas.saveState()
+        canvas.setFont("Helvetica", 8)
+        text = f"{periodo_ext} — Página {doc.page}"
+        canvas.drawRightString(pagina[0] - doc.rightMargin, 18, text)
+        canvas.restoreState()
+
+    doc.build(elementos, onFirstPage=_footer, onLaterPages=_footer)
+    buffer.seek(0)
+    return buffer.read()
+
+
+# ================= PDF POR SECCIONES EN PARALELO ================= #
+# Cada sección (y cada bloque de filas del comparativo) se compone como sub-documento en un
+# proceso aparte; luego se unen con pypdf y se estampa el pie "Página N" continuo.
+PROCESOS_PDF = int(os.environ.get("REPORTES_PDF_PROCESOS", str(min(4, os.cpu_count() or 1))))
+FILAS_POR_BLOQUE = 300          # par, para conservar el zebra entre bloques
+UMBRAL_FILAS_PARALELO = 1500
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _hay_pypdf():
+    try:
+        import pypdf  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _pool_pdf():
+    """Pool de procesos compartido; se crea una sola vez aunque exporten varias sesiones a la vez."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            # spawn: los workers sólo importan este módulo (sin la UI ni hilos del servidor)
+            _pool = ProcessPoolExecutor(max_workers=PROCESOS_PDF, mp_context=multiprocessing.get_context("spawn"))
+            atexit.register(_cerrar_pool)
+        return _pool
+
+
+def _cerrar_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def secciones_reporte(df_indicadores, df_inscritos, df_egresados, cuatri_texto, periodo_ext,
+                      logo_path="unaq_logo.png", filas_por_bloque=FILAS_POR_BLOQUE):
+    """
+    Divide el reporte en secciones independientes. Cada sección es una lista de partes:
+      ("inicio", cuatri_texto, periodo_ext) | ("tabla", titulo|None, df, col_widths) | ("cierre",)
+    Las tablas largas se parten en bloques de `filas_por_bloque` filas (el título sólo va en el
+    primero; la fila de encabezado se repite en todos). Las partes chicas se agrupan hasta
+    completar un bloque para no dejar páginas a medio llenar.
+    """
+    partes = [(("inicio", cuatri_texto, periodo_ext), 0)]
+    for titulo, df in _tablas_reporte(df_indicadores, df_inscritos, df_egresados):
+        anchos = _table_col_widths(df, _ancho_util())
+        for ini in range(0, len(df), filas_por_bloque):
+            bloque = df.iloc[ini:ini + filas_por_bloque]
+            partes.append((("tabla", titulo if ini == 0 else None, bloque, anchos), len(bloque)))
+    partes.append((("cierre",), 0))
+
+    secciones, actual, peso = [], [], 0
+    for parte, filas in partes:
+        if actual and peso + filas > filas_por_bloque:
+            secciones.append(actual)
+            actual, peso = [], 0
+        actual.append(parte)
+        peso += filas
+    if actual:
+        secciones.append(actual)
+    return [(sec, logo_path) for sec in secciones]
+
+
+def _render_seccion(args):
+    """Worker: compone una sección como PDF sin pie de página y devuelve sus bytes."""
+    partes, logo_path = args
+    rl = _rl()
+    elementos = []
+    for parte in partes:
+        if parte[0] == "inicio":
+            elementos += _flowables_inicio(parte[1], parte[2], logo_path)
+        elif parte[0] == "tabla":
+            elementos += _flowables_tabla(parte[1], parte[2], parte[3])
+        else:
+            elementos += _flowables_cierre()
+    buffer = BytesIO()
+    rl.SimpleDocTemplate(buffer, pagesize=_pagina_pdf(), **MARGENES_PDF).build(elementos)
+    return buffer.getvalue()
+
+
+def _pies_de_pagina(n_paginas, periodo_ext):
+    """PDF de n páginas que sólo contiene el pie "periodo — Página N" (para estampar)."""
+    from reportlab.pdfgen import canvas as rl_canvas
+    pagina = _pagina_pdf()
+    buffer = BytesIO()
+    c = rl_canvas.Canvas(buffer, pagesize=pagina)
+    for n in range(1, n_paginas + 1):
+        c.setFont("Helvetica", 8)
+        c.drawRightString(pagina[0] - MARGENES_PDF["rightMargin"], 18, f"{periodo_ext} — Página {n}")
+        c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def generar_reporte_pdf_paralelo(
+    df_indicadores,
+    df_inscritos,
+    df_egresados,
+    cuatri_texto,
+    periodo_col,
+    anio,
+    logo_path="unaq_logo.png",
+    filas_por_bloque=FILAS_POR_BLOQUE,
+):
+    """Mismo reporte que generar_reporte_pdf, compuesto por secciones en un pool de procesos."""
+    from pypdf import PdfReader, PdfWriter
+
+    periodo_ext = _periodo_ext(periodo_col, anio)
+    secciones = secciones_reporte(df_indicadores, df_inscritos, df_egresados, cuatri_texto,
+                                  periodo_ext, os.path.abspath(logo_path), filas_por_bloque)
+    if len(secciones) > 1 and PROCESOS_PDF > 1:
+        partes_pdf = list(_pool_pdf().map(_render_seccion, secciones))
+    else:
+        partes_pdf = [_render_seccion(sec) for sec in secciones]
+
+    writer = PdfWriter()
+    for datos in partes_pdf:
+        for page in PdfReader(BytesIO(datos)).pages:
+            writer.add_page(page)
+    pies = PdfReader(BytesIO(_pies_de_pagina(len(writer.pages), periodo_ext)))
+    for page, pie in zip(writer.pages, pies.pages):
+        page.merge_page(pie)
+
+    buffer = BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+# ================= EXCEL ================= #
+def exportar_excel_corporativo(
+    comp_out: pd.DataFrame,
+    conteo_inscritos_por_carrera: pd.DataFrame,
+    conteo_egresados_por_carrera: pd.DataFrame,
+    cuatrimestre_actual: str,
+    periodo_ext: str,                         # p.ej. "Mayo – Agosto 2025"
+    logo_path: str = "unaq_logo.png",
+):
+    """
+    Exporta un XLSX 'corporativo':
+      - Encabezado con logo + título "METAS — Cx AAAA"
+      - Línea de metadatos (Periodo y fecha de generación)
+      - Sección: Indicadores (Comparativo) con bandas por Proceso
+      - Bloques 'Alcance' + texto y 'Leyenda'
+      - Hojas extra: Inscritos y Egresados (tablas simples)
+    XlsxWriter lo importa pandas al abrir el writer, sólo cuando se exporta.
+    """
+    from datetime import date
+    buf = BytesIO()
+    with pd.ExcelWriter(buf, engine="xlsxwriter") as writer:
+        wb = writer.book
+
+        # ======== FORMATS (plantilla FORMATOS_XLSX) ======== #
+        f = formatos_xlsx(wb)
+        fmt_estatus = {
+            "verde": f["est_verde"], "amarillo": f["est_amarillo"], "rojo": f["est_rojo"],
+            "no representativa": f["est_azul"], "n/a": f["est_sin"],
+            "pendiente": f["est_pend"], "sin dato": f["est_sin"],
+        }
+
+        # ======== HOJA COMPARATIVO ======== #
+        ws = wb.add_worksheet("Comparativo")
+
+        cols = [c for c in COLUMNAS_XLSX if c in comp_out.columns]
+        ncols = len(cols)
+        last_col = ncols - 1
+
+        # --- Encabezado con logo + Título
+        # Filas para el encabezado:
+        # 0-1 -> título; 2 -> banda navy separadora; 3 -> meta/periodo
+        ws.set_row(0, 32)
+        ws.set_row(1, 24)
+        ws.set_row(2, 18)
+        ws.set_row(3, 18)
+
+        # título “METAS — Cx AAAA”
+        ws.merge_range(0, 0, 1, last_col, f"METAS — {cuatrimestre_actual}", f["title"])
+
+        # logo (opcional, bytes ya leídos en el proceso)
+        logo_raw = logo_bytes(logo_path)
+        if logo_raw is not None:
+            # esquina izquierda sobre las filas 0..2
+            ws.insert_image(0, 0, logo_path, {'image_data': BytesIO(logo_raw), **LOGO_XLSX})
+
+        # banda separadora navy
+        ws.merge_range(2, 0, 2, last_col, "", f["band_top"])
+
+        # metadatos de periodo
+        fecha_hoy = date.today().strftime("%d/%m/%Y")
+        ws.write(3, 0, f"Periodo: {cuatrimestre_actual} = {periodo_ext} — Generado el {fecha_hoy}", f["meta"])
+        if last_col > 0:
+            ws.merge_range(3, 0, 3, last_col, f"Periodo: {cuatrimestre_actual} = {periodo_ext} — Generado el {fecha_hoy}", f["meta"])
+
+        # Sección
+        ws.write(5, 0, "Indicadores (Comparativo)", f["section"])
+        if last_col > 0:
+            ws.merge_range(5, 0, 5, last_col, "Indicadores (Comparativo)", f["section"])
+
+        # cabecera de tabla
+        start_row = 7
+        for j, c in enumerate(cols):
+            ws.write(start_row, j, c, f["hdr"])
+            ws.set_column(j, j, ANCHOS_XLSX.get(c, 14))
+
+        # filas por proceso en bandas
+        row = start_row + 1
+        df_cmp = comp_out
+        band_blue = True
+
+        if "Proceso" in df_cmp.columns:
+            fmts_col = [f["num"] if c in COLUMNAS_NUM_XLSX else f["cell"] for c in cols]
+            j_est = cols.index("Estatus") if "Estatus" in cols else -1
+            for proceso, df_g in df_cmp.groupby("Proceso"):
+                ws.merge_range(row, 0, row, last_col, f"Proceso: {proceso}",
+                               f["band_blue"] if band_blue else f["band_gray"])
+                band_blue = not band_blue
+                row += 1
+                for valores in df_g[cols].itertuples(index=False, name=None):
+                    for j, val in enumerate(valores):
+                        if j == j_est:
+                            ws.write(row, j, str(val), fmt_estatus.get(str(val).strip(), f["cell"]))
+                        else:
+                            ws.write(row, j, val, fmts_col[j])
+                    row += 1
+        else:
+            for valores in df_cmp[cols].itertuples(index=False, name=None):
+                for j, val in enumerate(valores):
+                    ws.write(row, j, val, f["cell"])
+                row += 1
+
+        # ======== BLOQUES “ALCANCE” ======== #
+        row += 2
+        ws.merge_range(row, 0, row, last_col, "Alcance", f["scope_title"]); row += 1
+        ws.merge_range(row, 0, row, last_col, _sin_marcas(TEXTOS_ALCANCE[0]), f["text"]); row += 1
+        ws.merge_range(row, 0, row, last_col, _sin_marcas(TEXTOS_ALCANCE[1]), f["scope_dark"]); row += 1
+        ws.merge_range(row, 0, row, last_col, _sin_marcas(TEXTOS_ALCANCE[2]), f["text"]); row += 2
+
+        # ======== LEYENDA ======== #
+        # Usamos emojis para aproximar los bullets de colores
+        for item in LEYENDA:
+            ws.write(row, 0, item, f["leg"])
+            if last_col > 0:
+                ws.merge_range(row, 0, row, last_col, item, f["leg"])
+            row += 1
+
+        # ======== Hojas “Inscritos” y “Egresados” simples ======== #
+        if not conteo_inscritos_por_carrera.empty:
+            conteo_inscritos_por_carrera.to_excel(writer, sheet_name="Inscritos", index=False)
+
+        if not conteo_egresados_por_carrera.empty:
+            conteo_egresados_por_carrera.to_excel(writer, sheet_name="Egresados", index=False)
+
+    buf.seek(0)
+    return buf
+
+
+# ================= REPORTES POR RESPONSABLE ================= #
+# Un PDF y un XLSX por Responsable (o por Responsable + Proceso), compuestos en el mismo
+# pool de procesos del PDF paralelo. Cada worker compila estilos/plantillas una sola vez
+# (lru_cache por proceso) y las reutiliza para todas las particiones que le tocan.
+SIN_RESPONSABLE = "Sin responsable"
+
+
+def _nombre_archivo(texto):
+    s = re.sub(r"[^\w\-]+", "_", str(texto), flags=re.UNICODE).strip("_")
+    return s[:80] or "reporte"
+
+
+def claves_particion(comp_out, por_proceso=False) -> list:
+    """Columnas que definen cada reporte; ValueError si comp_out no las trae."""
+    claves = ["Responsable"] + (["Proceso"] if por_proceso else [])
+    faltan = [c for c in claves if c not in comp_out.columns]
+    if faltan:
+        raise ValueError(f"No se puede separar por {', '.join(faltan)}: el comparativo no tiene esa columna")
+    return claves
+
+
+def particiones_reporte(comp_out, por_proceso=False):
+    """[(nombre_archivo, {"Responsable": ..., "Proceso": ...}, df)] en orden estable."""
+    claves = claves_particion(comp_out, por_proceso)
+    df = comp_out.assign(Responsable=comp_out["Responsable"].fillna(SIN_RESPONSABLE).astype(str).str.strip()
+                         .replace("", SIN_RESPONSABLE))
+    usados, out = set(), []
+    for valores, grupo in df.groupby(claves, sort=True, dropna=False):
+        valores = valores if isinstance(valores, tuple) else (valores,)
+        etiqueta = dict(zip(claves, map(str, valores)))
+        base = _nombre_archivo("_".join(etiqueta.values()))
+        nombre, n = base, 2
+        while nombre.lower() in usados:            # "TSU A" y "TSU-A" no deben pisarse
+            nombre, n = f"{base}_{n}", n + 1
+        usados.add(nombre.lower())
+        out.append((nombre, etiqueta, grupo.reset_index(drop=True)))
+    return out
+
+
+def _render_particion(args):
+    """Worker: (nombre, pdf_bytes|None, xlsx_bytes|None) de una partición."""
+    nombre, df, cuatri_texto, periodo_col, anio, logo_path, formatos = args
+    pdf = xlsx = None
+    if "pdf" in formatos:
+        pdf = generar_reporte_pdf(df, None, None, cuatri_texto, periodo_col, anio, logo_path, paralelo=False)
+    if "xlsx" in formatos:
+        xlsx = exportar_excel_corporativo(df, pd.DataFrame(), pd.DataFrame(), cuatri_texto,
+                                          _periodo_ext(periodo_col, anio), logo_path).getvalue()
+    return nombre, pdf, xlsx
+
+
+def generar_reportes_por_responsable(
+    comp_out,
+    cuatri_texto,
+    periodo_col,
+    anio,
+    por_proceso=False,
+    formatos=("pdf", "xlsx"),
+    logo_path="unaq_logo.png",
+):
+    """
+    ZIP con un reporte por Responsable (y Proceso si `por_proceso`), más indice.csv.
+    Con varias particiones y PROCESOS_PDF > 1 se reparten entre los workers del pool.
+    """
+    import zipfile
+
+    claves = claves_particion(comp_out, por_proceso)
+    partes = particiones_reporte(comp_out, por_proceso)
+    logo_path = os.path.abspath(logo_path)
+    tareas = [(nombre, df, cuatri_texto, periodo_col, anio, logo_path, tuple(formatos))
+              for nombre, _, df in partes]
+    if len(tareas) > 1 and PROCESOS_PDF > 1:
+        # lotes para no pagar un viaje de IPC por partición cuando son cientos
+        lote = max(1, len(tareas) // (PROCESOS_PDF * 4))
+        resultados = _pool_pdf().map(_render_particion, tareas, chunksize=lote)
+    else:
+        resultados = map(_render_particion, tareas)
+
+    indice = pd.DataFrame(
+        [{**etiqueta, "Archivo": nombre, "Indicadores": len(df)} for nombre, etiqueta, df in partes],
+        columns=claves + ["Archivo", "Indicadores"],
+    )
+    buf = BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for nombre, pdf, xlsx in resultados:
+            if pdf is not None:
+                zf.writestr(f"pdf/{nombre}.pdf", pdf)
+            if xlsx is not None:
+                zf.writestr(f"xlsx/{nombre}.xlsx", xlsx)
+        zf.writestr("indice.csv", indice.to_csv(index=False).encode("utf-8-sig"))
+    return buf.getvalue()
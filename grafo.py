@@ -0,0 +1,116 @@
+# grafo.py — capa de cálculo como grafo de dependencias (DAG) con nodos memorizados.
+# Cada dato derivado es un nodo con entradas declaradas. Su huella combina las huellas de
+# sus dependencias y el código de su función (estilo Merkle), así que en cada rerun sólo se
+# re-ejecutan los nodos con algo distinto aguas arriba; el resto se sirve de la caché.
+
+import hashlib
+
+FALTANTE = "∅"
+
+
+def _sha1(texto: str) -> str:
+    return hashlib.sha1(texto.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def _huella_codigo(code) -> str:
+    """Bytecode + constantes (recursivo) de una función; estable entre reruns."""
+    partes = [code.co_code.hex()]
+    for c in code.co_consts:
+        partes.append(_huella_codigo(c) if hasattr(c, "co_code") else repr(c))
+    return _sha1("|".join(partes))
+
+
+class GrafoCalculo:
+    """
+    Entradas (archivos subidos, valores de widgets) + nodos (funciones puras de otras
+    entradas/nodos). Los nodos se evalúan de forma perezosa con `valor(nombre)`.
+
+    `cache(nombre, huella, calcular, politica)` guarda los resultados entre reruns; por
+    defecto es un dict del propio grafo (la app usa el gobernador de memoria de la sesión).
+    """
+
+    def __init__(self, cache=None):
+        self._entradas = {}   # nombre -> (valor, huella)
+        self._nodos = {}      # nombre -> (funcion, deps, opcionales, politica)
+        self._huellas = {}    # memo de huellas de nodos (se invalida con cada entrada)
+        self._valores = {}    # nombre -> (huella, valor) ya resueltos en este rerun
+        self._local = {}
+        self._cache = cache or self._cache_local
+        self.ejecutados = []
+        self.reutilizados = []
+
+    def _cache_local(self, nombre, huella, calcular, politica):
+        guardado = self._local.get(nombre)
+        if guardado is None or guardado[0] != huella:
+            guardado = (huella, calcular())
+            self._local[nombre] = guardado
+        return guardado[1]
+
+    # ---- declaración ---- #
+    def nodo(self, nombre=None, deps=(), opcionales=(), politica="derramar"):
+        """
+        Decorador. `deps` son obligatorias; las `opcionales` llegan como None si no están
+        disponibles. Los argumentos se pasan en orden: deps y luego opcionales.
+        """
+        def registrar(funcion):
+            self._nodos[nombre or funcion.__name__] = (funcion, tuple(deps), tuple(opcionales), politica)
+            return funcion
+        return registrar
+
+    def copia(self, cache=None):
+        """Grafo con los mismos nodos y sin entradas (p.ej. para precalcular fuera de la sesión)."""
+        g = GrafoCalculo(cache)
+        g._nodos = dict(self._nodos)
+        return g
+
+    def entrada(self, nombre, valor, huella=None):
+        """Registra una entrada; sin `huella` se usa repr(valor)."""
+        self._entradas[nombre] = (valor, _sha1(repr(valor) if huella is None else str(huella)))
+        self._huellas.clear()
+        return valor
+
+    # ---- evaluación ---- #
+    def disponible(self, nombre) -> bool:
+        if nombre in self._entradas:
+            return True
+        if nombre not in self._nodos:
+            return False
+        return all(self.disponible(d) for d in self._nodos[nombre][1])
+
+    def huella(self, nombre) -> str:
+        if nombre in self._entradas:
+            return self._entradas[nombre][1]
+        if nombre not in self._huellas:
+            funcion, deps, opcionales, _ = self._nodos[nombre]
+            partes = [nombre, _huella_codigo(funcion.__code__)]
+            partes += [self.huella(d) for d in deps]
+            partes += [self.huella(d) if self.disponible(d) else FALTANTE for d in opcionales]
+            self._huellas[nombre] = _sha1("|".join(partes))
+        return self._huellas[nombre]
+
+    def valor(self, nombre):
+        if nombre in self._entradas:
+            return self._entradas[nombre][0]
+        if not self.disponible(nombre):
+            raise KeyError(f"'{nombre}' no está disponible (faltan entradas aguas arriba)")
+        h = self.huella(nombre)
+        resuelto = self._valores.get(nombre)
+        if resuelto is not None and resuelto[0] == h:
+            return resuelto[1]
+
+        funcion, deps, opcionales, politica = self._nodos[nombre]
+        ejecutado = []
+
+        def calcular():
+            ejecutado.append(True)
+            args = [self.valor(d) for d in deps]
+            args += [self.valor(d) if self.disponible(d) else None for d in opcionales]
+            return funcion(*args)
+
+        v = self._cache(nombre, h, calcular, politica)
+        (self.ejecutados if ejecutado else self.reutilizados).append(nombre)
+        self._valores[nombre] = (h, v)
+        return v
+
+    def valor_o(self, nombre, default=None):
+        return self.valor(nombre) if self.disponible(nombre) else default
@@ -0,0 +1,157 @@
+# incremental.py — re-subidas con detección de cambios por fila.
+# Cuando se vuelve a subir una versión corregida del mismo archivo (mismo linaje: dataset,
+# sesión y nombre; ver linaje_de en streamlit_app.py), se compara hash por hash contra la
+# versión anterior y sólo las filas insertadas o eliminadas pasan por la clasificación de
+# nivel, el perfil de columnas (índice de filtros) y los conteos; las filas sin cambios
+# reutilizan lo ya calculado. Una fila modificada cuenta como eliminar la vieja e insertar
+# la nueva (con columna de matrícula se reporta como cambio).
+
+from dataclasses import dataclass, field
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+import almacen
+from cohortes import columna_id
+from compartidos import con_columna
+from memoria import GOBERNADOR, GobernadorMemoria
+from perfiles import actualizar_perfil, perfilar
+
+
+class Delta(NamedTuple):
+    iguales_ant: np.ndarray      # posiciones en la versión anterior ...
+    iguales_nuevo: np.ndarray    # ... y en la nueva de las filas sin cambios
+    insertadas: np.ndarray       # posiciones en la nueva
+    eliminadas: np.ndarray       # posiciones en la anterior
+
+
+def delta_filas(hashes_ant: np.ndarray, hashes_nuevo: np.ndarray) -> Delta:
+    """Empareja filas idénticas (multiconjunto: duplicados por n-ésima aparición)."""
+    ant, nuevo = pd.Index(hashes_ant), pd.Index(hashes_nuevo)
+    if ant.is_unique and nuevo.is_unique:
+        pos = ant.get_indexer(nuevo)
+    else:
+        def indice(h):
+            h = pd.Series(h)
+            return pd.MultiIndex.from_arrays([h.to_numpy(), h.groupby(h).cumcount().to_numpy()])
+
+        pos = indice(hashes_ant).get_indexer(indice(hashes_nuevo))
+    iguales = pos >= 0
+    usadas = np.zeros(len(hashes_ant), dtype=bool)
+    usadas[pos[iguales]] = True
+    return Delta(pos[iguales], np.flatnonzero(iguales), np.flatnonzero(~iguales), np.flatnonzero(~usadas))
+
+
+def hash_filas(df: pd.DataFrame) -> np.ndarray:
+    """
+    almacen.hash_filas como arreglo (tipos nativos de cada columna): ambas versiones vienen
+    del mismo lector, y si un tipo cambia las filas sólo se ven distintas (carga completa).
+    """
+    return almacen.hash_filas(df).to_numpy()
+
+
+def _conteos(s: pd.Series) -> pd.Series:
+    return s.value_counts().sort_values(ascending=False, kind="stable")
+
+
+@dataclass
+class Version:
+    df: pd.DataFrame                 # datos con la columna "Nivel" (si hay columna a clasificar)
+    hashes: np.ndarray
+    perfil: dict
+    conteos: dict = field(default_factory=dict)   # columna -> conteos sin filtros
+    resumen: dict = field(default_factory=dict)   # vacío si fue carga completa
+
+
+class Versiones:
+    """
+    Última versión por linaje = (dataset, (dueño, nombre)). El dueño es la sesión para lo
+    subido: un archivo de otro usuario con el mismo nombre no es una versión anterior del
+    propio. Se guardan en el gobernador de memoria bajo el dueño (se liberan con su sesión y
+    compiten por el presupuesto, no por un cupo del proceso); perder una sólo cuesta una carga
+    completa. Sin gobernador (pruebas) se usa uno propio.
+    """
+
+    def __init__(self, gobernador: GobernadorMemoria = None):
+        self.gobernador = gobernador if gobernador is not None else GobernadorMemoria.desde_entorno()
+
+    @staticmethod
+    def _clave(linaje):
+        dataset, (dueno, nombre) = linaje
+        return dueno, f"version::{dataset}::{nombre}"
+
+    def anterior(self, linaje):
+        return self.gobernador.obtener(*self._clave(linaje))
+
+    def guardar(self, linaje, version: Version):
+        self.gobernador.guardar(*self._clave(linaje), version, politica="descartar")
+
+
+VERSIONES = Versiones(GOBERNADOR)
+
+
+def versionar(linaje, df: pd.DataFrame, clasificar=None, columna="Carrera", columnas_perfil=None,
+              columnas_conteo=("Carrera", "Nivel"), versiones: Versiones = VERSIONES) -> Version:
+    """
+    Nueva versión de `df`: "Nivel" = clasificar(df[columna]), perfil de `columnas_perfil`
+    (None = todas, incluida Nivel) y conteos sin filtros. Si hay una versión anterior del
+    mismo linaje con las mismas columnas, sólo se procesan las filas que cambiaron.
+    """
+    hashes = hash_filas(df)
+    clasifica = clasificar is not None and columna in df.columns
+    anterior = versiones.anterior(linaje)
+    compatible = anterior is not None and \
+        [c for c in anterior.df.columns if not (clasifica and c == "Nivel")] == list(df.columns)
+    delta = delta_filas(anterior.hashes, hashes) if compatible else None
+
+    if delta is None or not len(delta.iguales_nuevo):
+        # carga completa
+        nuevo = con_columna(df, "Nivel", df[columna].map(clasificar)) if clasifica else df
+        perfil = perfilar(nuevo, columnas_perfil)
+        conteos = {c: _conteos(nuevo[c]) for c in columnas_conteo if c in nuevo.columns}
+        version = Version(nuevo, hashes, perfil, conteos)
+    else:
+        if clasifica:
+            nivel = np.empty(len(df), dtype=object)
+            nivel[delta.iguales_nuevo] = anterior.df["Nivel"].to_numpy(dtype=object)[delta.iguales_ant]
+            nivel[delta.insertadas] = df[columna].iloc[delta.insertadas].map(clasificar).to_numpy(dtype=object)
+            nuevo = con_columna(df, "Nivel", pd.Series(nivel, index=df.index, dtype=anterior.df["Nivel"].dtype))
+        else:
+            nuevo = df
+        quitadas = anterior.df.iloc[delta.eliminadas]
+        agregadas = nuevo.iloc[delta.insertadas]
+        perfil = actualizar_perfil(anterior.perfil, quitadas, agregadas, len(nuevo))
+        conteos = {
+            c: (prev.sub(quitadas[c].value_counts(), fill_value=0).add(agregadas[c].value_counts(), fill_value=0)
+                .pipe(lambda s: s[s > 0]).astype("int64").sort_values(ascending=False, kind="stable")
+                .rename("count").rename_axis(c))
+            for c, prev in anterior.conteos.items()
+        }
+        version = Version(nuevo, hashes, perfil, conteos, _resumen(anterior.df, nuevo, delta))
+    versiones.guardar(linaje, version)
+    return version
+
+
+def _resumen(df_ant, df_nuevo, delta) -> dict:
+    """Filas nuevas / modificadas / eliminadas (modificadas sólo si hay columna de matrícula)."""
+    modificadas = 0
+    col = columna_id(df_nuevo)
+    if col and col in df_ant.columns and len(delta.insertadas) and len(delta.eliminadas):
+        ids_ins = df_nuevo[col].iloc[delta.insertadas].dropna().astype(str)
+        ids_eli = set(df_ant[col].iloc[delta.eliminadas].dropna().astype(str))
+        modificadas = int(ids_ins.isin(ids_eli).sum())
+    return {
+        "sin_cambios": int(len(delta.iguales_nuevo)),
+        "nuevas": int(len(delta.insertadas)) - modificadas,
+        "modificadas": modificadas,
+        "eliminadas": int(len(delta.eliminadas)) - modificadas,
+    }
+
+
+def filtros_activos(filtros: dict, perfil: dict) -> bool:
+    """False si los filtros no descartan ninguna fila (misma regla que aplicar_filtros)."""
+    return any(
+        vals and (len(vals) < perfil[c].n_distintos or perfil[c].nulos > 0)
+        for c, vals in filtros.items()
+    )
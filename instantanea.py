@@ -0,0 +1,152 @@
+# instantanea.py — guardar y reanudar el estado de trabajo de una sesión.
+# Un solo archivo .reportes (zip sin compresión) con:
+#   estado.json          versión, valores de la sesión (filtros, generaciones, ingresos,
+#                        captura manual, periodo) y, por archivo cargado, nombre, huella y
+#                        validación de esquema
+#   <dataset>-<rol>.arrow  cada tabla ya parseada en Arrow IPC con buffers zstd
+# Al reanudar no se vuelve a leer ningún libro: las tablas se abren desde Arrow y las
+# validaciones se reconstruyen del JSON (nunca pickle: el archivo viene del usuario).
+
+import datetime
+import io
+import json
+import zipfile
+from dataclasses import asdict
+
+import numpy as np
+import pandas as pd
+
+from compartidos import tabla_arrow
+from esquemas import Problema, Validacion
+
+VERSION = 1
+EXTENSION = ".reportes"
+COMPRESION = "zstd"
+
+
+class InstantaneaInvalida(ValueError):
+    pass
+
+
+# ================= VALORES DE SESIÓN (JSON con tipos) ================= #
+def _a_json(v):
+    if isinstance(v, pd.Timestamp):
+        return {"__ts__": v.isoformat()}
+    if isinstance(v, datetime.datetime):
+        return {"__ts__": v.isoformat()}
+    if isinstance(v, datetime.date):
+        return {"__fecha__": v.isoformat()}
+    if isinstance(v, np.generic):
+        return v.item()
+    if isinstance(v, (set, tuple)):
+        return list(v)
+    raise TypeError(f"Valor no serializable en la instantánea: {type(v).__name__}")
+
+
+def _de_json(d):
+    if "__ts__" in d:
+        return pd.Timestamp(d["__ts__"])
+    if "__fecha__" in d:
+        return datetime.date.fromisoformat(d["__fecha__"])
+    return d
+
+
+def filtrar_valores(valores: dict, prefijos=(), claves=()) -> dict:
+    """Sólo las claves de sesión que la app guarda y restaura (lista blanca de la app)."""
+    prefijos, claves = tuple(prefijos), set(claves)
+    return {k: v for k, v in valores.items() if isinstance(k, str) and (k.startswith(prefijos) or k in claves)}
+
+
+def validacion_a_dict(v: Validacion) -> dict:
+    return asdict(v)
+
+
+def validacion_de_dict(d: dict) -> Validacion:
+    return Validacion(
+        dataset=d["dataset"], hojas=d.get("hojas", {}), columnas=d.get("columnas", {}),
+        mapeo=d.get("mapeo", {}), problemas=[Problema(**p) for p in d.get("problemas", [])],
+    )
+
+
+# ================= ARCHIVOS RESTAURADOS ================= #
+class ArchivoRestaurado:
+    """
+    Archivo de una sesión reanudada con la interfaz que usa la app (name, file_id, huella,
+    validacion, hojas): las hojas ya vienen parseadas, no hay bytes del libro original.
+    """
+
+    restaurado = True
+
+    def __init__(self, nombre: str, huella: str, validacion: Validacion, hojas: dict):
+        self.name = nombre
+        self.huella = huella
+        self.file_id = f"instantanea::{huella}"
+        self.validacion = validacion
+        self.hojas = hojas
+
+    def getvalue(self) -> bytes:
+        raise InstantaneaInvalida(f"{self.name} viene de una sesión reanudada: no hay libro original")
+
+
+# ================= EMPAQUETAR / DESEMPAQUETAR ================= #
+def _arrow_bytes(df: pd.DataFrame) -> bytes:
+    import pyarrow as pa
+
+    tabla = tabla_arrow(df)
+    destino = io.BytesIO()
+    opciones = pa.ipc.IpcWriteOptions(compression=COMPRESION if pa.Codec.is_available(COMPRESION) else None)
+    with pa.ipc.new_file(destino, tabla.schema, options=opciones) as escritor:
+        escritor.write_table(tabla)
+    return destino.getvalue()
+
+
+def empaquetar(valores: dict, archivos: dict) -> bytes:
+    """
+    valores: {clave de sesión: valor}; archivos: {dataset: (nombre, huella, Validacion,
+    {rol: DataFrame})}. Devuelve los bytes del .reportes.
+    """
+    estado = {"version": VERSION, "creado": datetime.datetime.now().isoformat(timespec="seconds"),
+              "valores": valores, "archivos": {}}
+    destino = io.BytesIO()
+    with zipfile.ZipFile(destino, "w", zipfile.ZIP_STORED) as zf:
+        for dataset, (nombre, huella, validacion, hojas) in archivos.items():
+            estado["archivos"][dataset] = {
+                "nombre": nombre, "huella": huella, "validacion": validacion_a_dict(validacion),
+                "hojas": sorted(hojas),
+            }
+            for rol, df in hojas.items():
+                zf.writestr(f"{dataset}-{rol}.arrow", _arrow_bytes(df))
+        zf.writestr("estado.json", json.dumps(estado, default=_a_json, ensure_ascii=False))
+    return destino.getvalue()
+
+
+def desempaquetar(datos: bytes, prefijos=(), claves=()) -> tuple:
+    """
+    (valores de sesión, {dataset: ArchivoRestaurado}, fecha de creación). De los valores
+    sólo vuelven los de la lista blanca `prefijos`/`claves`: el archivo viene del usuario y
+    cualquier otra clave pisaría estado interno de la app (p.ej. "_restaurados").
+    """
+    import pyarrow as pa
+
+    try:
+        zf = zipfile.ZipFile(io.BytesIO(datos))
+        estado = json.loads(zf.read("estado.json"), object_hook=_de_json)
+    except (zipfile.BadZipFile, KeyError, ValueError) as e:
+        raise InstantaneaInvalida(f"No es una instantánea de sesión válida: {e}") from e
+    if estado.get("version") != VERSION:
+        raise InstantaneaInvalida(f"Versión de instantánea no soportada: {estado.get('version')}")
+
+    archivos = {}
+    with zf:
+        for dataset, meta in estado["archivos"].items():
+            hojas = {
+                rol: pa.ipc.open_file(pa.BufferReader(zf.read(f"{dataset}-{rol}.arrow"))).read_pandas()
+                for rol in meta["hojas"]
+            }
+            archivos[dataset] = ArchivoRestaurado(
+                meta["nombre"], meta["huella"], validacion_de_dict(meta["validacion"]), hojas,
+            )
+    valores = estado.get("valores")
+    if not isinstance(valores, dict):
+        raise InstantaneaInvalida("La instantánea no trae valores de sesión")
+    return filtrar_valores(valores, prefijos, claves), archivos, estado.get("creado", "")
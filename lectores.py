@@ -0,0 +1,395 @@
+# lectores.py — lectura de archivos subidos: libros de Excel con el motor preferido
+# instalado (ver MOTORES_EXCEL) y tablas CSV/Parquet (exportaciones directas del SIS).
+# pyarrow lee estas últimas con varios hilos; la inferencia de tipos se ajusta para que
+# el DataFrame resultante se parezca al de pd.read_excel:
+# sólo la celda vacía es nulo ("N/A" se queda como texto), enteros con huecos -> float64,
+# fechas ISO -> datetime64, texto -> str.
+
+import csv
+import importlib.util
+import io
+import os
+import struct
+import zipfile
+from functools import lru_cache
+
+import pandas as pd
+
+FORMATOS_TABLA = (".csv", ".parquet")
+DELIMITADORES = ",;\t|"
+
+
+def extension(nombre: str) -> str:
+    nombre = str(nombre).lower()
+    return "." + nombre.rsplit(".", 1)[-1] if "." in nombre else ""
+
+
+def es_tabla(nombre: str) -> bool:
+    return extension(nombre) in FORMATOS_TABLA
+
+
+def _bytes(fuente) -> bytes:
+    """UploadedFile / BytesIO / ruta -> bytes."""
+    if hasattr(fuente, "getvalue"):
+        return fuente.getvalue()
+    if isinstance(fuente, (bytes, bytearray)):
+        return bytes(fuente)
+    with open(fuente, "rb") as fh:
+        return fh.read()
+
+
+def _texto_inicial(data: bytes, n=65536) -> tuple:
+    """(texto de las primeras líneas, encoding) probando UTF-8 (con o sin BOM) y Latin-1."""
+    muestra = data[:n]
+    try:
+        return muestra.decode("utf-8-sig"), "utf8"
+    except UnicodeDecodeError as e:
+        if e.start >= len(muestra) - 4:   # carácter multibyte cortado al final de la muestra
+            return muestra[:e.start].decode("utf-8-sig"), "utf8"
+        return muestra.decode("latin-1"), "latin-1"
+
+
+def dialecto_csv(data: bytes) -> tuple:
+    """(delimitador, encoding) detectados en el inicio del archivo."""
+    texto, encoding = _texto_inicial(data)
+    try:
+        delim = csv.Sniffer().sniff("\n".join(texto.splitlines()[:20]), delimiters=DELIMITADORES).delimiter
+    except csv.Error:
+        delim = ","
+    return delim, encoding
+
+
+def leer_csv(fuente) -> pd.DataFrame:
+    import pyarrow.csv as pacsv
+
+    data = _bytes(fuente)
+    delim, encoding = dialecto_csv(data)
+    tabla = pacsv.read_csv(
+        io.BytesIO(data),
+        read_options=pacsv.ReadOptions(use_threads=True, encoding=encoding),
+        parse_options=pacsv.ParseOptions(delimiter=delim),
+        convert_options=pacsv.ConvertOptions(
+            null_values=[""], strings_can_be_null=True, true_values=[], false_values=[],
+        ),
+    )
+    return tabla.to_pandas()
+
+
+def leer_parquet(fuente) -> pd.DataFrame:
+    import pyarrow.parquet as pq
+
+    return pq.read_table(io.BytesIO(_bytes(fuente)), use_threads=True).to_pandas()
+
+
+def leer_tabla(fuente, nombre=None) -> pd.DataFrame:
+    """CSV o Parquet según la extensión de `nombre` (o de fuente.name)."""
+    ext = extension(nombre or getattr(fuente, "name", str(fuente)))
+    if ext == ".parquet":
+        return leer_parquet(fuente)
+    if ext == ".csv":
+        return leer_csv(fuente)
+    raise ValueError(f"Formato no soportado: {ext}")
+
+
+# ================= ENCABEZADOS (validación previa) ================= #
+def encabezados_csv(data: bytes) -> list:
+    delim, _ = dialecto_csv(data)
+    texto, _ = _texto_inicial(data)
+    return next(csv.reader(io.StringIO(texto), delimiter=delim), [])
+
+
+def encabezados_parquet(data: bytes) -> list:
+    import pyarrow.parquet as pq
+
+    # sólo el footer: no se leen los datos
+    return [c for c in pq.read_schema(io.BytesIO(data)).names if not c.startswith("__index_level_")]
+
+
+# ================= PRIMERAS FILAS DE UN XLSX ================= #
+# openpyxl (aun en read_only) y pd.read_excel(nrows=...) cargan primero la tabla completa de
+# textos compartidos, que en un libro con una columna de matrículas es la mayor parte del
+# archivo. Aquí se lee la hoja en streaming hasta `filas` y de sharedStrings.xml sólo hasta
+# el último índice que esas filas usan (Excel los escribe en orden de aparición).
+FORMATOS_FECHA = set(range(14, 23)) | set(range(27, 37)) | set(range(45, 48)) | set(range(50, 59))
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _hojas_xlsx(zf) -> list:
+    """[(nombre, ruta en el zip)] en el orden del libro."""
+    from xml.etree import ElementTree as ET
+
+    rels = {}
+    for r in ET.fromstring(zf.read("xl/_rels/workbook.xml.rels")):
+        destino = r.get("Target", "")
+        rels[r.get("Id")] = destino.lstrip("/") if destino.startswith("/") else f"xl/{destino}"
+    hojas = []
+    for e in ET.fromstring(zf.read("xl/workbook.xml")).iter():
+        if _local(e.tag) == "sheet":
+            rid = next((v for k, v in e.attrib.items() if _local(k) == "id"), None)
+            hojas.append((e.get("name"), rels.get(rid)))
+    return hojas
+
+
+def _estilos_fecha(zf) -> set:
+    """Índices de cellXfs cuyo formato numérico es de fecha/hora."""
+    from xml.etree import ElementTree as ET
+    import re
+
+    try:
+        raiz = ET.fromstring(zf.read("xl/styles.xml"))
+    except KeyError:
+        return set()
+    propios = {}
+    for e in raiz.iter():
+        if _local(e.tag) == "numFmt":
+            codigo = re.sub(r'"[^"]*"|\[[^\]]*\]|\\.', "", e.get("formatCode", ""))
+            propios[int(e.get("numFmtId"))] = bool(re.search(r"[dmyhs]", codigo, re.I))
+    xfs = next((e for e in raiz if _local(e.tag) == "cellXfs"), [])
+    return {
+        i for i, xf in enumerate(xf for xf in xfs if _local(xf.tag) == "xf")
+        if propios.get(int(xf.get("numFmtId", 0)), int(xf.get("numFmtId", 0)) in FORMATOS_FECHA)
+    }
+
+
+def _columna(ref: str) -> int:
+    n = 0
+    for ch in ref:
+        if not ch.isalpha():
+            break
+        n = n * 26 + ord(ch.upper()) - 64
+    return n - 1
+
+
+def _textos_compartidos(zf, hasta: int) -> list:
+    """Primeros `hasta` + 1 textos de sharedStrings.xml (deja de leer ahí)."""
+    from xml.etree import ElementTree as ET
+
+    textos = []
+    if hasta < 0 or "xl/sharedStrings.xml" not in zf.namelist():
+        return textos
+    with zf.open("xl/sharedStrings.xml") as fh:
+        for _, e in ET.iterparse(fh):
+            if not e.tag.endswith("si"):
+                continue
+            if len(e) == 1 and e[0].tag.endswith("t"):
+                textos.append(e[0].text or "")
+            else:
+                # runs con formato; sin la guía fonética (rPh)
+                textos.append("".join(t.text or "" for r in e if _local(r.tag) != "rPh"
+                                      for t in r.iter() if _local(t.tag) == "t"))
+            e.clear()
+            if len(textos) > hasta:
+                break
+    return textos
+
+
+def filas_iniciales_xlsx(data: bytes, filas: int, hojas=None) -> dict:
+    """{hoja: [[valores de la fila] ...]} con las primeras `filas` filas (None en celdas vacías)."""
+    import zipfile
+    from xml.etree import ElementTree as ET
+
+    zf = zipfile.ZipFile(io.BytesIO(data))
+    fechas = _estilos_fecha(zf)
+    crudas = {}
+    for i, (nombre, ruta) in enumerate(_hojas_xlsx(zf)):
+        if hojas is not None and nombre not in hojas and i not in hojas:
+            continue
+        leidas = []
+        with zf.open(ruta) as fh:
+            fila, celda = None, None
+            for evento, e in ET.iterparse(fh, events=("start", "end")):
+                tag = _local(e.tag)
+                if evento == "start":
+                    if tag == "row":
+                        fila = []
+                    elif tag == "c":
+                        celda = e
+                    continue
+                if tag == "c" and fila is not None:
+                    t = celda.get("t", "n")
+                    v = next((x.text for x in celda if _local(x.tag) == "v"), None)
+                    if t == "inlineStr":
+                        v, t = "".join(x.text or "" for x in celda.iter() if _local(x.tag) == "t"), "str"
+                    col = _columna(celda.get("r", "")) if celda.get("r") else len(fila)
+                    fila.append((col, t, v, int(celda.get("s", 0)) in fechas))
+                elif tag == "row":
+                    leidas.append(fila)
+                    fila = None
+                    if len(leidas) >= filas:
+                        break
+                    e.clear()
+        crudas[nombre] = leidas
+
+    indices = [int(v) for fs in crudas.values() for f in fs for _, t, v, _ in f if t == "s" and v is not None]
+    textos = _textos_compartidos(zf, max(indices, default=-1))
+
+    def valor(t, v, fecha):
+        if v is None:
+            return None
+        if t == "s":
+            return textos[int(v)]
+        if t == "b":
+            return v == "1"
+        if t in ("str", "e"):
+            return v
+        num = float(v)
+        if fecha:
+            return pd.Timestamp("1899-12-30") + pd.to_timedelta(num, unit="D")
+        return int(num) if num.is_integer() and "." not in v and "E" not in v.upper() else num
+
+    out = {}
+    for nombre, fs in crudas.items():
+        out[nombre] = []
+        for f in fs:
+            fila = [None] * (max((c for c, *_ in f), default=-1) + 1)
+            for c, t, v, fecha in f:
+                fila[c] = valor(t, v, fecha)
+            out[nombre].append(fila)
+    return out
+
+
+# ================= MOTORES DE EXCEL ================= #
+# Por formato, en orden de preferencia: el primero instalado gana y los siguientes quedan
+# de respaldo. calamine (python-calamine, Rust) lee xlsx/xlsb/xls varias veces más rápido
+# que openpyxl/pyxlsb/xlrd. En .xlsx da lo mismo que openpyxl (tests/test_lectores.py) y es
+# el predeterminado; en los demás formatos aún no (en xlsb devuelve fechas donde pyxlsb
+# devuelve el número de serie) y queda de respaldo del motor histórico hasta que la prueba
+# con libros reales pase. REPORTES_MOTOR_EXCEL fuerza la elección: "calamine" (para todos
+# los formatos que lo admitan) o por formato, p.ej. "xlsx=openpyxl".
+MOTORES_EXCEL = {
+    ".xlsx": ("calamine", "openpyxl"),
+    ".xlsm": ("openpyxl", "calamine"),
+    ".xlsb": ("pyxlsb", "calamine"),
+    ".xls": ("xlrd", "calamine"),
+    ".ods": ("odf", "calamine"),
+}
+# Motor contra el que se compara calamine (comparar_motores)
+MOTOR_HISTORICO = {".xlsx": "openpyxl", ".xlsm": "openpyxl", ".xlsb": "pyxlsb", ".xls": "xlrd", ".ods": "odf"}
+MODULO_MOTOR = {
+    "calamine": "python_calamine", "openpyxl": "openpyxl", "pyxlsb": "pyxlsb", "xlrd": "xlrd", "odf": "odf",
+}
+MOTOR_CONFIG = os.environ.get("REPORTES_MOTOR_EXCEL", "")
+# Errores de lectura que justifican probar el siguiente motor: los comunes (archivo que no
+# es del formato, estructura dañada, motor no importable) y la clase propia de cada motor
+ERRORES_LECTURA = (ImportError, ValueError, KeyError, EOFError, struct.error, zipfile.BadZipFile)
+ERROR_MOTOR = {
+    "openpyxl": ("openpyxl.utils.exceptions", "InvalidFileException"),
+    "xlrd": ("xlrd", "XLRDError"),
+    "calamine": ("python_calamine", "CalamineError"),
+}
+
+
+@lru_cache(maxsize=None)
+def motor_instalado(motor: str) -> bool:
+    return importlib.util.find_spec(MODULO_MOTOR.get(motor, motor)) is not None
+
+
+def _preferencias(config: str) -> dict:
+    """'calamine' -> {'*': 'calamine'}; 'xlsb=pyxlsb,xlsx=calamine' -> {'.xlsb': ..., '.xlsx': ...}."""
+    out = {}
+    for parte in filter(None, (p.strip() for p in config.split(","))):
+        if "=" in parte:
+            ext, motor = (x.strip().lower() for x in parte.split("=", 1))
+            out["." + ext.lstrip(".")] = motor
+        else:
+            out["*"] = parte.lower()
+    return out
+
+
+def motores_para(ext: str, config: str = None) -> list:
+    """Motores instalados para `ext`, el configurado (si aplica) primero."""
+    orden = list(MOTORES_EXCEL.get(ext, ("openpyxl",)))
+    pref = _preferencias(MOTOR_CONFIG if config is None else config)
+    elegido = pref.get(ext, pref.get("*"))
+    if elegido in orden:
+        orden.remove(elegido)
+        orden.insert(0, elegido)
+    return [m for m in orden if motor_instalado(m)]
+
+
+def motores_activos(config: str = None) -> dict:
+    """{extensión: motor que se usará} (para diagnóstico)."""
+    return {ext: (motores_para(ext, config) or ["—"])[0] for ext in MOTORES_EXCEL}
+
+
+def errores_motor(motor: str) -> tuple:
+    """Excepciones de importación/parseo de `motor` (ERRORES_LECTURA + la del paquete)."""
+    modulo, nombre = ERROR_MOTOR.get(motor, (None, None))
+    if modulo and motor_instalado(motor):
+        try:
+            return ERRORES_LECTURA + (getattr(importlib.import_module(modulo), nombre),)
+        except (ImportError, AttributeError):
+            pass
+    return ERRORES_LECTURA
+
+
+def leer_excel(fuente, sheet_name=0, nombre=None, motor=None, **kw) -> pd.DataFrame:
+    """
+    pd.read_excel con el motor preferido instalado para la extensión; si ese motor no se
+    puede importar o no puede parsear el archivo, se reintenta con el siguiente (el error
+    del último se propaga). Cualquier otro error se propaga de inmediato.
+    """
+    ext = extension(nombre or getattr(fuente, "name", str(fuente)))
+    candidatos = [motor] if motor else motores_para(ext)
+    if not candidatos:
+        raise ImportError(f"No hay motor instalado para {ext} (opciones: {MOTORES_EXCEL.get(ext)})")
+    for i, m in enumerate(candidatos):
+        if hasattr(fuente, "seek"):
+            fuente.seek(0)
+        try:
+            return pd.read_excel(fuente, engine=m, sheet_name=sheet_name, **kw)
+        except errores_motor(m):
+            if i == len(candidatos) - 1:
+                raise
+
+
+# ================= EQUIVALENCIA ENTRE MOTORES ================= #
+def comparar_motores(ruta: str, sheet_name=0, motores=None) -> pd.DataFrame:
+    """
+    Lee `ruta` con cada motor instalado y compara contra el de referencia (el histórico,
+    MOTOR_HISTORICO): forma, tipos y valores. Uso:
+        python lectores.py egresados.xlsb [hoja]
+    """
+    import time
+
+    ext = extension(ruta)
+    motores = motores or [m for m in MOTORES_EXCEL.get(ext, ()) if motor_instalado(m)]
+    if not motores:
+        raise ImportError(f"No hay motor instalado para {ext}")
+    referencia = MOTOR_HISTORICO.get(ext) if MOTOR_HISTORICO.get(ext) in motores else motores[0]
+    lecturas = {}
+    for m in motores:
+        t = time.perf_counter()
+        lecturas[m] = (pd.read_excel(ruta, engine=m, sheet_name=sheet_name), time.perf_counter() - t)
+
+    base = lecturas[referencia][0]
+    filas = []
+    for m, (df, seg) in lecturas.items():
+        mismos_tipos = list(df.dtypes.astype(str)) == list(base.dtypes.astype(str))
+        filas.append({
+            "Motor": m,
+            "Segundos": round(seg, 3),
+            "Forma": df.shape,
+            "Mismas columnas": list(df.columns) == list(base.columns),
+            "Mismos tipos": mismos_tipos,
+            "Mismos valores": df.shape == base.shape and df.astype(str).equals(base.astype(str)),
+            "Columnas distintas": [
+                c for c in base.columns
+                if c not in df.columns or not df[c].astype(str).equals(base[c].astype(str))
+            ],
+        })
+    return pd.DataFrame(filas)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        sys.exit("uso: python lectores.py <archivo.xlsx|.xlsb|.xls> [hoja]")
+    hoja = sys.argv[2] if len(sys.argv) > 2 else 0
+    hoja = int(hoja) if isinstance(hoja, str) and hoja.isdigit() else hoja
+    print(f"Motores activos: {motores_activos()}")
+    print(comparar_motores(sys.argv[1], hoja).to_string(index=False))
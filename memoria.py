@@ -0,0 +1,233 @@
+# memoria.py — contabilidad y desalojo de memoria para objetos que guardan las sesiones.
+# Un único gobernador por proceso (servidor) registra DataFrames y artefactos por sesión,
+# mide su huella y, si se excede el presupuesto, derrama a disco o descarta los menos
+# usados recientemente (LRU) entre todas las sesiones. Las columnas que apuntan a archivos
+# mapeados en memoria (compartidos.py) no cuentan: sus páginas son del archivo, no de la sesión.
+
+import dataclasses
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+PRESUPUESTO_MB = float(os.environ.get("REPORTES_MEMORIA_MB", "2048"))
+DIR_DERRAME = os.environ.get("REPORTES_DERRAME_DIR", os.path.join(tempfile.gettempdir(), "reportes_derrame"))
+# Desalojar algo más chico no libera nada (p.ej. un DataFrame mapeado: sólo su índice es propio)
+MIN_DESALOJO = 64 * 1024
+
+
+_mapeos = {}        # ruta -> (inicio, fin): direcciones de los archivos mapeados (compartidos.py)
+
+
+def registrar_mapeo(ruta: str, inicio: int, fin: int):
+    _mapeos[ruta] = (inicio, fin)
+
+
+def olvidar_mapeo(ruta: str):
+    _mapeos.pop(ruta, None)
+
+
+def _direcciones(s: pd.Series):
+    """Direcciones de los buffers de datos de la columna (vacío si no se pueden ver)."""
+    if isinstance(s.dtype, np.dtype):
+        if s.dtype == object:
+            return []           # objetos Python: siempre en el heap de la sesión
+        return [s.to_numpy(copy=False).__array_interface__["data"][0]]
+    if hasattr(s.array, "__arrow_array__"):
+        arr = s.array.__arrow_array__()
+        return [b.address for ch in getattr(arr, "chunks", [arr]) for b in ch.buffers() if b is not None]
+    return []
+
+
+def mapeada(s: pd.Series) -> bool:
+    """True si los datos de la columna viven en un archivo mapeado (compartido entre sesiones)."""
+    rangos = list(_mapeos.values())
+    direcciones = _direcciones(s) if rangos else []
+    return bool(direcciones) and all(any(i <= d < f for i, f in rangos) for d in direcciones)
+
+
+def huella(obj) -> tuple:
+    """
+    (bytes propios, bytes mapeados) aproximados: DataFrames con memory_usage profundo por
+    columna; dataclasses (p.ej. incremental.Version), dicts y secuencias por su contenido.
+    """
+    if isinstance(obj, pd.DataFrame):
+        uso = obj.memory_usage(index=True, deep=True)
+        mapeado = sum(int(uso[c]) for i, c in enumerate(obj.columns) if mapeada(obj.iloc[:, i])) \
+            if _mapeos and obj.columns.is_unique else 0
+        return int(uso.sum()) - mapeado, mapeado
+    if isinstance(obj, pd.Series):
+        uso = int(obj.memory_usage(index=True, deep=True))
+        return (0, uso) if mapeada(obj) else (uso, 0)
+    if isinstance(obj, (bytes, bytearray)):
+        return len(obj), 0
+    if isinstance(obj, BytesIO):
+        return obj.getbuffer().nbytes, 0
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes, 0
+    if isinstance(obj, dict):
+        partes = [huella(x) for kv in obj.items() for x in kv]
+    elif isinstance(obj, (list, tuple, set)):
+        partes = [huella(v) for v in obj]
+    elif dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        partes = [huella(getattr(obj, f.name)) for f in dataclasses.fields(obj)]
+    else:
+        return sys.getsizeof(obj), 0
+    return sys.getsizeof(obj) + sum(p for p, _ in partes), sum(m for _, m in partes)
+
+
+def tamano(obj) -> int:
+    """Huella aproximada en bytes propios (sin lo mapeado de compartidos.py)."""
+    return huella(obj)[0]
+
+
+class _Entrada:
+    __slots__ = ("obj", "clave", "bytes", "mapeados", "ruta", "politica", "ultimo_uso")
+
+    def __init__(self, obj, clave, politica):
+        self.obj = obj
+        self.clave = clave
+        self.bytes, self.mapeados = huella(obj)
+        self.ruta = None          # archivo de derrame si está en disco
+        self.politica = politica  # "derramar" | "descartar" | "fijo"
+        self.ultimo_uso = time.time()
+
+
+class GobernadorMemoria:
+    """
+    Guarda objetos por (sesión, nombre) con un presupuesto global en bytes.
+    - politica="derramar": al desalojar se escribe a disco y se recarga al pedirlo.
+    - politica="descartar": al desalojar se pierde (artefactos que se pueden regenerar).
+    - politica="fijo": sólo se contabiliza, nunca se desaloja (p.ej. captura manual).
+    Lo que apunta a archivos mapeados no se derrama (el pickle lo copiaría entero): se
+    descarta, y si casi todo es mapeado no se toca (desalojarlo no libera nada).
+    `clave` identifica la versión del objeto (p.ej. file_id del upload); si cambia se recalcula.
+    """
+
+    def __init__(self, presupuesto_bytes: int, dir_derrame: str = DIR_DERRAME):
+        self.presupuesto = int(presupuesto_bytes)
+        self.dir_derrame = dir_derrame
+        self._entradas = OrderedDict()   # (sesion, nombre) -> _Entrada, del menos al más reciente
+        self._lock = threading.RLock()
+        self.desalojos = {"derramados": 0, "descartados": 0, "recargados": 0}
+
+    @classmethod
+    def desde_entorno(cls):
+        return cls(int(PRESUPUESTO_MB * 1024 * 1024))
+
+    # ---- contabilidad ---- #
+    def en_memoria(self) -> int:
+        return sum(e.bytes for e in self._entradas.values() if e.ruta is None)
+
+    def en_disco(self) -> int:
+        return sum(e.bytes for e in self._entradas.values() if e.ruta is not None)
+
+    def uso(self) -> dict:
+        with self._lock:
+            filas = [
+                {
+                    "Sesión": s[:8], "Objeto": n, "MB": round(e.bytes / 2**20, 2),
+                    "Estado": "disco" if e.ruta else "memoria", "Política": e.politica,
+                    "Último uso": time.strftime("%H:%M:%S", time.localtime(e.ultimo_uso)),
+                }
+                for (s, n), e in reversed(self._entradas.items())
+            ]
+            return {
+                "presupuesto_mb": round(self.presupuesto / 2**20, 1),
+                "memoria_mb": round(self.en_memoria() / 2**20, 2),
+                "disco_mb": round(self.en_disco() / 2**20, 2),
+                "sesiones": len({s for s, _ in self._entradas}),
+                **self.desalojos,
+                "detalle": pd.DataFrame(filas),
+            }
+
+    # ---- acceso ---- #
+    def guardar(self, sesion, nombre, obj, clave=None, politica="derramar"):
+        with self._lock:
+            previa = self._entradas.pop((sesion, nombre), None)
+            if previa is not None:
+                self._borrar_derrame(previa)
+            self._entradas[(sesion, nombre)] = _Entrada(obj, clave, politica)
+            self._hacer_cumplir(excepto=(sesion, nombre))
+        return obj
+
+    def obtener(self, sesion, nombre, clave=None, default=None):
+        """Objeto guardado si su clave coincide (recargándolo de disco si se derramó)."""
+        with self._lock:
+            e = self._entradas.get((sesion, nombre))
+            if e is None or (clave is not None and e.clave != clave):
+                return default
+            if e.ruta is not None:
+                with open(e.ruta, "rb") as fh:
+                    e.obj = pickle.load(fh)
+                self._borrar_derrame(e)
+                self.desalojos["recargados"] += 1
+            e.ultimo_uso = time.time()
+            self._entradas.move_to_end((sesion, nombre))
+            self._hacer_cumplir(excepto=(sesion, nombre))
+            return e.obj
+
+    def obtener_o_calcular(self, sesion, nombre, clave, calcular, politica="derramar"):
+        faltante = object()
+        obj = self.obtener(sesion, nombre, clave, default=faltante)
+        if obj is faltante:
+            obj = self.guardar(sesion, nombre, calcular(), clave=clave, politica=politica)
+        return obj
+
+    def liberar_sesion(self, sesion):
+        with self._lock:
+            for k in [k for k in self._entradas if k[0] == sesion]:
+                self._borrar_derrame(self._entradas.pop(k))
+
+    def purgar(self, es_activa):
+        """Libera las sesiones para las que es_activa(sesion) es False."""
+        with self._lock:
+            for s in {s for s, _ in self._entradas}:
+                if not es_activa(s):
+                    self.liberar_sesion(s)
+
+    # ---- desalojo ---- #
+    def _hacer_cumplir(self, excepto=None):
+        if self.en_memoria() <= self.presupuesto:
+            return
+        for k in list(self._entradas):
+            if self.en_memoria() <= self.presupuesto:
+                break
+            e = self._entradas[k]
+            if k == excepto or e.ruta is not None or e.politica == "fijo" or e.bytes < MIN_DESALOJO:
+                continue
+            if e.politica == "derramar" and not e.mapeados:
+                self._derramar(e)
+                self.desalojos["derramados"] += 1
+            else:
+                del self._entradas[k]
+                self.desalojos["descartados"] += 1
+
+    def _derramar(self, e):
+        os.makedirs(self.dir_derrame, exist_ok=True)
+        ruta = os.path.join(self.dir_derrame, f"{uuid.uuid4().hex}.pkl")
+        with open(ruta, "wb") as fh:
+            pickle.dump(e.obj, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        e.obj = None
+        e.ruta = ruta
+
+    @staticmethod
+    def _borrar_derrame(e):
+        if e.ruta is not None:
+            try:
+                os.remove(e.ruta)
+            except OSError:
+                pass
+            e.ruta = None
+
+
+# Instancia única por proceso del servidor
+GOBERNADOR = GobernadorMemoria.desde_entorno()
@@ -0,0 +1,110 @@
+# perfiles.py — perfil de columnas calculado una vez por carga.
+# Los filtros leen de aquí sus opciones (valores distintos, conteos, % nulos, dtype)
+# en lugar de recorrer el DataFrame en cada rerun.
+
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+# Columnas con más valores distintos que esto usan lista de opciones con búsqueda
+UMBRAL_CARDINALIDAD = 60
+LIMITE_OPCIONES = 200
+
+
+def _ordenar(valores):
+    try:
+        return sorted(valores)
+    except TypeError:  # mezcla de números y textos (común en Excel)
+        return sorted(valores, key=str)
+
+
+@dataclass
+class PerfilColumna:
+    nombre: str
+    dtype: str
+    filas: int
+    nulos: int
+    conteos: pd.Series = field(repr=False)   # valor -> frecuencia, de mayor a menor
+    valores: list = field(repr=False)        # valores distintos ordenados
+
+    @property
+    def n_distintos(self) -> int:
+        return len(self.valores)
+
+    @property
+    def tasa_nulos(self) -> float:
+        return self.nulos / self.filas if self.filas else 0.0
+
+    @property
+    def alta_cardinalidad(self) -> bool:
+        return self.n_distintos > UMBRAL_CARDINALIDAD
+
+    def buscar(self, texto: str = "", limite: int = LIMITE_OPCIONES) -> list:
+        """Valores que contienen `texto` (sin distinguir mayúsculas), los más frecuentes primero."""
+        cand = self.conteos.index
+        if texto:
+            cand = cand[cand.astype(str).str.contains(texto, case=False, regex=False)]
+        return _ordenar(cand[:limite].tolist())
+
+
+def perfilar_columna(s: pd.Series) -> PerfilColumna:
+    conteos = s.value_counts(dropna=True)
+    return PerfilColumna(
+        nombre=str(s.name),
+        dtype=str(s.dtype),
+        filas=int(len(s)),
+        nulos=int(s.isna().sum()),
+        conteos=conteos,
+        valores=_ordenar(conteos.index.tolist()),
+    )
+
+
+def perfilar(df: pd.DataFrame, columnas=None) -> dict:
+    """Perfil por columna: {nombre: PerfilColumna}."""
+    columnas = list(df.columns) if columnas is None else [c for c in columnas if c in df.columns]
+    return {c: perfilar_columna(df[c]) for c in columnas}
+
+
+def actualizar_perfil(perfil: dict, quitadas: pd.DataFrame, agregadas: pd.DataFrame, filas: int) -> dict:
+    """
+    Perfil de una nueva versión del DataFrame a partir del anterior: a los conteos se les
+    restan las filas eliminadas y se suman las insertadas (sin recorrer las que no cambiaron).
+    """
+    out = {}
+    for c, p in perfil.items():
+        conteos = (
+            p.conteos.sub(quitadas[c].value_counts(dropna=True), fill_value=0)
+            .add(agregadas[c].value_counts(dropna=True), fill_value=0)
+        )
+        conteos = conteos[conteos > 0].astype("int64").sort_values(ascending=False, kind="stable")
+        out[c] = PerfilColumna(
+            nombre=p.nombre,
+            dtype=str(agregadas[c].dtype) if len(agregadas) else p.dtype,
+            filas=int(filas),
+            nulos=int(p.nulos - quitadas[c].isna().sum() + agregadas[c].isna().sum()),
+            conteos=conteos.rename("count").rename_axis(p.conteos.index.name),
+            valores=_ordenar(conteos.index.tolist()),
+        )
+    return out
+
+
+def valores_por_grupo(df: pd.DataFrame, grupo: str, columna: str) -> dict:
+    """{valor de grupo: valores distintos ordenados de `columna`} en una sola pasada."""
+    if grupo not in df.columns or columna not in df.columns:
+        return {}
+    sub = df[[grupo, columna]].dropna().drop_duplicates()
+    return {g: _ordenar(v.tolist()) for g, v in sub.groupby(grupo, sort=False)[columna]}
+
+
+def tabla_perfil(perfil: dict) -> pd.DataFrame:
+    """Resumen del perfil para mostrar en pantalla."""
+    return pd.DataFrame([
+        {
+            "Columna": p.nombre,
+            "Tipo": p.dtype,
+            "Distintos": p.n_distintos,
+            "Nulos (%)": round(100 * p.tasa_nulos, 1),
+            "Más frecuente": str(p.conteos.index[0]) if len(p.conteos) else "",
+        }
+        for p in perfil.values()
+    ])
@@ -0,0 +1,133 @@
+# progresivo.py — carga progresiva de libros grandes.
+# Las primeras filas se leen en el momento (xlsx en streaming con lectores.filas_iniciales_xlsx,
+# pyxlsb/xlrd con `nrows`, CSV/Parquet sólo el inicio) para mostrar la vista previa, mientras
+# el parseo completo corre en un hilo de fondo. El avance se mide por los bytes del archivo
+# que el lector ya consumió: xlsx/xlsb son zip y la hoja se descomprime en streaming.
+
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from lectores import dialecto_csv, extension, filas_iniciales_xlsx, leer_excel
+
+FILAS_VISTA = 50
+# Si el parseo completo termina antes de esto (s), no se muestra la vista previa
+ESPERA = float(os.environ.get("REPORTES_ESPERA_CARGA", "0.8"))
+MAX_CARGAS = 16
+
+
+class ArchivoConAvance(io.BytesIO):
+    """BytesIO que reporta a `avance` la fracción de bytes leídos (acumulada, hasta 1)."""
+
+    def __init__(self, datos: bytes, nombre: str, avance):
+        super().__init__(datos)
+        self.name = nombre
+        self._total = max(len(datos), 1)
+        self._leidos = 0
+        self._avance = avance
+
+    def _contar(self, n):
+        self._leidos += n
+        self._avance(min(self._leidos / self._total, 1.0))
+
+    def read(self, n=-1):
+        datos = super().read(n)
+        self._contar(len(datos))
+        return datos
+
+    def readinto(self, b):
+        n = super().readinto(b)
+        self._contar(n)
+        return n
+
+
+class Carga:
+    """Parseo completo en un hilo: `leer(carga)` puede llamar a carga.reportar(fraccion)."""
+
+    def __init__(self, leer):
+        self.avance = 0.0
+        self.inicio = time.time()
+        self.error = None
+        self.listo = threading.Event()
+        self._hilo = threading.Thread(target=self._correr, args=(leer,), name="carga-progresiva", daemon=True)
+        self._hilo.start()
+
+    def _correr(self, leer):
+        try:
+            leer(self)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.avance = 1.0
+            self.listo.set()
+
+    def reportar(self, fraccion: float):
+        # hasta que termine no se reporta el 100% (falta armar el DataFrame)
+        self.avance = max(self.avance, min(float(fraccion), 0.99))
+
+    @property
+    def segundos(self) -> float:
+        return time.time() - self.inicio
+
+
+class Cargas:
+    """Cargas en curso por clave (huella-dataset), compartidas entre sesiones y reruns."""
+
+    def __init__(self, maximo: int = MAX_CARGAS):
+        self.maximo = maximo
+        self._cargas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def iniciar(self, clave, leer) -> Carga:
+        """
+        La carga de `clave` (una nueva si no hay). Una carga fallida no se reinicia sola:
+        queda hasta que quien muestra el error la suelte.
+        """
+        with self._lock:
+            carga = self._cargas.get(clave)
+            if carga is None:
+                carga = self._cargas[clave] = Carga(leer)
+            self._cargas.move_to_end(clave)
+            # sólo se olvidan cargas terminadas
+            for k in [k for k, c in self._cargas.items() if c.listo.is_set()][:max(0, len(self._cargas) - self.maximo)]:
+                del self._cargas[k]
+            return carga
+
+    def obtener(self, clave):
+        with self._lock:
+            return self._cargas.get(clave)
+
+    def soltar(self, clave):
+        with self._lock:
+            self._cargas.pop(clave, None)
+
+
+CARGAS = Cargas()
+
+
+def vista_previa(datos: bytes, nombre: str, hoja=0, filas: int = FILAS_VISTA) -> pd.DataFrame:
+    """Primeras `filas` filas sin parsear el archivo completo."""
+    ext = extension(nombre)
+    if ext == ".csv":
+        delim, encoding = dialecto_csv(datos)
+        return pd.read_csv(io.BytesIO(datos), sep=delim, encoding=encoding, nrows=filas)
+    if ext == ".parquet":
+        import pyarrow.parquet as pq
+
+        lote = next(pq.ParquetFile(io.BytesIO(datos)).iter_batches(batch_size=filas), None)
+        return pd.DataFrame() if lote is None else lote.to_pandas()
+    if ext in (".xlsx", ".xlsm"):
+        try:
+            crudas = next(iter(filas_iniciales_xlsx(datos, filas + 1, hojas={hoja}).values()), [])
+        except Exception:
+            crudas = None        # libro raro: lector normal
+        if crudas is not None:
+            from pandas.io.parsers import TextParser
+
+            # misma inferencia de tipos que pd.read_excel sobre las filas crudas
+            return TextParser(crudas, header=0).read() if crudas else pd.DataFrame()
+    return leer_excel(io.BytesIO(datos), sheet_name=hoja, nombre=nombre, nrows=filas)
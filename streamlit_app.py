@@ -6,16 +6,34 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import datetime
-from io import BytesIO
-import pyxlsb  # noqa: F401  # requerido por pandas engine
 
-# ReportLab
-from reportlab.lib.pagesizes import letter, landscape
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from reportlab.lib.colors import HexColor
-from reportlab.pdfbase import pdfmetrics
+# ReportLab / XlsxWriter / pyxlsb se cargan en el primer uso (ver exportaciones.py y
+# los engines de pandas), no en cada arranque ni en cada rerun.
+from exportaciones import (
+    MAPA_PERIODOS, generar_reporte_pdf, exportar_excel_corporativo, generar_reportes_por_responsable,
+)
+from cohortes import (CODIGOS_PROGRAMA, codigos_programa, eficiencia_por_cohorte, eficiencia_por_programa, columna_id,
+                      periodos_sin_id)
+from almacen import COLUMNA_PERIODO, AlmacenPeriodos, huella_bytes
+from perfiles import valores_por_grupo, tabla_perfil
+from memoria import GOBERNADOR
+from detalle import FORMATOS as FORMATOS_DETALLE, exportar_detalle
+from compartidos import compartido, con_columna, publicado
+from esquemas import validar_archivo
+from lectores import es_tabla, leer_tabla, leer_excel, motores_activos
+from vuelo_unico import LECTURAS, EXPORTACIONES, huella_objetos
+from comparativo import (
+    COLUMNAS_RESULTADOS, COLUMNA_MUESTRA, SEMAFORO, norm_txt, to_num, emparejar_resultados,
+    preparar_metas, preparar_resultados, comparar, formatear_comparativo,
+    calcular_captura, cambios_captura, clave_captura, importar_captura, numeros,
+)
+from escenarios import AJUSTES, EscenarioInvalido, barrido, resumen, simular
+from grafo import GrafoCalculo
+from vigilante import SESION_PRECALENTADO, vigilante_global
+from incremental import filtros_activos, versionar
+from progresivo import CARGAS, ESPERA as ESPERA_CARGA, ArchivoConAvance, vista_previa
+from instantanea import (EXTENSION as EXTENSION_INSTANTANEA, InstantaneaInvalida, desempaquetar, empaquetar,
+                         filtrar_valores)
 
 # ================= CONFIGURACIÓN GENERAL ================= #
 st.set_page_config(page_title="Generador de Reportes", layout="wide")
@@ -116,23 +134,24 @@ def app_header(
             st.markdown("<div style='height:16px'></div>", unsafe_allow_html=True)
 
 
-@st.cache_data(show_spinner=False)
+# Entradas máximas de los cachés de lectura (compartidos entre sesiones)
+CACHE_ENTRADAS = int(os.environ.get("REPORTES_CACHE_ENTRADAS", "8"))
+
+# Sin st.cache_data: Inscritos/Egresados se parsean una vez y se comparten por contenido
+# como Arrow mapeado en memoria (ver dataset_compartido / compartidos.py)
 def leer_excel_auto(file, sheet_name=0, **kw):
     """
-    Lee .xlsx (openpyxl), .xls (xlrd) y .xlsb (pyxlsb) automáticamente.
+    Lee .xlsx, .xls, .xlsb (openpyxl/xlrd/pyxlsb; calamine de respaldo o con
+    REPORTES_MOTOR_EXCEL, ver lectores.MOTORES_EXCEL), .csv y .parquet (pyarrow) automáticamente.
     - file: st.uploaded_file_manager.UploadedFile o ruta
     - sheet_name: índice o nombre de hoja
     """
     # Detectar extensión
     name = getattr(file, "name", str(file)).lower()
-    if name.endswith(".xlsb"):
-        return pd.read_excel(file, engine="pyxlsb", sheet_name=sheet_name, **kw)
-    elif name.endswith(".xls"):
-        # requiere 'xlrd' instalado
-        return pd.read_excel(file, engine="xlrd", sheet_name=sheet_name, **kw)
-    else:
-        # .xlsx (openpyxl por defecto)
-        return pd.read_excel(file, sheet_name=sheet_name, **kw)
+    if es_tabla(name):
+        # CSV / Parquet: tabla única, lector multihilo de pyarrow (sheet_name no aplica)
+        return leer_tabla(file, name)
+    return leer_excel(file, sheet_name=sheet_name, nombre=name, **kw)
 
 
 def section_header(title: str, subtitle: str = "", icon: str = "📦"):
@@ -149,12 +168,110 @@ def info_chips(pairs):
     html = "".join([f'<span class="chip"><b>{k}:</b> {v}</span>' for k,v in pairs])
     st.markdown(html, unsafe_allow_html=True)
 
+BADGES = {"verde": "badge-green", "amarillo": "badge-amber", "rojo": "badge-red", "no representativa": "badge-blue"}
+
 def status_badge(status: str) -> str:
     s = (status or "").lower().strip()
-    if s == "verde":     return '<span class="badge badge-green">🟢 Verde</span>'
-    if s == "rojo":      return '<span class="badge badge-red">🔴 Rojo</span>'
-    if s == "pendiente": return '<span class="badge badge-amber">🟡 Pendiente</span>'
-    return '<span class="badge badge-grey">⚪ Sin dato</span>'
+    return f'<span class="badge {BADGES.get(s, "badge-grey")}">{SEMAFORO.get(s, SEMAFORO["sin dato"])}</span>'
+
+# ================= MEMORIA POR SESIÓN ================= #
+# Los DataFrames y artefactos que guarda cada sesión pasan por el gobernador de memoria
+# del proceso (memoria.py): presupuesto REPORTES_MEMORIA_MB, desalojo LRU a disco.
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+_ctx = get_script_run_ctx()
+SESION = _ctx.session_id if _ctx else "local"
+if Runtime.exists():
+    # lo precalculado por el vigilante de la carpeta de datos no es de ninguna sesión
+    GOBERNADOR.purgar(lambda s: s == SESION_PRECALENTADO or Runtime.instance().is_active_session(s))
+
+def en_sesion(nombre, clave, calcular, politica="derramar"):
+    """Objeto de la sesión guardado en el gobernador; se recalcula si cambia `clave`."""
+    return GOBERNADOR.obtener_o_calcular(SESION, nombre, clave, calcular, politica)
+
+def clave_archivo(archivo):
+    return getattr(archivo, "file_id", getattr(archivo, "name", str(archivo)))
+
+def huella_archivo(archivo):
+    huella = getattr(archivo, "huella", None)   # archivos de la carpeta de datos ya la traen
+    if huella is None:
+        clave = f"_huella::{clave_archivo(archivo)}"
+        if clave not in st.session_state:
+            st.session_state[clave] = huella_bytes(archivo.getvalue())
+        huella = st.session_state[clave]
+    return huella
+
+def dataset_compartido(archivo, dataset, leer):
+    """
+    Carga parseada una sola vez por contenido y abierta con memory-map (compartidos.py):
+    sesiones que suben el mismo archivo comparten las mismas páginas en memoria.
+    """
+    return compartido(f"{huella_archivo(archivo)}-{dataset}", leer)
+
+def cargar_dataset(archivo, dataset, validacion):
+    """Inscritos/Egresados parseados (una vez por contenido) con los encabezados corregidos."""
+    if "datos" in getattr(archivo, "hojas", {}):   # sesión reanudada: ya viene parseado
+        return dataset_compartido(archivo, dataset, lambda: archivo.hojas["datos"])
+    mapeo = validacion.mapeo["datos"]
+    return dataset_compartido(
+        archivo, dataset, lambda: leer_excel_auto(archivo, sheet_name=0).rename(columns=mapeo)
+    )
+
+# ================= CARGA PROGRESIVA ================= #
+def cargar_progresivo(archivo, dataset, validacion):
+    """
+    cargar_dataset sin bloquear la página: si el parseo completo no termina en
+    progresivo.ESPERA s, sigue en un hilo de fondo y mientras tanto se muestran las primeras
+    filas, el avance y los filtros deshabilitados; devuelve None hasta que esté listo.
+    Si la lectura falla se muestra el error y no se reintenta hasta que cambie el archivo.
+    """
+    clave = f"{huella_archivo(archivo)}-{dataset}"
+    if publicado(clave) or "datos" in getattr(archivo, "hojas", {}):
+        return cargar_dataset(archivo, dataset, validacion)
+    fallo = f"_fallo_carga::{dataset}::{clave_archivo(archivo)}"
+    if st.session_state.get(fallo, (None,))[0] == clave:
+        st.error(st.session_state[fallo][1])
+        return None
+    mapeo = validacion.mapeo["datos"]
+    datos, nombre = archivo.getvalue(), archivo.name
+    carga = CARGAS.iniciar(clave, lambda c: compartido(
+        clave, lambda: leer_excel_auto(ArchivoConAvance(datos, nombre, c.reportar), sheet_name=0).rename(columns=mapeo)
+    ))
+    if carga.listo.wait(ESPERA_CARGA):
+        if carga.error is not None:
+            # el error queda en la sesión (por subida y huella) y la carga se suelta
+            st.session_state[fallo] = (clave, f"No se pudo leer {nombre}: {carga.error}")
+            CARGAS.soltar(clave)
+            st.error(st.session_state[fallo][1])
+            return None
+        return cargar_dataset(archivo, dataset, validacion)
+
+    st.markdown('<div class="card">', unsafe_allow_html=True)
+    try:
+        previa = en_sesion(f"vista_previa::{dataset}", clave_archivo(archivo),
+                           lambda: vista_previa(datos, nombre).rename(columns=mapeo))
+    except Exception as e:      # sin vista previa; la lectura completa sigue y reporta su propio error
+        st.warning(f"Vista previa no disponible: {e}")
+        previa = pd.DataFrame()
+    else:
+        st.subheader(f"📄 Vista previa (primeras {len(previa)} filas)")
+        st.dataframe(previa, use_container_width=True)
+    avance_carga(clave, nombre)
+    st.subheader("🧰 Filtros")
+    for c in [c for c in COLUMNAS_FILTRO if c in previa.columns]:
+        st.multiselect(f"Filtrar por {c}", [], disabled=True, key=f"{dataset}::previa::{c}",
+                       placeholder="Disponible al terminar la lectura")
+    st.markdown('</div>', unsafe_allow_html=True)
+    return None
+
+@st.fragment(run_every=1.0)
+def avance_carga(clave, nombre):
+    # Sólo este fragmento se vuelve a ejecutar cada segundo; al terminar, la página completa
+    carga = CARGAS.obtener(clave)
+    if carga is None or carga.listo.is_set():
+        st.rerun()
+    st.progress(carga.avance, text=f"Leyendo {nombre} completo… {carga.avance:.0%} ({carga.segundos:.0f} s)")
 
 # Header principal con logo
 app_header(
@@ -165,77 +282,518 @@ app_header(
 )
 
 # ================= UTILIDADES ================= #
-def norm_txt(s):
-    return str(s).strip().lower() if pd.notna(s) else ""
+# norm_txt, to_num, comparador, ... viven en comparativo.py (compartidos con la API)
 
-def to_num(x):
-    """'58.0%' -> 58.0 ; 'N/A' -> NaN ; '1830' -> 1830.0"""
-    if pd.isna(x):
-        return np.nan
-    s = str(x).strip().replace(",", ".")
-    if s.upper() in ["N/A", "NA", "NONE", ""]:
-        return np.nan
-    if s.endswith("%"):
-        s = s[:-1].strip()
-        try:
-            return float(s)
-        except Exception:
-            return np.nan
+@st.cache_data(show_spinner=False, max_entries=CACHE_ENTRADAS)
+def leer_excel_xlsx(file, **kw):
+    # Indicadores: .xlsx o una tabla CSV/Parquet. Fallos de caché simultáneos del mismo
+    # contenido esperan un único parseo (vuelo_unico)
+    return LECTURAS.hacer(
+        ("xlsx", huella_bytes(file.getvalue()), repr(sorted(kw.items()))),
+        lambda: leer_excel_auto(file, **kw),
+    )
+
+def leer_hoja_indicadores(archivo, validacion, rol):
+    """Hoja de captura o de metas con encabezados corregidos (precargada si viene de la carpeta)."""
+    if rol in getattr(archivo, "hojas", {}):
+        return archivo.hojas[rol]
+    return leer_excel_xlsx(archivo, sheet_name=validacion.hojas[rol]).rename(columns=validacion.mapeo[rol])
+
+# ================= VALIDACIÓN DE ESQUEMA ================= #
+def validar_carga(archivo, dataset):
+    """
+    Revisa hojas y encabezados (sin parsear filas) una vez por archivo subido y muestra
+    los problemas: errores bloquean la carga, avisos informan encabezados ajustados.
+    """
+    clave = f"_esquema::{dataset}::{clave_archivo(archivo)}"
+    if clave not in st.session_state:
+        previa = getattr(archivo, "validacion", None)
+        st.session_state[clave] = previa if previa is not None and previa.dataset == dataset \
+            else validar_archivo(archivo.name, archivo.getvalue(), dataset)
+    validacion = st.session_state[clave]
+    for p in validacion.problemas:
+        if p.nivel == "error":
+            st.error(f"{p.hoja + ': ' if p.hoja else ''}{p.mensaje}")
+    avisos = [p.mensaje for p in validacion.problemas if p.nivel != "error"]
+    if avisos:
+        st.info("Encabezados: " + " · ".join(avisos))
+    return validacion
+
+# ================= HISTÓRICO MULTIPERIODO ================= #
+ALMACEN = AlmacenPeriodos()
+
+def guardar_en_historico(dataset, archivo, df):
+    """Sin Streamlit (también lo usa el vigilante): entradas del manifiesto, una por periodo."""
+    return ALMACEN.anexar_por_periodo(dataset, df, huella_bytes(archivo.getvalue()))
+
+def anexar_a_historico(dataset, archivo, df):
+    """Guarda la carga por periodo de los datos (una sola vez por archivo y sesión)."""
+    if not ALMACEN.activo or not st.session_state.get("guardar_historico", True) \
+       or getattr(archivo, "restaurado", False):
+        return      # lo de una sesión reanudada ya se guardó en la sesión original
+    clave = f"_hist::{dataset}::{getattr(archivo, 'file_id', getattr(archivo, 'name', ''))}"
+    if st.session_state.get(clave):
+        return
+    st.session_state[clave] = True
+    if COLUMNA_PERIODO not in df.columns:
+        st.toast(f"{dataset.capitalize()}: sin columna '{COLUMNA_PERIODO}', no se guarda en el histórico")
+        return
     try:
-        return float(s)
-    except Exception:
-        return np.nan
+        entradas = guardar_en_historico(dataset, archivo, df)
+    except Exception as e:
+        del st.session_state[clave]
+        st.warning(f"No se pudo guardar {dataset} en el histórico: {e}")
+        return
+    nuevas = [f"{e['filas']} en {e['periodo']}" for e in entradas if e["filas"]]
+    if nuevas:
+        st.toast(f"{dataset.capitalize()}: filas nuevas guardadas en el histórico: {', '.join(nuevas)}")
+
+# ================= PERFILES Y FILTROS ================= #
+def filtro_desde_perfil(etiqueta, perfil_col, key):
+    """multiselect con opciones del perfil; alta cardinalidad -> búsqueda y selección vacía = todos."""
+    if not perfil_col.alta_cardinalidad:
+        return st.multiselect(etiqueta, perfil_col.valores, default=perfil_col.valores, key=key)
+    busqueda = st.text_input(
+        f"Buscar en {perfil_col.nombre} ({perfil_col.n_distintos} valores)", "", key=f"{key}::q"
+    )
+    seleccion = st.session_state.get(key, [])
+    opciones = list(dict.fromkeys(list(seleccion) + perfil_col.buscar(busqueda)))
+    return st.multiselect(f"{etiqueta} (vacío = todos)", opciones, key=key)
+
+def aplicar_filtros(df, filtros, perfil):
+    """
+    Aplica los filtros en una sola máscara. Una columna con todos sus valores
+    seleccionados sólo descarta nulos (igual que isin) y no se compara valor por valor.
+    """
+    mask = None
+    for c, vals in filtros.items():
+        if not vals:
+            continue
+        if len(vals) >= perfil[c].n_distintos:
+            if perfil[c].nulos == 0:
+                continue
+            m = df[c].notna().to_numpy()
+        else:
+            m = df[c].isin(vals).to_numpy()
+        mask = m if mask is None else (mask & m)
+    # Sin filtros activos: copia superficial (no duplica los datos compartidos)
+    return df.copy(deep=False) if mask is None else df[mask].copy()
+
+# ================= DETALLE FILTRADO ================= #
+def descarga_detalle(etiqueta, clave, df, archivo, renombrar=None):
+    """
+    Exporta por bloques a disco el detalle filtrado (CSV/Parquet) y ofrece la descarga.
+    Escribir el archivo no duplica el DataFrame; al descargarlo, Streamlit sí lee el archivo
+    completo a memoria (download_button no transmite desde disco).
+    """
+    import hashlib
+    # contenido del archivo subido (una re-subida corregida con la misma forma cambia la
+    # huella) + filas que dejaron los filtros + columnas
+    firma = hashlib.sha1(
+        huella_archivo(archivo).encode() + df.index.to_numpy().tobytes() + ",".join(map(str, df.columns)).encode()
+    ).hexdigest()
+    with st.expander(f"⬇️ {etiqueta} ({len(df):,} filas)"):
+        formato = st.radio("Formato", list(FORMATOS_DETALLE), horizontal=True, key=f"{clave}::fmt")
+        if st.button("Preparar archivo", key=f"{clave}::prep"):
+            barra = st.progress(0.0, text="Escribiendo detalle…")
+            ruta, mime = exportar_detalle(
+                df, formato, f"{SESION}_{clave}", renombrar=renombrar,
+                progreso=lambda n, total: barra.progress(n / max(total, 1), text=f"{n:,} de {total:,} filas"),
+            )
+            st.session_state[f"{clave}::archivo"] = (ruta, mime, formato, firma)
+        preparado = st.session_state.get(f"{clave}::archivo")
+        if preparado and preparado[2:] == (formato, firma) and os.path.exists(preparado[0]):
+            with open(preparado[0], "rb") as fh:
+                st.download_button(
+                    f"📥 Descargar {formato}",
+                    data=fh,
+                    file_name=f"{clave}_{st.session_state.get('cuatrimestre_actual', '').replace(' ', '_')}"
+                              f"{os.path.splitext(preparado[0])[1]}",
+                    mime=preparado[1],
+                    key=f"{clave}::dl",
+                )
+        elif preparado:
+            st.caption("Los filtros o el formato cambiaron: vuelve a preparar el archivo.")
+
+# ================= GRAFO DE CÁLCULO ================= #
+# Cada dato derivado (filtrados, conteos, métricas, comparativo, exportaciones) es un nodo
+# de grafo.py. Sus resultados se guardan en el gobernador bajo la huella de sus entradas:
+# en cada rerun sólo se recalcula lo que cambió aguas arriba.
+_SIN_PRECALCULO = object()
+
+def cache_nodo(nombre, huella, calcular, politica):
+    # Nodos ya calculados en segundo plano por el vigilante (mismas huellas) se sirven tal cual
+    v = GOBERNADOR.obtener(SESION_PRECALENTADO, f"nodo::{nombre}", huella, default=_SIN_PRECALCULO)
+    if v is not _SIN_PRECALCULO:
+        return v
+    return GOBERNADOR.obtener_o_calcular(SESION, f"nodo::{nombre}", huella, calcular, politica)
+
+G = GrafoCalculo(cache=cache_nodo)
+
+def clasificar_nivel_inscrito(carrera):
+    txt = str(carrera).lower()
+    if "técnico" in txt or "tsu" in txt:
+        return "TSU"
+    if "maestría" in txt or "posgrado" in txt:
+        return "POS"
+    if "ingeniería" in txt:
+        return "ING"
+    return "Otro"
+
+def clasificar_nivel_eg(carrera):
+    carrera = str(carrera).lower()
+    if "maestría" in carrera:
+        return "Maestría"
+    elif "ingeniería" in carrera:
+        return "Ingeniería"
+    elif "técnico" in carrera or "tsu" in carrera:
+        return "TSU"
+    elif "movilidad" in carrera:
+        return "Movilidad Académica"
+    return "Otro"
+
+def _fmt_pct(x):
+    if pd.isna(x): return ""
+    return f"{x*100:.1f}%"
+
+def _conteo(df_f, version, filtros, columna):
+    # Sin filtros que descarten filas, los conteos de la versión (incrementales) ya sirven
+    if not filtros_activos(filtros, version.perfil) and columna in version.conteos:
+        return version.conteos[columna]
+    return df_f[columna].value_counts()
+
+# ---- Inscritos ---- #
+# version_ins: datos con "Nivel", perfil de filtros y conteos sin filtrar. Al volver a subir
+# el mismo archivo corregido sólo se procesan las filas que cambiaron (incremental.py).
+@G.nodo("version_ins", deps=["df_ins", "linaje_ins"])
+def _version_ins(df_ins, linaje):
+    return versionar(("inscritos", linaje), df_ins, clasificar_nivel_inscrito, columnas_perfil=list(df_ins.columns))
+
+@G.nodo("perfil_ins", deps=["version_ins"])
+def _perfil_ins(version):
+    return version.perfil
+
+@G.nodo("df_ins_f", deps=["version_ins", "filtros_ins", "perfil_ins"])
+def _df_ins_f(version, filtros, perfil):
+    return aplicar_filtros(version.df, filtros, perfil)
+
+@G.nodo("conteo_ins_carrera", deps=["df_ins_f", "version_ins", "filtros_ins"])
+def _conteo_ins_carrera(df_ins_f, version, filtros):
+    if "Carrera" not in df_ins_f.columns:
+        return pd.DataFrame()
+    return (
+        _conteo(df_ins_f, version, filtros, "Carrera").reset_index()
+        .rename(columns={"index": "Carrera", "Carrera": "Total de Alumnos"})
+    )
+
+@G.nodo("conteo_ins_nivel", deps=["df_ins_f", "version_ins", "filtros_ins"])
+def _conteo_ins_nivel(df_ins_f, version, filtros):
+    if "Nivel" not in df_ins_f.columns:
+        return pd.DataFrame()
+    return (
+        _conteo(df_ins_f, version, filtros, "Nivel").reset_index()
+        .rename(columns={"index": "Nivel", "Nivel": "Alcanzado"})
+    )
+
+@G.nodo("metricas_auto_inscritos", deps=["df_ins_f"])
+def _metricas_auto_inscritos(df_ins_f):
+    niveles_obj = ["TSU", "ING", "POS"]
+    conteo_por_nivel = df_ins_f["Nivel"].value_counts() if "Nivel" in df_ins_f.columns else pd.Series(dtype=int)
+    return pd.DataFrame([
+        {
+            "Indicador": "Matrícula por nivel Educativo",
+            "Responsable": niv,
+            "Resultado": int(conteo_por_nivel.get(niv, 0)),
+        }
+        for niv in niveles_obj
+    ])
 
-def is_percent_row(row, cols=("Ene-Abr", "May-Ago", "Sep-Dic")):
-    vals = [str(row.get(c, "")) for c in cols]
-    return any("%" in v for v in vals)
-
-def elegir_meta_efectiva(row, preferida_col):
-    """Regla: usa la del periodo preferido; si es NaN y sólo una de las otras tiene dato, usa esa; si no, NaN."""
-    prefer = row.get(preferida_col, np.nan)
-    if pd.notna(prefer):
-        return prefer
-    otras = [c for c in ["Ene-Abr", "May-Ago", "Sep-Dic"] if c != preferida_col]
-    vals = [row.get(otras[0], np.nan), row.get(otras[1], np.nan)]
-    con_dato = [v for v in vals if pd.notna(v)]
-    return con_dato[0] if len(con_dato) == 1 else np.nan
-
-def comparador(resultado, meta):
-    if pd.isna(meta):
-        return "pendiente"
-    if pd.isna(resultado):
-        return "sin dato"
-    return "verde" if float(resultado) >= float(meta) else "rojo"
-
-def fmt_val(v, is_pct):
+# ---- Egresados ---- #
+@G.nodo("version_eg", deps=["df_eg", "linaje_eg"])
+def _version_eg(df_eg, linaje):
+    if "Carrera" not in df_eg.columns:
+        df_eg = con_columna(df_eg, "Nivel", clasificar_nivel_eg(""))
+    return versionar(("egresados", linaje), df_eg, clasificar_nivel_eg, columnas_conteo=())
+
+@G.nodo("df_eg_nivel", deps=["version_eg"])
+def _df_eg_nivel(version):
+    return version.df
+
+@G.nodo("perfil_eg", deps=["version_eg"])
+def _perfil_eg(version):
+    return version.perfil, valores_por_grupo(version.df, "Nivel", "Generación")
+
+@G.nodo("df_eg_filtrado", deps=["df_eg_nivel", "filtros_eg", "perfil_eg"])
+def _df_eg_filtrado(df_eg, filtros, perfil):
+    return aplicar_filtros(df_eg, filtros, perfil[0])
+
+@G.nodo("df_eg_f", deps=["df_eg_filtrado", "generaciones"])
+def _df_eg_f(df_eg_f, generaciones):
+    if generaciones:
+        mask = pd.Series(False, index=df_eg_f.index)
+        for nivel, gens in generaciones.items():
+            mask = mask | ((df_eg_f["Nivel"] == nivel) & (df_eg_f["Generación"].isin(gens)))
+        df_eg_f = df_eg_f[mask]
+    # TSUA, TSUM, TSUF, IAM, IDMA, IECSA, IMA, MIA (ver cohortes.map_program_code)
+    prog = codigos_programa(df_eg_f["Carrera"]) if "Carrera" in df_eg_f.columns else ""
+    return con_columna(df_eg_f, "_prog", prog)
+
+@G.nodo("conteo_eg_carrera", deps=["df_eg_f"])
+def _conteo_eg_carrera(df_eg_f):
+    if df_eg_f.empty or "Carrera" not in df_eg_f.columns:
+        return pd.DataFrame()
+    conteo = df_eg_f["Carrera"].value_counts().reset_index()
+    conteo.columns = ["Carrera", "Total de Egresados"]
+    return conteo
+
+@G.nodo("conteo_prog", deps=["df_eg_f"])
+def _conteo_prog(df_eg_f):
+    # Conteo de egresados por código de programa (sólo códigos de interés)
+    return (
+        df_eg_f[df_eg_f["_prog"].isin(CODIGOS_PROGRAMA)]["_prog"]
+        .value_counts()
+        .reindex(CODIGOS_PROGRAMA)
+        .fillna(0)
+        .astype(int)
+        .to_dict()
+    )
+
+@G.nodo("historico_ins", deps=["manifiesto_ins"])
+def _historico_ins(manifiesto_ins):
+    # Inscritos de todos los periodos guardados, sólo las columnas que usan las cohortes
+    columnas = ALMACEN.columnas("inscritos")
+    col_id = columna_id(pd.DataFrame(columns=columnas))
+    return ALMACEN.leer("inscritos", columnas=[c for c in ("Carrera", "Generación", col_id) if c in columnas])
+
+@G.nodo("cohortes", deps=["df_eg_f"], opcionales=["df_ins", "historico_ins"])
+def _cohortes(df_eg_f, df_ins, historico_ins):
+    # Ingresos por programa×generación de Inscritos completos (carga actual + histórico: la
+    # matrícula vigente ya no trae egresados ni bajas); cada alumno cuenta una vez, en su
+    # primera generación. Egresados asignados a su cohorte por matrícula o por Generación.
+    # Sólo las generaciones que cubren los egresados filtrados (no diluye Σ ingresos)
+    return eficiencia_por_cohorte(df_ins, df_eg_f, programas=CODIGOS_PROGRAMA, historico=historico_ins)
+
+@G.nodo("historico_sin_id", deps=["df_eg_f"], opcionales=["df_ins", "historico_ins"])
+def _historico_sin_id(df_eg_f, df_ins, historico_ins):
+    # Periodos guardados sin la matrícula que sí traen los archivos actuales
+    return [] if df_ins is None else periodos_sin_id(historico_ins, columna_id(df_ins, df_eg_f))
+
+@G.nodo("et_programas", deps=["cohortes", "conteo_prog"], opcionales=["ingresos_manuales"])
+def _et_programas(df_cohortes, conteo_prog, ingresos_manuales):
+    if not df_cohortes.empty:
+        df_et = eficiencia_por_programa(df_cohortes, CODIGOS_PROGRAMA)
+    else:
+        ingresos_manuales = ingresos_manuales or {}
+        egresados = [int(conteo_prog.get(c, 0)) for c in CODIGOS_PROGRAMA]
+        ingresos = [int(ingresos_manuales.get(c, 0)) for c in CODIGOS_PROGRAMA]
+        df_et = pd.DataFrame({
+            "Programa": CODIGOS_PROGRAMA,
+            "Egresados": egresados,
+            "Ingresos": ingresos,
+            "Eficiencia": [(e / i) if i > 0 else np.nan for e, i in zip(egresados, ingresos)],
+        })
+    df_et["Eficiencia (%)"] = df_et["Eficiencia"].map(_fmt_pct)
+    return df_et
+
+@G.nodo("metricas_auto_egresados", deps=["et_programas"])
+def _metricas_auto_egresados(df_et):
+    # Indicador: "Eficiencia Terminal por cohorte por Programa Educativo"
+    resultados_et = dict(zip(df_et["Programa"], df_et["Eficiencia"]))
+    return pd.DataFrame([
+        {
+            "Indicador": "Eficiencia Terminal por cohorte por Programa Educativo",
+            "Responsable": cod,
+            "Resultado": resultados_et.get(cod, np.nan),   # proporción (0..1)
+        }
+        for cod in CODIGOS_PROGRAMA
+    ])
+
+# ---- Indicadores ---- #
+@G.nodo("df_manual_filtrado", deps=["df_manual", "filtro_texto"])
+def _df_manual_filtrado(df_manual, filtro_texto):
+    if filtro_texto:
+        mask = (
+            df_manual.get("Indicador", "").astype(str).str.contains(filtro_texto, case=False, na=False)
+            | df_manual.get("Responsable", "").astype(str).str.contains(filtro_texto, case=False, na=False)
+        )
+        return df_manual[mask].reset_index(drop=True)
+    return df_manual.reset_index(drop=True)
+
+def _parse_val(txt: str, use_pct: bool):
+    """
+    Convierte a número. Si use_pct=True:
+      - '50' o '50%' -> 0.5
+      - valores 0..1 se dejan como están
+    """
+    v = to_num(txt)
     if pd.isna(v):
-        return ""
-    x = float(v)
-    if is_pct:
-        if 0 <= x <= 1:
-            x *= 100
-        return f"{x:.1f}%"
-    return f"{x:.0f}" if abs(x - round(x)) < 1e-9 else f"{x:.1f}"
-
-@st.cache_data(show_spinner=False)
-def leer_excel_xlsx(file, **kw):
-    return pd.read_excel(file, **kw)
+        return np.nan
+    s = str(txt).strip()
+    if use_pct and (s.endswith("%") or float(v) > 1):
+        return float(v) / 100.0
+    return float(v)
+
+@G.nodo("captura_manual_df", deps=["df_manual_filtrado", "captura"])
+def _captura_manual_df(df_manual_filtrado, captura):
+    # DataFrame completo con resultado calculado (usando el toggle por indicador), vectorizado
+    vacia = pd.Series("", index=df_manual_filtrado.index, dtype=object)
+    nom_ind = df_manual_filtrado.get("Indicador", vacia)
+    resp = df_manual_filtrado.get("Responsable", vacia)
+    claves = clave_captura(nom_ind, resp)
+    guardado = pd.Series(captura, dtype=object)
+
+    def campo(suf, default):
+        return pd.Series(guardado.reindex(claves + suf).to_numpy(), index=claves.index).fillna(default)
+
+    v1_txt, v2_txt = campo("::v1", ""), campo("::v2", "")
+    pct_ind = campo("::pct", False).astype(bool)
+    v1_num, _, res_calc = calcular_captura(v1_txt, v2_txt, pct_ind)
+    res_calc = res_calc.fillna(numeros(campo("::res", ""))[0])
+    return pd.DataFrame({
+        "Indicador": nom_ind,
+        "Responsable": resp,
+        "Variable 1": v1_txt,
+        "Variable 2": v2_txt,
+        "Resultado": res_calc,
+        "Comentarios": campo("::com", ""),
+        # Variable 1 es la base del cociente: tamaño de muestra para la regla 🔵
+        COLUMNA_MUESTRA: v1_num.where(~pct_ind),
+    }, columns=["Indicador", "Responsable", "Variable 1", "Variable 2", "Resultado",
+                "Comentarios", COLUMNA_MUESTRA]).reset_index(drop=True)
+
+@G.nodo("metas", deps=["df_metas", "periodo_col"])
+def _metas(df_metas, periodo_col):
+    # metas numéricas + meta efectiva según cuatrimestre elegido
+    return preparar_metas(df_metas, periodo_col)
+
+@G.nodo("resultados", deps=["captura_manual_df"], opcionales=["metricas_auto_inscritos", "metricas_auto_egresados"])
+def _resultados(captura_manual_df, auto_ins, auto_eg):
+    # captura manual + automáticos de Inscritos + automáticos de Egresados
+    cols = COLUMNAS_RESULTADOS + [COLUMNA_MUESTRA]
+    vacio = pd.DataFrame(columns=cols)
+    return pd.concat(
+        [
+            captura_manual_df.reindex(columns=cols),
+            (vacio if auto_ins is None else auto_ins).reindex(columns=cols),
+            (vacio if auto_eg is None else auto_eg).reindex(columns=cols),
+        ],
+        ignore_index=True
+    )
 
-@st.cache_data(show_spinner=False)
-def leer_excel_xlsb(file, **kw):
-    return pd.read_excel(file, engine="pyxlsb", **kw)
+@G.nodo("resultados_prep", deps=["resultados"])
+def _resultados_prep(resultados):
+    return preparar_resultados(resultados)
+
+@G.nodo("emparejamiento", deps=["metas", "resultados_prep"])
+def _emparejamiento(metas, resultados_prep):
+    # nombres que no coinciden exacto con Hoja2 (acentos, espacios, erratas)
+    return emparejar_resultados(metas, resultados_prep)
+
+@G.nodo("comp", deps=["metas", "resultados_prep", "emparejamiento"])
+def _comp(metas, resultados_prep, emparejamiento):
+    # LEFT JOIN desde metas + estatus
+    return comparar(metas, resultados_prep, emparejamiento)
+
+@G.nodo("comp_out", deps=["comp"])
+def _comp_out(comp):
+    return formatear_comparativo(comp)
+
+@G.nodo("simulacion", deps=["comp", "escenarios"])
+def _simulacion(comp, escenarios):
+    # todos los escenarios de una vez: conteos por escenario × Proceso × Responsable
+    return simular(comp, escenarios)
+
+# ---- Exportaciones (se regeneran si cambia el contenido o el día) ---- #
+@G.nodo("excel_bytes", deps=["comp_out", "cuatrimestre_actual", "periodo_col", "anio", "hoy"],
+        opcionales=["conteo_ins_carrera", "conteo_eg_carrera"], politica="descartar")
+def _excel_bytes(comp_out, cuatrimestre_actual, periodo_col, anio, hoy, conteo_ins, conteo_eg):
+    # periodo extendido para mostrar (igual al PDF)
+    periodo_ext = f"{MAPA_PERIODOS.get(periodo_col, periodo_col)} {anio}"
+    conteo_ins = pd.DataFrame() if conteo_ins is None else conteo_ins
+    conteo_eg = pd.DataFrame() if conteo_eg is None else conteo_eg
+    # Mismo contenido entre sesiones -> un solo render (los demás esperan o lo reutilizan)
+    return EXPORTACIONES.hacer(
+        ("xlsx", huella_objetos(comp_out, conteo_ins, conteo_eg, cuatrimestre_actual, periodo_ext, hoy)),
+        lambda: exportar_excel_corporativo(
+            comp_out,
+            conteo_ins,
+            conteo_eg,
+            cuatrimestre_actual,
+            periodo_ext,
+            logo_path="unaq_logo.png",      # opcional
+        ).getvalue(),
+    )
+
+@G.nodo("pdf_bytes", deps=["comp_out", "conteo_ins_carrera", "conteo_eg_carrera",
+                           "cuatrimestre_actual", "periodo_col", "anio", "hoy"], politica="descartar")
+def _pdf_bytes(comp_out, conteo_ins, conteo_eg, cuatrimestre_actual, periodo_col, anio, hoy):
+    return EXPORTACIONES.hacer(
+        ("pdf", huella_objetos(comp_out, conteo_ins, conteo_eg, cuatrimestre_actual, periodo_col, anio, hoy)),
+        lambda: generar_reporte_pdf(
+            comp_out,
+            conteo_ins,
+            conteo_eg,
+            cuatrimestre_actual,
+            periodo_col,  # ← ahora se pasa el periodo
+            anio,         # ← y el año para “Mayo – Agosto 2025”
+            logo_path="unaq_logo.png"
+        ),
+    )
+
+@G.nodo("zip_responsables", deps=["comp_out", "cuatrimestre_actual", "periodo_col", "anio", "hoy",
+                                  "por_proceso"], politica="descartar")
+def _zip_responsables(comp_out, cuatrimestre_actual, periodo_col, anio, hoy, por_proceso):
+    return EXPORTACIONES.hacer(
+        ("zip", huella_objetos(comp_out, cuatrimestre_actual, periodo_col, anio, hoy, por_proceso)),
+        lambda: generar_reportes_por_responsable(
+            comp_out, cuatrimestre_actual, periodo_col, anio, por_proceso=por_proceso,
+            logo_path="unaq_logo.png",
+        ),
+    )
 
 # ================= PERIODO / PARÁMETROS ================= #
 from datetime import date
 
 # Rango de años mostrado
 YEARS = list(range(2020, 2036))
+CUATRIMESTRES = ["C1", "C2", "C3"]
+CUATRIMESTRE_DEFAULT = "C2"
+COLUMNAS_FILTRO = ["Carrera", "Sexo", "Periodo", "Grupo", "Ciclo"]
 year_today = date.today().year
 try:
     default_year_idx = YEARS.index(year_today)
 except ValueError:
     default_year_idx = max(0, len(YEARS) - 1)  # último año si el actual no está
 
+# ================= REANUDAR SESIÓN ================= #
+# Antes de crear los demás widgets: los valores guardados se asignan a sus claves y los
+# archivos vuelven ya parseados (instantanea.py), sin leer de nuevo ningún libro.
+# Lista blanca de claves de sesión que se guardan y se restauran
+PREFIJOS_SESION = ("fi_", "eg_", "gen_", "ingresos_")
+CLAVES_SESION = ("sel_cuatrimestre", "sel_anio", "guardar_historico", "captura_manual")
+
+with st.expander("↩️ Reanudar una sesión guardada"):
+    archivo_sesion = st.file_uploader(
+        "Instantánea de sesión", type=[EXTENSION_INSTANTANEA.lstrip(".")], key="instantanea"
+    )
+    reanudada = st.session_state.get("_instantanea")
+    if archivo_sesion is not None and reanudada and reanudada[0] == clave_archivo(archivo_sesion):
+        st.caption(f"Sesión del {reanudada[1]} reanudada: "
+                   f"{', '.join(a.name for a in st.session_state['_restaurados'].values()) or 'sin archivos'}.")
+
+if archivo_sesion is not None and (reanudada or (None,))[0] != clave_archivo(archivo_sesion):
+    try:
+        valores_sesion, restaurados, creada = desempaquetar(archivo_sesion.getvalue(), PREFIJOS_SESION,
+                                                            CLAVES_SESION)
+    except InstantaneaInvalida as e:
+        st.error(str(e))
+    else:
+        for k, v in valores_sesion.items():
+            st.session_state[k] = v
+        st.session_state["_restaurados"] = restaurados
+        st.session_state["_instantanea"] = (clave_archivo(archivo_sesion), creada)
+        st.rerun()
+
 section_header("Panel de parámetros", "Selecciona el periodo de trabajo", "🧭")
 
 with st.container():
@@ -243,14 +801,16 @@ with st.container():
     with colA:
         cuatrimestre = st.selectbox(
             "📅 Selecciona el cuatrimestre:",
-            ["C1", "C2", "C3"],
-            index=1
+            CUATRIMESTRES,
+            index=CUATRIMESTRES.index(CUATRIMESTRE_DEFAULT),
+            key="sel_cuatrimestre",
         )
     with colB:
         anio = st.selectbox(
             "📅 Selecciona el año:",
             YEARS,
             index=default_year_idx,
+            key="sel_anio",
         )
 
 periodo_map = {"C1": "Ene-Abr", "C2": "May-Ago", "C3": "Sep-Dic"}
@@ -260,12 +820,165 @@ cuatrimestre_actual = f"{cuatrimestre} {anio}"
 # Chips informativos
 info_chips([("Cuatrimestre", cuatrimestre_actual), ("Periodo", periodo_col)])
 
+if ALMACEN.activo:    # sólo si el servidor define REPORTES_ALMACEN
+    st.checkbox(
+        f"Guardar cada carga de Inscritos/Egresados en el histórico multiperiodo "
+        f"(por la columna '{COLUMNA_PERIODO}' de los datos)",
+        value=True,
+        key="guardar_historico",
+    )
+
 # Persistir en session_state para uso posterior
 st.session_state["cuatrimestre"] = cuatrimestre
 st.session_state["anio"] = anio
 st.session_state["periodo_col"] = periodo_col
 st.session_state["cuatrimestre_actual"] = cuatrimestre_actual
 
+G.entrada("periodo_col", periodo_col)
+G.entrada("anio", anio)
+G.entrada("cuatrimestre_actual", cuatrimestre_actual)
+G.entrada("hoy", datetime.date.today())
+
+# ================= CARPETA DE DATOS VIGILADA ================= #
+# Con REPORTES_DATOS_DIR, un hilo del proceso (vigilante.py) valida y parsea cada archivo
+# nuevo o modificado de la carpeta y precalcula el grafo para el archivo más reciente de
+# cada dataset con los valores iniciales de la página (cuatrimestre/año por defecto, filtros
+# sin tocar, captura vacía). Los archivos de la carpeta tienen file_id = huella del
+# contenido, así que una sesión que los elige obtiene las mismas huellas de nodo y se le
+# sirve lo precalculado (cache_nodo); en cuanto cambia algo, se calcula como siempre.
+NODOS_PRECALCULADOS = (
+    "df_ins_f", "conteo_ins_carrera", "conteo_ins_nivel", "conteo_eg_carrera", "et_programas",
+    "df_manual_filtrado", "emparejamiento", "comp_out", "excel_bytes", "pdf_bytes",
+)
+
+def filtros_por_defecto(perfil, columnas):
+    """Lo que devuelven los multiselect de filtro_desde_perfil sin tocarlos."""
+    return {c: [] if perfil[c].alta_cardinalidad else perfil[c].valores for c in columnas}
+
+def generaciones_por_defecto(df_eg_filtrado, gens_por_nivel):
+    if "Generación" not in df_eg_filtrado.columns or "Nivel" not in df_eg_filtrado.columns:
+        return {}
+    presentes = set(df_eg_filtrado["Nivel"].dropna().unique().tolist())
+    return {nivel: gens_por_nivel[nivel] for nivel in sorted(n for n in gens_por_nivel if n in presentes)}
+
+def precalentar_archivo(entrada):
+    """Hilo del vigilante: valida y parsea un archivo nuevo de la carpeta."""
+    archivo = entrada.abrir()
+    validacion = validar_archivo(entrada.nombre, entrada.datos(), entrada.dataset)
+    entrada.validacion = validacion
+    if entrada.dataset == "indicadores":
+        roles = ["captura"] if "captura" in validacion.hojas else []
+        roles += ["metas"] if "metas" in validacion.hojas and not validacion.errores("metas") else []
+        entrada.hojas = {
+            rol: leer_excel_auto(archivo, sheet_name=validacion.hojas[rol]).rename(columns=validacion.mapeo[rol])
+            for rol in roles
+        }
+    elif validacion.ok:
+        cargar_dataset(archivo, entrada.dataset, validacion)
+
+def _historico_precalentado(dataset, archivo, df):
+    # Se guarda igual que lo hará la sesión, antes de tomar la huella del manifiesto: al
+    # abrir el archivo la sesión lo encuentra ya anexado y el manifiesto no cambia
+    try:
+        guardar_en_historico(dataset, archivo, df)
+    except Exception:
+        pass    # sin histórico (p.ej. sólo lectura): la sesión tampoco podrá anexar
+
+def precalentar(vigilante):
+    """Hilo del vigilante: evalúa el grafo con las entradas por defecto y los archivos más recientes."""
+    recientes = vigilante.mas_recientes()
+    g = G.copia(cache=lambda nombre, huella, calcular, politica:
+                GOBERNADOR.obtener_o_calcular(SESION_PRECALENTADO, f"nodo::{nombre}", huella, calcular, politica))
+    hoy = datetime.date.today()
+    anio_def = hoy.year if hoy.year in YEARS else YEARS[-1]
+    cuatrimestre_def = f"{CUATRIMESTRE_DEFAULT} {anio_def}"
+    g.entrada("periodo_col", periodo_map[CUATRIMESTRE_DEFAULT])
+    g.entrada("anio", anio_def)
+    g.entrada("cuatrimestre_actual", cuatrimestre_def)
+    g.entrada("hoy", hoy)
+
+    ins = recientes.get("inscritos")
+    if ins is not None and ins.validacion.ok:
+        archivo = ins.abrir()
+        df = g.entrada("df_ins", cargar_dataset(archivo, "inscritos", ins.validacion), huella=clave_archivo(archivo))
+        g.entrada("linaje_ins", (LINAJE_CARPETA, archivo.name))
+        _historico_precalentado("inscritos", archivo, df)
+        g.entrada("manifiesto_ins", len(ALMACEN.manifiesto("inscritos")))
+        g.entrada("filtros_ins", filtros_por_defecto(g.valor("perfil_ins"), [c for c in COLUMNAS_FILTRO if c in df.columns]))
+
+    eg = recientes.get("egresados")
+    if eg is not None and eg.validacion.ok:
+        archivo = eg.abrir()
+        df = g.entrada("df_eg", cargar_dataset(archivo, "egresados", eg.validacion), huella=clave_archivo(archivo))
+        g.entrada("linaje_eg", (LINAJE_CARPETA, archivo.name))
+        _historico_precalentado("egresados", archivo, df)
+        perfil, gens_por_nivel = g.valor("perfil_eg")
+        g.entrada("filtros_eg", filtros_por_defecto(perfil, [c for c in COLUMNAS_FILTRO if c in df.columns]))
+        g.entrada("generaciones", generaciones_por_defecto(g.valor("df_eg_filtrado"), gens_por_nivel))
+        if g.valor("cohortes").empty:
+            g.entrada("ingresos_manuales", {cod: 0 for cod in CODIGOS_PROGRAMA})
+
+    ind = recientes.get("indicadores")
+    if ind is not None and "captura" in ind.hojas:
+        archivo = ind.abrir()
+        g.entrada("df_manual", ind.hojas["captura"], huella=clave_archivo(archivo))
+        g.entrada("filtro_texto", "")
+        g.entrada("captura", {}, huella=repr([]))
+        if "metas" in ind.hojas:
+            g.entrada("df_metas", ind.hojas["metas"], huella=(clave_archivo(archivo), "Hoja2"))
+
+    for nombre in NODOS_PRECALCULADOS:
+        if g.disponible(nombre):
+            g.valor(nombre)
+
+# Linaje de un archivo para detectar re-subidas (incremental.py): lo subido sólo se compara
+# con lo que subió la misma sesión; los archivos de la carpeta de datos son comunes a todas y
+# sus versiones quedan bajo la sesión del precalentado (el gobernador no la purga).
+# Definido antes de arrancar el vigilante: su primera pasada (otro hilo) ya lo usa
+LINAJE_CARPETA = SESION_PRECALENTADO
+
+# Un solo vigilante por proceso; None si no hay carpeta configurada
+VIGILANTE = vigilante_global(precalentar_archivo=precalentar_archivo, precalentar=precalentar)
+ORIGEN_CARPETA = VIGILANTE is not None and st.radio(
+    "Origen de los archivos", ["Subir archivos", "Carpeta de datos"], horizontal=True, key="origen_archivos",
+) == "Carpeta de datos"
+
+def linaje_de(archivo):
+    return (LINAJE_CARPETA if ORIGEN_CARPETA else SESION, archivo.name)
+
+def aviso_cambios(version):
+    """Resumen de filas cambiadas cuando se volvió a subir una versión del mismo archivo."""
+    r = version.resumen
+    if r:
+        st.caption(
+            f"🔁 Respecto a la versión anterior del archivo: {r['nuevas']:,} filas nuevas, "
+            f"{r['modificadas']:,} modificadas, {r['eliminadas']:,} eliminadas, "
+            f"{r['sin_cambios']:,} sin cambios (sólo se reprocesaron las que cambiaron)."
+        )
+
+def elegir_archivo(dataset, subir):
+    """
+    Archivo de la carpeta vigilada (el más reciente por defecto) o el cargador de siempre;
+    si no se sube nada, el de la sesión reanudada.
+    """
+    if not ORIGEN_CARPETA:
+        archivo = subir()
+        restaurado = st.session_state.get("_restaurados", {}).get(dataset)
+        if archivo is None and restaurado is not None:
+            st.caption(f"↩️ {restaurado.name} (de la sesión reanudada)")
+            return restaurado
+        return archivo
+    rutas = [a.ruta for a in VIGILANTE.catalogo(dataset) if a.estado == "listo"]
+    if not rutas:
+        st.info(f"Aún no hay archivos de {dataset} listos en la carpeta de datos.")
+        return None
+    ruta = st.selectbox(f"Archivo de {dataset} (carpeta de datos)", rutas,
+                        format_func=os.path.basename, key=f"carpeta::{dataset}")
+    try:
+        return VIGILANTE.abrir(ruta)
+    except KeyError:       # se borró entre el listado y la apertura
+        return None
+
 # ================= SECCIÓN: INSCRITOS ================= #
 section_header(
     "Análisis de Alumnos Inscritos",
@@ -276,19 +989,27 @@ section_header(
 # --- Cargador ---
 with st.container():
     st.markdown('<div class="card">', unsafe_allow_html=True)
-    archivo_inscritos = st.file_uploader(
-    "Sube tu archivo de inscripciones (.xlsx / .xls)",
-    type=["xlsx", "xls"],
-    key="inscritos"
-)
+    archivo_inscritos = elegir_archivo("inscritos", lambda: st.file_uploader(
+        "Sube tu archivo de inscripciones (.xlsx / .xls / .csv / .parquet)",
+        type=["xlsx", "xls", "csv", "parquet"],
+        key="inscritos"
+    ))
 st.markdown('</div>', unsafe_allow_html=True)
 
-conteo_inscritos_por_carrera = pd.DataFrame()
-conteo_inscritos_por_nivel = pd.DataFrame()
+# --- Validación de hojas/encabezados antes del parseo completo ---
+validacion_ins = validar_carga(archivo_inscritos, "inscritos") if archivo_inscritos else None
+
+# Lector auto–engine (.xlsx/.xls); encabezados corregidos según la validación. Con libros
+# grandes se muestra antes una vista previa y el avance (None hasta terminar)
+df_ins = cargar_progresivo(archivo_inscritos, "inscritos", validacion_ins) \
+    if archivo_inscritos and validacion_ins.ok else None
 
-if archivo_inscritos:
-    # Usa el lector auto–engine (.xlsx/.xls)
-    df_ins = leer_excel_auto(archivo_inscritos, sheet_name=0)
+if df_ins is not None:
+    G.entrada("df_ins", df_ins, huella=clave_archivo(archivo_inscritos))
+    G.entrada("linaje_ins", linaje_de(archivo_inscritos))
+    anexar_a_historico("inscritos", archivo_inscritos, df_ins)
+    G.entrada("manifiesto_ins", len(ALMACEN.manifiesto("inscritos")))
+    aviso_cambios(G.valor("version_ins"))
 
     # --- Vista previa ---
     st.markdown('<div class="card">', unsafe_allow_html=True)
@@ -296,87 +1017,49 @@ if archivo_inscritos:
     st.dataframe(df_ins.head(50), use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
+    # --- Filtros ---
+    st.markdown('<div class="card">', unsafe_allow_html=True)
+    st.subheader("🧰 Filtros")
+    columnas_filtro = [c for c in COLUMNAS_FILTRO if c in df_ins.columns]
+    perfil_ins = G.valor("perfil_ins")
+
+    filtros = {}
+    for c in columnas_filtro:
+        filtros[c] = filtro_desde_perfil(f"Filtrar por {c}", perfil_ins[c], key=f"fi_{c}")
+    with st.expander("Perfil de columnas"):
+        st.dataframe(tabla_perfil(perfil_ins), use_container_width=True)
+    st.markdown('</div>', unsafe_allow_html=True)
 
-    # --- Validación mínima ---
-    req_cols = ["Carrera"]
-    faltan = [c for c in req_cols if c not in df_ins.columns]
-    if faltan:
-        st.error(f"Faltan columnas mínimas en Inscritos: {faltan}")
-    else:
-        # --- Filtros ---
+    # Aplicar filtros (+ clasificación de nivel educativo)
+    G.entrada("filtros_ins", filtros)
+    df_ins_f = G.valor("df_ins_f")
+
+    # --- Conteos por carrera ---
+    conteo_inscritos_por_carrera = G.valor("conteo_ins_carrera")
+    if not conteo_inscritos_por_carrera.empty:
         st.markdown('<div class="card">', unsafe_allow_html=True)
-        st.subheader("🧰 Filtros")
-        columnas_filtro = [c for c in ["Carrera", "Sexo", "Periodo", "Grupo", "Ciclo"] if c in df_ins.columns]
-
-        filtros = {}
-        for c in columnas_filtro:
-            vals = sorted([v for v in df_ins[c].dropna().unique().tolist()])
-            sel = st.multiselect(f"Filtrar por {c}", vals, default=vals, key=f"fi_{c}")
-            filtros[c] = sel
+        st.subheader("📊 Total de alumnos por carrera (filtrado)")
+        st.dataframe(conteo_inscritos_por_carrera, use_container_width=True)
         st.markdown('</div>', unsafe_allow_html=True)
 
-        # Aplicar filtros
-        df_ins_f = df_ins.copy()
-        for c, vals in filtros.items():
-            if vals:
-                df_ins_f = df_ins_f[df_ins_f[c].isin(vals)]
-
-        # --- Clasificación de nivel educativo ---
-        def clasificar_nivel_inscrito(carrera):
-            txt = str(carrera).lower()
-            if "técnico" in txt or "tsu" in txt:
-                return "TSU"
-            if "maestría" in txt or "posgrado" in txt:
-                return "POS"
-            if "ingeniería" in txt:
-                return "ING"
-            return "Otro"
-
-        if "Carrera" in df_ins_f.columns:
-            df_ins_f["Nivel"] = df_ins_f["Carrera"].apply(clasificar_nivel_inscrito)
-
-        # --- Conteos por carrera ---
-        if "Carrera" in df_ins_f.columns:
-            conteo_inscritos_por_carrera = (
-                df_ins_f["Carrera"].value_counts().reset_index()
-                .rename(columns={"index": "Carrera", "Carrera": "Total de Alumnos"})
-            )
-            st.markdown('<div class="card">', unsafe_allow_html=True)
-            st.subheader("📊 Total de alumnos por carrera (filtrado)")
-            st.dataframe(conteo_inscritos_por_carrera, use_container_width=True)
-            st.markdown('</div>', unsafe_allow_html=True)
-
-        # --- Conteos por nivel ---
-        if "Nivel" in df_ins_f.columns:
-            conteo_inscritos_por_nivel = (
-                df_ins_f["Nivel"].value_counts().reset_index()
-                .rename(columns={"index": "Nivel", "Nivel": "Alcanzado"})
-            )
-            st.markdown('<div class="card">', unsafe_allow_html=True)
-            st.subheader("🏁 Total de alumnos por nivel educativo")
-            # KPIs arriba (opcional)
-            try:
-                k1, k2, k3 = st.columns(3)
-                k1.metric("TSU (alcanzado)", int(conteo_inscritos_por_nivel.set_index("Nivel").get("Alcanzado", {}).get("TSU", 0)))
-                k2.metric("ING (alcanzado)", int(conteo_inscritos_por_nivel.set_index("Nivel").get("Alcanzado", {}).get("ING", 0)))
-                k3.metric("POS (alcanzado)", int(conteo_inscritos_por_nivel.set_index("Nivel").get("Alcanzado", {}).get("POS", 0)))
-            except Exception:
-                pass
-            st.dataframe(conteo_inscritos_por_nivel, use_container_width=True)
-            st.markdown('</div>', unsafe_allow_html=True)
+    # --- Conteos por nivel ---
+    conteo_inscritos_por_nivel = G.valor("conteo_ins_nivel")
+    if not conteo_inscritos_por_nivel.empty:
+        st.markdown('<div class="card">', unsafe_allow_html=True)
+        st.subheader("🏁 Total de alumnos por nivel educativo")
+        # KPIs arriba (opcional)
+        try:
+            k1, k2, k3 = st.columns(3)
+            k1.metric("TSU (alcanzado)", int(conteo_inscritos_por_nivel.set_index("Nivel").get("Alcanzado", {}).get("TSU", 0)))
+            k2.metric("ING (alcanzado)", int(conteo_inscritos_por_nivel.set_index("Nivel").get("Alcanzado", {}).get("ING", 0)))
+            k3.metric("POS (alcanzado)", int(conteo_inscritos_por_nivel.set_index("Nivel").get("Alcanzado", {}).get("POS", 0)))
+        except Exception:
+            pass
+        st.dataframe(conteo_inscritos_por_nivel, use_container_width=True)
+        st.markdown('</div>', unsafe_allow_html=True)
 
-        # --- KPIs automáticos para Indicadores (se guardan en session_state) ---
-        niveles_obj = ["TSU", "ING", "POS"]
-        conteo_por_nivel = df_ins_f["Nivel"].value_counts() if "Nivel" in df_ins_f.columns else pd.Series(dtype=int)
-        df_metricas_auto_ins = pd.DataFrame([
-            {
-                "Indicador": "Matrícula por nivel Educativo",
-                "Responsable": niv,
-                "Resultado": int(conteo_por_nivel.get(niv, 0)),
-            }
-            for niv in niveles_obj
-        ])
-        st.session_state["metricas_auto_inscritos"] = df_metricas_auto_ins
+    # --- Detalle filtrado (fila por alumno, con Nivel) ---
+    descarga_detalle("Detalle filtrado de inscritos", "detalle_inscritos", df_ins_f, archivo_inscritos)
 
 
 # ================= SECCIÓN: EGRESADOS ================= #
@@ -385,24 +1068,24 @@ section_header("Reporte de Egresados", "Carga, filtra y explora los egresados",
 
 with st.container():
     st.markdown('<div class="card">', unsafe_allow_html=True)
-    archivo_egresados = st.file_uploader(
-        "Sube tu archivo de egresados (.xlsb / .xlsx / .xls)",
-        type=["xlsb", "xlsx", "xls"],
+    archivo_egresados = elegir_archivo("egresados", lambda: st.file_uploader(
+        "Sube tu archivo de egresados (.xlsb / .xlsx / .xls / .csv / .parquet)",
+        type=["xlsb", "xlsx", "xls", "csv", "parquet"],
         key="egresados"
-    )
+    ))
     st.markdown('</div>', unsafe_allow_html=True)
 
-# Se mantiene este DF para exportaciones (Excel/PDF)
-conteo_egresados_por_carrera = pd.DataFrame()
+validacion_eg = validar_carga(archivo_egresados, "egresados") if archivo_egresados else None
 
-if archivo_egresados:
-    # Detecta extensión y usa el lector apropiado
-    fname = getattr(archivo_egresados, "name", "").lower()
-    if fname.endswith(".xlsb"):
-        df_eg = leer_excel_xlsb(archivo_egresados)
-    else:
-        # .xlsx o .xls (requiere xlrd para .xls)
-        df_eg = leer_excel_auto(archivo_egresados, sheet_name=0)
+# Lector según la extensión (.xlsb / .xlsx / .xls / tablas), con vista previa si tarda
+df_eg = cargar_progresivo(archivo_egresados, "egresados", validacion_eg) \
+    if archivo_egresados and validacion_eg.ok else None
+
+if df_eg is not None:
+    G.entrada("df_eg", df_eg, huella=clave_archivo(archivo_egresados))
+    G.entrada("linaje_eg", linaje_de(archivo_egresados))
+    anexar_a_historico("egresados", archivo_egresados, df_eg)
+    aviso_cambios(G.valor("version_eg"))
 
     # --- Vista previa ---
     st.markdown('<div class="card">', unsafe_allow_html=True)
@@ -410,154 +1093,111 @@ if archivo_egresados:
     st.dataframe(df_eg.head(50), use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
-
-    # ---- Clasificador de nivel (se conserva por si lo usas en filtros)
-    def clasificar_nivel_eg(carrera):
-        carrera = str(carrera).lower()
-        if "maestría" in carrera:
-            return "Maestría"
-        elif "ingeniería" in carrera:
-            return "Ingeniería"
-        elif "técnico" in carrera or "tsu" in carrera:
-            return "TSU"
-        elif "movilidad" in carrera:
-            return "Movilidad Académica"
-        return "Otro"
-
-    df_eg["Nivel"] = df_eg.get("Carrera", "").apply(clasificar_nivel_eg)
-
     # ---------------- Filtros ---------------- #
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.subheader("🧰 Filtros")
-    cols_f = [c for c in ["Carrera", "Sexo", "Periodo", "Grupo", "Ciclo"] if c in df_eg.columns]
+    cols_f = [c for c in COLUMNAS_FILTRO if c in df_eg.columns]
+    perfil_eg, gens_por_nivel = G.valor("perfil_eg")
     filtros_eg = {}
     for col in cols_f:
-        vals = sorted([v for v in df_eg[col].dropna().unique().tolist()])
-        filtros_eg[col] = st.multiselect(f"Filtrar por {col}", vals, default=vals, key=f"eg_{col}")
+        filtros_eg[col] = filtro_desde_perfil(f"Filtrar por {col}", perfil_eg[col], key=f"eg_{col}")
+    with st.expander("Perfil de columnas"):
+        st.dataframe(tabla_perfil(perfil_eg), use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
-    df_eg_f = df_eg.copy()
-    for col, valores in filtros_eg.items():
-        if valores:
-            df_eg_f = df_eg_f[df_eg_f[col].isin(valores)]
+    G.entrada("filtros_eg", filtros_eg)
+    df_eg_filtrado = G.valor("df_eg_filtrado")
 
     # ---------------- Generaciones ---------------- #
+    # Opciones por nivel precalculadas en el perfil (no se re-filtra el DF por cada nivel)
     generaciones_filtradas = {}
-    if "Generación" in df_eg_f.columns and "Nivel" in df_eg_f.columns:
-        for nivel in sorted(df_eg_f["Nivel"].dropna().unique().tolist()):
-            gens = sorted(df_eg_f[df_eg_f["Nivel"] == nivel]["Generación"].dropna().unique().tolist())
+    if "Generación" in df_eg_filtrado.columns and "Nivel" in df_eg_filtrado.columns:
+        niveles_presentes = set(df_eg_filtrado["Nivel"].dropna().unique().tolist())
+        for nivel in sorted(n for n in gens_por_nivel if n in niveles_presentes):
+            gens = gens_por_nivel[nivel]
             generaciones_filtradas[nivel] = st.multiselect(
                 f"Selecciona generaciones para {nivel}",
                 gens, default=gens, key=f"gen_{nivel}"
             )
-        if generaciones_filtradas:
-            mask = pd.Series(False, index=df_eg_f.index)
-            for nivel, gens in generaciones_filtradas.items():
-                mask = mask | ((df_eg_f["Nivel"] == nivel) & (df_eg_f["Generación"].isin(gens)))
-            df_eg_f = df_eg_f[mask]
+    G.entrada("generaciones", generaciones_filtradas)
+    df_eg_f = G.valor("df_eg_f")   # incluye _prog (código de programa)
 
     # ---------------- Conteo por carrera (se mantiene) ---------------- #
-    if not df_eg_f.empty and "Carrera" in df_eg_f.columns:
-        conteo_egresados_por_carrera = df_eg_f["Carrera"].value_counts().reset_index()
-        conteo_egresados_por_carrera.columns = ["Carrera", "Total de Egresados"]
+    conteo_egresados_por_carrera = G.valor("conteo_eg_carrera")
+    if not conteo_egresados_por_carrera.empty:
         st.markdown('<div class="card">', unsafe_allow_html=True)
         st.subheader("📊 Total de egresados por carrera (filtrado)")
         st.dataframe(conteo_egresados_por_carrera, use_container_width=True)
         st.markdown('</div>', unsafe_allow_html=True)
 
-    # ---------------- Mapeo Carrera → Código de Programa ---------------- #
-    # TSUA, TSUM, TSUF, IAM, IDMA, IECSA, IMA, MIA
-    def map_program_code(carrera: str) -> str:
-        t = norm_txt(carrera)
-        # Posgrado
-        if "maestría en ingeniería aeroespacial" in t:
-            return "MIA"
-        # Ingeniería
-        if "ingeniería aeronáutica en manufactura" in t:
-            return "IAM"
-        if "ingeniería en diseño mecánico aeronáutico" in t:
-            return "IDMA"
-        if "electrónica y control de sistemas de aeronaves" in t:
-            return "IECSA"
-        if "ingeniería en mantenimiento aeronáutico" in t:
-            return "IMA"
-        # TSU (Técnico)
-        if ("técnico" in t or "tsu" in t) and "aviónica" in t:
-            return "TSUA"
-        if ("técnico" in t or "tsu" in t) and ("mantenimiento" in t or "planeador y motor" in t):
-            return "TSUM"
-        if ("técnico" in t or "tsu" in t) and ("manufactura" in t or "maquinados de precisión" in t or "manufactura de aeronaves" in t):
-            return "TSUF"
-        # Casos no mapeados (Esp. Valuación, Maestría en Ciencias, etc.)
-        return ""
-
-    if "Carrera" in df_eg_f.columns:
-        df_eg_f["_prog"] = df_eg_f["Carrera"].map(map_program_code)
-    else:
-        df_eg_f["_prog"] = ""
+    # ---------------- Detalle filtrado (con Nivel y programa) ---------------- #
+    descarga_detalle("Detalle filtrado de egresados", "detalle_egresados", df_eg_f, archivo_egresados,
+                     renombrar={"_prog": "Programa"})
 
-    codigos_obj = ["TSUA", "TSUM", "TSUF", "IAM", "IDMA", "IECSA", "IMA", "MIA"]
+    # ---------------- Eficiencia terminal por cohorte ---------------- #
+    df_cohortes = G.valor("cohortes")
 
-    # Conteo de egresados por código de programa (sólo códigos de interés)
-    conteo_prog = (
-        df_eg_f[df_eg_f["_prog"].isin(codigos_obj)]["_prog"]
-        .value_counts()
-        .reindex(codigos_obj)
-        .fillna(0)
-        .astype(int)
-        .to_dict()
-    )
-
-    # ---------------- Ingresos manuales por código y eficiencia ---------------- #
     st.markdown('<div class="card">', unsafe_allow_html=True)
-    st.subheader("🧮 Ingresos por programa y eficiencia terminal (egresados / ingresos)")
-
-    ingresos_manuales = {}
-    cols = st.columns(4)
-    for i, cod in enumerate(codigos_obj):
-        with cols[i % 4]:
-            ingresos_manuales[cod] = st.number_input(
-                f"Ingresos {cod}",
-                min_value=0,
-                value=int(st.session_state.get(f"ingresos_{cod}", 0)),
-                step=1,
-                key=f"ingresos_{cod}"
-            )
-
-    # Calcula eficiencia por programa
-    resultados_et = {}
-    for cod in codigos_obj:
-        egresados = int(conteo_prog.get(cod, 0))
-        ingresos = int(ingresos_manuales.get(cod, 0))
-        resultados_et[cod] = (egresados / ingresos) if ingresos > 0 else np.nan
-
-    # DataFrame para mostrar (incluye % bonito)
-    df_et_programas = pd.DataFrame({
-        "Programa": codigos_obj,
-        "Egresados": [int(conteo_prog.get(c, 0)) for c in codigos_obj],
-        "Ingresos":  [int(ingresos_manuales.get(c, 0)) for c in codigos_obj],
-        "Eficiencia": [resultados_et[c] for c in codigos_obj],
-    })
-    # Columna formateada en %
-    def _fmt_pct(x):
-        if pd.isna(x): return ""
-        return f"{x*100:.1f}%"
-    df_et_programas["Eficiencia (%)]"] = df_et_programas["Eficiencia"].map(_fmt_pct)
-
-    st.dataframe(df_et_programas, use_container_width=True)
+    if not df_cohortes.empty:
+        st.subheader("🧮 Eficiencia Terminal por cohorte (egresados / ingresos)")
+        df_cohortes_vista = df_cohortes.copy()
+        df_cohortes_vista["Eficiencia (%)"] = df_cohortes_vista["Eficiencia"].map(_fmt_pct)
+        st.dataframe(df_cohortes_vista, use_container_width=True)
+        sin_id = G.valor("historico_sin_id")
+        if sin_id:
+            st.warning("Periodos del histórico sin columna de matrícula (no cuentan en los ingresos): "
+                       + ", ".join(sin_id))
+    else:
+        # Sin Inscritos (o sin columna Generación) se capturan los ingresos a mano
+        st.subheader("🧮 Ingresos por programa y eficiencia terminal (egresados / ingresos)")
+        st.caption("Carga Inscritos con columna 'Generación' para calcular los ingresos por cohorte automáticamente.")
+
+        ingresos_manuales = {}
+        cols = st.columns(4)
+        for i, cod in enumerate(CODIGOS_PROGRAMA):
+            with cols[i % 4]:
+                ingresos_manuales[cod] = st.number_input(
+                    f"Ingresos {cod}",
+                    min_value=0,
+                    value=int(st.session_state.get(f"ingresos_{cod}", 0)),
+                    step=1,
+                    key=f"ingresos_{cod}"
+                )
+        G.entrada("ingresos_manuales", ingresos_manuales)
+
+    # DataFrame por programa para mostrar (incluye % bonito); alimenta las métricas
+    # automáticas del nodo "metricas_auto_egresados"
+    st.dataframe(G.valor("et_programas"), use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
-    # ---------------- MÉTRICAS AUTOMÁTICAS PARA INDICADORES ---------------- #
-    # Indicador: "Eficiencia Terminal por cohorte por Programa Educativo"
-    df_metricas_auto_eg = pd.DataFrame([
-        {
-            "Indicador": "Eficiencia Terminal por cohorte por Programa Educativo",
-            "Responsable": cod,
-            "Resultado": resultados_et[cod],   # proporción (0..1)
-        }
-        for cod in codigos_obj
-    ])
-    st.session_state["metricas_auto_egresados"] = df_metricas_auto_eg
+
+# ================= SECCIÓN: HISTÓRICO MULTIPERIODO ================= #
+periodos_hist = ALMACEN.periodos("inscritos")
+if periodos_hist:
+    section_header("Histórico multiperiodo", "Conteos y retención entre cuatrimestres guardados", "🗂️")
+    st.markdown('<div class="card">', unsafe_allow_html=True)
+    sel_periodos = st.multiselect("Periodos a comparar", periodos_hist, default=periodos_hist[-3:], key="hist_periodos")
+    if sel_periodos:
+        cols_hist = ALMACEN.columnas("inscritos", sel_periodos)
+        col_conteo = "Carrera" if "Carrera" in cols_hist else (cols_hist[0] if cols_hist else None)
+        if col_conteo:
+            st.subheader(f"📊 Inscritos por {col_conteo} y periodo")
+            st.dataframe(ALMACEN.conteos_por_periodo("inscritos", col_conteo, sel_periodos), use_container_width=True)
+
+        col_id_hist = columna_id(pd.DataFrame(columns=cols_hist))
+        if col_id_hist and len(sel_periodos) >= 2:
+            ca, cb = st.columns(2)
+            with ca:
+                p_a = st.selectbox("Periodo base", sel_periodos, index=0, key="hist_p_a")
+            with cb:
+                p_b = st.selectbox("Periodo de seguimiento", sel_periodos, index=len(sel_periodos) - 1, key="hist_p_b")
+            if p_a != p_b:
+                st.subheader(f"🔁 Retención {p_a} → {p_b} (por {col_id_hist})")
+                st.dataframe(
+                    ALMACEN.retencion(p_a, p_b, col_id_hist, por="Carrera" if "Carrera" in cols_hist else None),
+                    use_container_width=True,
+                )
+    st.markdown('</div>', unsafe_allow_html=True)
 
 
 # ================= SECCIÓN: INDICADORES ================= #
@@ -568,22 +1208,55 @@ section_header("Comparativo de Indicadores vs Metas",
 # --- Cargador ---
 with st.container():
     st.markdown('<div class="card">', unsafe_allow_html=True)
-    archivo_indicadores = st.file_uploader(
-        "Sube tu archivo de indicadores (.xlsx)",
-        type="xlsx",
+    archivo_indicadores = elegir_archivo("indicadores", lambda: st.file_uploader(
+        "Sube tu archivo de indicadores (.xlsx, o .csv / .parquet con las columnas de Hoja2)",
+        type=["xlsx", "csv", "parquet"],
         key="indicadores"
-    )
+    ))
     st.markdown('</div>', unsafe_allow_html=True)
 
-comp_out = pd.DataFrame()
-captura_manual_df = pd.DataFrame()
+validacion_ind = validar_carga(archivo_indicadores, "indicadores") if archivo_indicadores else None
 
-if archivo_indicadores:
+if archivo_indicadores and "captura" in validacion_ind.hojas:
     # ---------- Hoja 0: base para captura manual (con paginación y búsqueda)
-    df_manual = leer_excel_xlsx(archivo_indicadores, sheet_name=0)
+    df_manual = en_sesion("df_manual", clave_archivo(archivo_indicadores),
+                          lambda: leer_hoja_indicadores(archivo_indicadores, validacion_ind, "captura"))
+    G.entrada("df_manual", df_manual, huella=clave_archivo(archivo_indicadores))
 
     if "captura_manual" not in st.session_state:
         st.session_state["captura_manual"] = {}
+    GOBERNADOR.guardar(SESION, "captura_manual", st.session_state["captura_manual"], politica="fijo")
+
+    # ---------- Importación masiva: Variable 1 / Variable 2 desde la hoja del responsable
+    # Antes del formulario para que sus campos se dibujen ya con los valores importados.
+    with st.expander("📥 Importar captura desde hoja de cálculo"):
+        st.caption("Columnas: Indicador, Variable 1, Variable 2 y opcionalmente Responsable, "
+                   "Comentarios y Porcentaje (sí/no). Los nombres se enlazan con la hoja de captura.")
+        archivo_captura = st.file_uploader("Hoja con las variables (.xlsx / .csv / .parquet)",
+                                           type=["xlsx", "csv", "parquet"], key="captura_masiva")
+        validacion_cap = validar_carga(archivo_captura, "captura_masiva") if archivo_captura else None
+        if archivo_captura and validacion_cap.ok:
+            pct_default = st.checkbox("Sin columna Porcentaje: escribir variables como porcentaje (50 → 0.5)",
+                                      value=False, key="captura_masiva::pct")
+            importada = en_sesion("captura_importada", clave_archivo(archivo_captura), lambda: leer_excel_auto(
+                archivo_captura, sheet_name=validacion_cap.hojas["datos"]).rename(columns=validacion_cap.mapeo["datos"]))
+            importacion = importar_captura(importada, df_manual, pct_default)
+            enlazadas = importacion["Coincidencia"].isin(["exacta", "aproximada"])
+            st.caption(f"{int(enlazadas.sum())} de {len(importacion)} filas enlazadas a un indicador; "
+                       f"las demás no se importan.")
+            st.dataframe(importacion.drop(columns="_key"), use_container_width=True)
+            if st.button(f"Importar {int(enlazadas.sum())} indicadores", disabled=not enlazadas.any(),
+                         key="captura_masiva::aplicar"):
+                valores, quitar = cambios_captura(importacion)
+                captura_manual = st.session_state["captura_manual"]
+                captura_manual.update(valores)
+                for k in quitar:
+                    captura_manual.pop(k, None)
+                # Los campos del formulario ya dibujados conservan su valor: se descartan
+                for kb in importacion.loc[enlazadas, "_key"]:
+                    for suf in ("::v1_ui", "::v2_ui", "::com_ui", "::pct_ui", "::res_ui"):
+                        st.session_state.pop(kb + suf, None)
+                st.success(f"Importados {int(enlazadas.sum())} indicadores.")
 
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.subheader("📝 Captura manual por indicador")
@@ -595,14 +1268,8 @@ if archivo_indicadores:
             "Indicadores por página", min_value=5, max_value=50, value=20, step=5
         )
 
-    if filtro_texto:
-        mask = (
-            df_manual.get("Indicador", "").astype(str).str.contains(filtro_texto, case=False, na=False)
-            | df_manual.get("Responsable", "").astype(str).str.contains(filtro_texto, case=False, na=False)
-        )
-        df_manual_filtrado = df_manual[mask].reset_index(drop=True)
-    else:
-        df_manual_filtrado = df_manual.reset_index(drop=True)
+    G.entrada("filtro_texto", filtro_texto)
+    df_manual_filtrado = G.valor("df_manual_filtrado")
 
     import math
     n_total = len(df_manual_filtrado)
@@ -616,20 +1283,6 @@ if archivo_indicadores:
 
     # ---------- Form de captura con cálculo y toggle de porcentaje por indicador
     with st.form("frm_captura_manual"):
-        def _parse_val(txt: str, use_pct: bool):
-            """
-            Convierte a número. Si use_pct=True:
-              - '50' o '50%' -> 0.5
-              - valores 0..1 se dejan como están
-            """
-            v = to_num(txt)
-            if pd.isna(v):
-                return np.nan
-            s = str(txt).strip()
-            if use_pct and (s.endswith("%") or float(v) > 1):
-                return float(v) / 100.0
-            return float(v)
-
         registros = []
         pct_flags = {}
 
@@ -719,523 +1372,163 @@ if archivo_indicadores:
                 st.session_state["captura_manual"].pop(kb+suf, None)
         st.info("Campos limpiados en esta página.")
 
-    # ---------- Construcción del DataFrame completo con resultado calculado (usando el toggle por indicador)
-    rows = []
-    for _, row in df_manual_filtrado.iterrows():
-        nom_ind = row.get("Indicador", "")
-        resp = row.get("Responsable", "")
-        key_base = f"ind::{norm_txt(nom_ind)}::{norm_txt(resp)}"
-
-        v1_txt = st.session_state["captura_manual"].get(key_base+"::v1", "")
-        v2_txt = st.session_state["captura_manual"].get(key_base+"::v2", "")
-        com     = st.session_state["captura_manual"].get(key_base+"::com", "")
-        pct_ind = bool(st.session_state["captura_manual"].get(key_base+"::pct", False))
-
-        def _parse_val2(txt: str, use_pct: bool):
-            v = to_num(txt)
-            if pd.isna(v): return np.nan
-            s = str(txt).strip()
-            if use_pct and (s.endswith("%") or float(v) > 1):
-                return float(v) / 100.0
-            return float(v)
-
-        v1_num = _parse_val2(v1_txt, pct_ind)
-        v2_num = _parse_val2(v2_txt, pct_ind)
-        if pd.notna(v1_num) and float(v1_num) != 0 and pd.notna(v2_num):
-            res_calc = float(v2_num) / float(v1_num)
-        else:
-            prev_res = st.session_state["captura_manual"].get(key_base+"::res", "")
-            res_calc = to_num(prev_res)
-
-        rows.append({
-            "Indicador": nom_ind,
-            "Responsable": resp,
-            "Variable 1": v1_txt,
-            "Variable 2": v2_txt,
-            "Resultado": res_calc,
-            "Comentarios": com,
-        })
-    captura_manual_df = pd.DataFrame(rows)
-
-    # ---------- Hoja2: metas
-    try:
-        df_metas = leer_excel_xlsx(archivo_indicadores, sheet_name="Hoja2")
-    except Exception:
-        df_metas = leer_excel_xlsx(archivo_indicadores, sheet_name=1)
-
-    requeridas = ["Indicador", "proceso", "Periodicidad", "Responsable", "Ene-Abr", "May-Ago", "Sep-Dic"]
-    faltantes = [c for c in requeridas if c not in df_metas.columns]
-    if faltantes:
-        st.error(f"En 'Hoja2' faltan columnas requeridas: {faltantes}")
-    else:
-        # detectar si el indicador es de porcentaje por presencia de "%" en metas
-        metas = df_metas.copy()
-        metas["_es_pct"] = metas.apply(is_percent_row, axis=1)
-
-        # convertir metas a número
-        for col in ["Ene-Abr", "May-Ago", "Sep-Dic"]:
-            metas[col] = metas[col].map(to_num)
-
-        # elegir meta efectiva según cuatrimestre elegido
-        periodo_col = st.session_state.get("periodo_col", periodo_map.get(st.session_state.get("cuatrimestre", "C2"), "May-Ago"))
-        metas["MetaEfectiva"] = metas.apply(lambda r: elegir_meta_efectiva(r, periodo_col), axis=1)
-
-        # ---------- Resultados: captura manual + automáticos de Inscritos + automáticos de Egresados
-        df_metricas_auto_ins = st.session_state.get(
-            "metricas_auto_inscritos",
-            pd.DataFrame(columns=["Indicador", "Responsable", "Resultado"]),
-        )
-        df_metricas_auto_eg = st.session_state.get(
-            "metricas_auto_egresados",
-            pd.DataFrame(columns=["Indicador", "Responsable", "Resultado"]),
-        )
-
-        resultados_all = pd.concat(
-            [
-                captura_manual_df[["Indicador", "Responsable", "Resultado"]],
-                df_metricas_auto_ins[["Indicador", "Responsable", "Resultado"]],
-                df_metricas_auto_eg[["Indicador", "Responsable", "Resultado"]],
-            ],
-            ignore_index=True
-        )
+    # ---------- DataFrame completo con resultado calculado (nodo "captura_manual_df")
+    # La huella de la captura es su contenido: sólo se reconstruye si cambió algún valor.
+    captura = st.session_state["captura_manual"]
+    G.entrada("captura", captura, huella=repr(sorted(captura.items())))
 
-        # claves normalizadas para hacer join
-        resultados_all["_ind"] = resultados_all["Indicador"].map(norm_txt)
-        resultados_all["_resp"] = resultados_all["Responsable"].map(norm_txt)
-        resultados_all["_resultado_num"] = resultados_all["Resultado"].map(to_num)
-
-        metas["_ind"]  = metas["Indicador"].map(norm_txt)
-        metas["_resp"] = metas["Responsable"].map(norm_txt)
-
-        # LEFT JOIN desde metas
-        comp = metas.merge(
-            resultados_all[["_ind", "_resp", "_resultado_num"]],
-            on=["_ind", "_resp"],
-            how="left",
-        )
-        comp["Estatus"] = [comparador(r, m) for r, m in zip(comp["_resultado_num"], comp["MetaEfectiva"])]
-
-        # ---------- Salida formateada
-        out = comp[[
-            "Indicador", "proceso", "Periodicidad", "Responsable",
-            "Ene-Abr", "May-Ago", "Sep-Dic", "MetaEfectiva", "_resultado_num", "_es_pct", "Estatus",
-        ]].rename(columns={
-            "proceso": "Proceso",
-            "MetaEfectiva": "Meta efectiva",
-            "_resultado_num": "Resultado",
-        })
+    # ---------- Hoja2: metas (hoja y columnas ya validadas; los errores se muestran arriba)
+    if not validacion_ind.errores("metas"):
+        df_metas = leer_hoja_indicadores(archivo_indicadores, validacion_ind, "metas")
 
-        # Formateos: si es porcentaje, se muestra como % (0.8 -> 80.0%)
-        out["Meta Ene-Abr"] = [fmt_val(v, p) for v, p in zip(out["Ene-Abr"], out["_es_pct"])]
-        out["Meta May-Ago"] = [fmt_val(v, p) for v, p in zip(out["May-Ago"], out["_es_pct"])]
-        out["Meta Sep-Dic"] = [fmt_val(v, p) for v, p in zip(out["Sep-Dic"], out["_es_pct"])]
-        out["Meta efectiva"] = [fmt_val(v, p) for v, p in zip(out["Meta efectiva"], out["_es_pct"])]
-        out["Resultado"]     = [fmt_val(v, p) for v, p in zip(out["Resultado"],     out["_es_pct"])]
-
-        comp_out = out[[
-            "Indicador", "Proceso", "Periodicidad", "Responsable",
-            "Meta Ene-Abr", "Meta May-Ago", "Meta Sep-Dic", "Meta efectiva", "Resultado", "Estatus",
-        ]]
-
-        # === Semáforo (emojis) ===
-        SEMAFORO = {
-            "verde": "🟢 Verde",
-            "rojo": "🔴 Rojo",
-            "pendiente": "🟡 Pendiente",
-            "sin dato": "⚪ Sin dato",
-        }
-        if not comp_out.empty:
-            comp_out.insert(
-                comp_out.columns.get_loc("Estatus") + 1,
-                "Semáforo",
-                comp_out["Estatus"].map(SEMAFORO).fillna("⚪ Sin dato")
-            )
+        # metas numéricas, meta efectiva, LEFT JOIN con captura manual + automáticos de
+        # Inscritos/Egresados, estatus y salida formateada (nodos "metas" … "comp_out")
+        G.entrada("df_metas", df_metas, huella=(clave_archivo(archivo_indicadores), "Hoja2"))
+        comp_out = G.valor("comp_out")
 
         st.markdown('<div class="card">', unsafe_allow_html=True)
         st.subheader("Metas (Hoja2) completas y comparación")
         st.dataframe(comp_out, use_container_width=True)
-        st.markdown('</div>', unsafe_allow_html=True)
-
-
-# ================= PDF / EXCEL ================= #
-import os  # ← necesario para verificar el logo
-
-def _table_col_widths(df, max_total_width):
-    if df is None or df.empty:
-        return []
-    font_name, font_size = "Helvetica", 7
-    cols = df.columns.tolist()
-    widths = []
-    for col in cols:
-        header_w = pdfmetrics.stringWidth(str(col), font_name, font_size + 1)
-        sample_rows = df[col].astype(str).head(30).tolist()
-        body_w = max([pdfmetrics.stringWidth(s, font_name, font_size) for s in ([""] + sample_rows)])
-        widths.append(max(header_w, body_w) + 12)
-    total = sum(widths)
-    if total <= 0:
-        return [max_total_width / max(1, len(cols))] * len(cols)
-    ratio = min(1.0, max_total_width / total)
-    widths = [w * ratio for w in widths]
-    diff = max_total_width - sum(widths)
-    if widths:
-        widths[-1] += diff
-    return widths
-
-
-def generar_reporte_pdf(
-    df_indicadores,
-    df_inscritos,
-    df_egresados,
-    cuatri_texto,
-    periodo_col,
-    anio,
-    logo_path="unaq_logo.png",
-):
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=landscape(letter),
-        leftMargin=24, rightMargin=24, topMargin=36, bottomMargin=36,
-    )
-    elementos = []
-    estilos = getSampleStyleSheet()
-
-    estilo_normal = estilos['Normal']
-    estilo_titulo = estilos['Title']
-    estilo_sub = estilos['Heading2']
-    estilo_celda = ParagraphStyle(name='TablaNormal', fontSize=7, leading=8)
-    estilo_header = ParagraphStyle(name='TablaHeader', fontSize=7, leading=8, textColor=colors.white, fontName='Helvetica-Bold')
-
-    azul_rey = HexColor("#003366")
-    gris_zebra = HexColor("#f2f2f2")
-
-    # ==== ENCABEZADO ====
-    from reportlab.platypus import Image, Table
-
-    titulo = "Matriz de Seguimiento a Metas e Indicadores 2025"
-    fecha = datetime.date.today().strftime("%d/%m/%Y")
-
-    if os.path.exists(logo_path):
-        logo = Image(logo_path, width=90, height=45)
-        header_tab = Table(
-            [[logo, Paragraph(f"<b>{titulo}</b>", estilo_titulo)]],
-            colWidths=[100, 500]
-        )
-        elementos.append(header_tab)
-    else:
-        elementos.append(Paragraph(titulo, estilo_titulo))
-
-    # periodo expandido
-    mapa_periodos = {"Ene-Abr": "Enero – Abril", "May-Ago": "Mayo – Agosto", "Sep-Dic": "Septiembre – Diciembre"}
-    periodo_ext = mapa_periodos.get(periodo_col, periodo_col) + f" {anio}"
-
-    elementos.append(Paragraph(f"Periodo: {cuatri_texto} = {periodo_ext} — Generado el {fecha}", estilo_normal))
-    elementos.append(Spacer(1, 12))
-
-    # ==== TABLAS ====
-    def agregar_tabla(titulo, df):
-        if df is None or df.empty:
-            return
-        elementos.append(Paragraph(titulo, estilo_sub))
-
-        data = [[Paragraph(str(col), estilo_header) for col in df.columns]]
-        for _, row in df.iterrows():
-            fila = [Paragraph(str(cell), estilo_celda) for cell in row]
-            data.append(fila)
-
-        ancho_util = landscape(letter)[0] - (doc.leftMargin + doc.rightMargin)
-        col_widths = _table_col_widths(df, ancho_util)
-
-        tabla = Table(data, repeatRows=1, colWidths=col_widths)
-        estilo_tabla = [
-            ('BACKGROUND', (0, 0), (-1, 0), azul_rey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('GRID', (0, 0), (-1, -1), 0.25, colors.black),
-            ('BOX', (0, 0), (-1, -1), 0.25, colors.black),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
-        ]
-        for i in range(1, len(data)):
-            if i % 2 == 0:
-                estilo_tabla.append(('BACKGROUND', (0, i), (-1, i), gris_zebra))
-        tabla.setStyle(TableStyle(estilo_tabla))
-
-        elementos.append(tabla)
-        elementos.append(Spacer(1, 12))
-
-    agregar_tabla("Indicadores (Comparativo)", df_indicadores)
-    agregar_tabla("Inscritos (conteo por carrera)", df_inscritos)
-    agregar_tabla("Egresados (conteo por carrera)", df_egresados)
-
-    # ==== PIE CON ALCANCE Y CRITERIOS ====
-    elementos.append(Spacer(1, 20))
-    elementos.append(Paragraph(
-        "Alcance de la certificación ISO 9001:2015 Servicio Educativo de Técnico Superior Universitario, Ingeniería y Educación Continua.",
-        estilo_normal
-    ))
-    elementos.append(Paragraph(
-        "Para los valores meta que no se cumplan, el responsable del indicador toma acciones de acuerdo al procedimiento <b>P030-SIG-Servicio No Conforme, Acciones Correctivas y Mejora</b>.",
-        estilo_normal
-    ))
-    elementos.append(Paragraph(
-        "Los criterios para determinar una muestra representativa son los determinados por la Dirección General de Universidades Tecnológicas y Politécnicas (DGUTyP) en su Modelo de Evaluación de la Calidad del Subsistema de Universidades Tecnológicas y Politécnicas (MECASUTyP).",
-        estilo_normal
-    ))
-
-    def _footer(canvas, doc):
-        canvas.saveState()
-        canvas.setFont("Helvetica", 8)
-        text = f"{periodo_ext} — Página {doc.page}"
-        canvas.drawRightString(landscape(letter)[0] - doc.rightMargin, 18, text)
-        canvas.restoreState()
-
-    doc.build(elementos, onFirstPage=_footer, onLaterPages=_footer)
-    buffer.seek(0)
-    return buffer.read()
-
 
-def exportar_excel_corporativo(
-    comp_out: pd.DataFrame,
-    conteo_inscritos_por_carrera: pd.DataFrame,
-    conteo_egresados_por_carrera: pd.DataFrame,
-    cuatrimestre_actual: str,
-    periodo_ext: str,                         # p.ej. "Mayo – Agosto 2025"
-    logo_path: str = "unaq_logo.png",
-):
-    """
-    Exporta un XLSX 'corporativo':
-      - Encabezado con logo + título "METAS — Cx AAAA"
-      - Línea de metadatos (Periodo y fecha de generación)
-      - Sección: Indicadores (Comparativo) con bandas por Proceso
-      - Bloques 'Alcance' + texto y 'Leyenda'
-      - Hojas extra: Inscritos y Egresados (tablas simples)
-    """
-    from datetime import date
-    buf = BytesIO()
-    with pd.ExcelWriter(buf, engine="xlsxwriter") as writer:
-        wb = writer.book
-
-        # ======== FORMATS ======== #
-        f_title = wb.add_format({
-            'bold': True, 'font_size': 16, 'align': 'center', 'valign': 'vcenter',
-            'font_color': 'white', 'bg_color': "#58AAF7"
-        })
-        f_band_top = wb.add_format({'bold': True, 'font_size': 11, 'align': 'center',
-                                    'valign': 'vcenter', 'font_color': 'white',
-                                    'bg_color': "#2E75B6"})  # navy
-        f_band_blue = wb.add_format({'bold': True, 'font_color': 'white',
-                                     'bg_color': '#2E75B6', 'border': 1})
-        f_band_gray = wb.add_format({'bold': True, 'font_color': 'white',
-                                     'bg_color': '#5F7383', 'border': 1})
-
-        f_meta = wb.add_format({'font_size': 10, 'italic': True, 'align': 'left'})
-        f_section = wb.add_format({'bold': True, 'font_size': 12})
-
-        f_hdr = wb.add_format({
-            'bold': True, 'align': 'center', 'valign': 'vcenter',
-            'font_color': 'white', 'bg_color': '#0B2E59', 'border': 1
-        })
-        f_cell = wb.add_format({'align': 'left',  'valign': 'top', 'border': 1})
-        f_num  = wb.add_format({'align': 'right', 'valign': 'vcenter', 'border': 1})
-
-        f_est_verde = wb.add_format({'align': 'center', 'border': 1, 'bg_color': '#C6E0B4'})
-        f_est_rojo  = wb.add_format({'align': 'center', 'border': 1, 'bg_color': '#F8CBAD'})
-        f_est_pend  = wb.add_format({'align': 'center', 'border': 1, 'bg_color': '#FFE699'})
-        f_est_sin   = wb.add_format({'align': 'center', 'border': 1, 'bg_color': '#D9D9D9'})
-
-        f_scope_title = wb.add_format({'bold': True, 'align': 'center', 'valign': 'vcenter',
-                                       'font_color': 'white', 'bg_color': '#4F9ED1'})
-        f_scope_dark  = wb.add_format({'bold': True, 'align': 'center', 'valign': 'vcenter',
-                                       'font_color': 'white', 'bg_color': '#1F2E55'})
-        f_text = wb.add_format({'text_wrap': True, 'valign': 'top'})
-
-        f_leg = wb.add_format({'align': 'left'})
-
-        # ======== HOJA COMPARATIVO ======== #
-        ws = wb.add_worksheet("Comparativo")
-
-        # Dimensiones de columnas (ajústalas si quieres)
-        widths = {
-            "Indicador": 48, "Responsable": 12, "Periodicidad": 12,
-            "Meta Ene-Abr": 12, "Meta May-Ago": 12, "Meta Sep-Dic": 12,
-            "Meta efectiva": 14, "Resultado": 12, "Estatus": 12,
-        }
-
-        # Definimos las columnas a exportar (sin "Semáforo")
-        base_cols = [
-            "Indicador", "Responsable", "Periodicidad",
-            "Meta Ene-Abr", "Meta May-Ago", "Meta Sep-Dic",
-            "Meta efectiva", "Resultado", "Estatus"
-        ]
-        cols = [c for c in base_cols if c in comp_out.columns]
-        ncols = len(cols)
-        last_col = ncols - 1
-
-        # --- Encabezado con logo + Título
-        # Filas para el encabezado:
-        # 0-1 -> título; 2 -> banda navy separadora; 3 -> meta/periodo
-        ws.set_row(0, 32)
-        ws.set_row(1, 24)
-        ws.set_row(2, 18)
-        ws.set_row(3, 18)
-
-        # título “METAS — Cx AAAA”
-        ws.merge_range(0, 0, 1, last_col, f"METAS — {cuatrimestre_actual}", f_title)
-
-        # logo (opcional)
-        if os.path.exists(logo_path):
-            # esquina izquierda sobre las filas 0..2
-            ws.insert_image(0, 0, logo_path, {
-                'x_scale': 0.25, 'y_scale': 0.25, 'x_offset': 6, 'y_offset': 4
-            })
-
-        # banda separadora navy
-        ws.merge_range(2, 0, 2, last_col, "", f_band_top)
-
-        # metadatos de periodo
-        fecha_hoy = date.today().strftime("%d/%m/%Y")
-        ws.write(3, 0, f"Periodo: {cuatrimestre_actual} = {periodo_ext} — Generado el {fecha_hoy}", f_meta)
-        if last_col > 0:
-            ws.merge_range(3, 0, 3, last_col, f"Periodo: {cuatrimestre_actual} = {periodo_ext} — Generado el {fecha_hoy}", f_meta)
-
-        # Sección
-        ws.write(5, 0, "Indicadores (Comparativo)", f_section)
-        if last_col > 0:
-            ws.merge_range(5, 0, 5, last_col, "Indicadores (Comparativo)", f_section)
-
-        # cabecera de tabla
-        start_row = 7
-        for j, c in enumerate(cols):
-            ws.write(start_row, j, c, f_hdr)
-            ws.set_column(j, j, widths.get(c, 14))
-
-        # filas por proceso en bandas
-        row = start_row + 1
-        df_cmp = comp_out.copy()
-        band_blue = True
-
-        if "Proceso" in df_cmp.columns:
-            for proceso, df_g in df_cmp.groupby("Proceso"):
-                ws.merge_range(row, 0, row, last_col, f"Proceso: {proceso}",
-                               f_band_blue if band_blue else f_band_gray)
-                band_blue = not band_blue
-                row += 1
-                for _, r in df_g.iterrows():
-                    for j, c in enumerate(cols):
-                        val = r.get(c, "")
-                        if c in ("Meta Ene-Abr", "Meta May-Ago", "Meta Sep-Dic", "Meta efectiva", "Resultado"):
-                            ws.write(row, j, val, f_num)
-                        elif c == "Estatus":
-                            fmt = {
-                                "verde": f_est_verde, "rojo": f_est_rojo,
-                                "pendiente": f_est_pend, "sin dato": f_est_sin
-                            }.get(str(r.get("Estatus", "")).strip(), f_cell)
-                            ws.write(row, j, str(val), fmt)
-                        else:
-                            ws.write(row, j, val, f_cell)
-                    row += 1
-        else:
-            for _, r in df_cmp.iterrows():
-                for j, c in enumerate(cols):
-                    ws.write(row, j, r.get(c, ""), f_cell)
-                row += 1
-
-        # ======== BLOQUES “ALCANCE” ======== #
-        row += 2
-        ws.merge_range(row, 0, row, last_col, "Alcance", f_scope_title); row += 1
-        ws.merge_range(
-            row, 0, row, last_col,
-            "Alcance de la certificación ISO 9001:2015 Servicio Educativo de Técnico Superior Universitario, "
-            "Ingeniería y Educación Continua.",
-            f_text
-        ); row += 1
-        ws.merge_range(row, 0, row, last_col,
-                       "Para los valores meta que no se cumplan, el responsable del indicador toma acciones de "
-                       "acuerdo al procedimiento P030-SIG-Servicio No Conforme, Acciones Correctivas y Mejora.",
-                       f_scope_dark); row += 1
-        ws.merge_range(
-            row, 0, row, last_col,
-            "Los criterios para determinar una muestra representativa son los determinados por la Dirección General de "
-            "Universidades Tecnológicas y Politécnicas (DGUTyP) en su Modelo de Evaluación de la Calidad del Subsistema "
-            "de Universidades Tecnológicas y Politécnicas (MECASUTyP).",
-            f_text
-        ); row += 2
-
-        # ======== LEYENDA ======== #
-        # Usamos emojis para aproximar los bullets de colores
-        legend = [
-            "🟢 Cumple la meta planteada.",
-            "🟡 Margen ± 1% la meta planteada.",
-            "⚪ N/A No se aplica evaluación en el periodo.",
-            "🔴 No cumple la meta.",
-            "🔵 No cumple los criterios para determinar una muestra representativa."
-        ]
-        for item in legend:
-            ws.write(row, 0, item, f_leg)
-            if last_col > 0:
-                ws.merge_range(row, 0, row, last_col, item, f_leg)
-            row += 1
-
-        # ======== Hojas “Inscritos” y “Egresados” simples ======== #
-        if not conteo_inscritos_por_carrera.empty:
-            conteo_inscritos_por_carrera.to_excel(writer, sheet_name="Inscritos", index=False)
-
-        if not conteo_egresados_por_carrera.empty:
-            conteo_egresados_por_carrera.to_excel(writer, sheet_name="Egresados", index=False)
-
-    buf.seek(0)
-    return buf
+        emparejamiento = G.valor("emparejamiento")
+        revisar = emparejamiento[emparejamiento["Coincidencia"].isin(["aproximada", "ambigua"])]
+        if not revisar.empty:
+            n_auto = int(revisar["Coincidencia"].eq("aproximada").sum())
+            with st.expander(f"🔗 Nombres de indicador no exactos: {n_auto} enlazados, "
+                             f"{len(revisar) - n_auto} por revisar"):
+                st.caption("Enlazados automáticamente: mismo Responsable y nombre casi idéntico. "
+                           "Los ambiguos no se enlazan: corrige el nombre en la hoja de captura o en Hoja2.")
+                st.dataframe(
+                    revisar[["Indicador capturado", "Indicador en metas", "Puntaje", "Coincidencia", "Alternativas"]],
+                    use_container_width=True, hide_index=True,
+                )
 
+        if not comp_out.empty:
+            with st.expander("🔮 ¿Qué pasa si…? Simulación de metas y resultados"):
+                st.caption("Cada fila ajusta metas o resultados (Factor 0.95 = −5%; Delta en unidades del "
+                           "indicador, puntos si es %). Filtros vacíos = todos los indicadores; varias filas "
+                           "con el mismo Escenario se combinan. No modifica Hoja2.")
+                escenarios = st.data_editor(
+                    barrido([-0.05, -0.10]), num_rows="dynamic", hide_index=True,
+                    use_container_width=True, key="escenarios_editor",
+                    column_config={"Ajusta": st.column_config.SelectboxColumn(options=list(AJUSTES), default="meta")},
+                )
+                G.entrada("escenarios", escenarios, huella=huella_objetos(escenarios))
+                try:
+                    simulacion = G.valor("simulacion")
+                except EscenarioInvalido as e:
+                    st.error(str(e))
+                else:
+                    st.dataframe(resumen(simulacion).rename(columns=SEMAFORO),
+                                 use_container_width=True, hide_index=True)
+                    nombres = list(pd.unique(simulacion["Escenario"]))
+                    elegido = st.selectbox("Detalle por Proceso y Responsable", nombres,
+                                           index=min(1, len(nombres) - 1), key="escenario_detalle")
+                    detalle = simulacion[simulacion["Escenario"].eq(elegido)].drop(columns="Escenario")
+                    st.dataframe(detalle.loc[:, (detalle != 0).any()].rename(columns=SEMAFORO),
+                                 use_container_width=True, hide_index=True)
+        st.markdown('</div>', unsafe_allow_html=True)
 
 
 # ===== DESCARGAS ===== #
 colL, colR = st.columns([3, 2])
 
 with colL:
-    if 'comp_out' in locals() and not comp_out.empty:
-        # Excel corporativo
-        # Construye el periodo extendido para mostrar (igual al PDF)
-        mapa_periodos = {"Ene-Abr": "Enero – Abril", "May-Ago": "Mayo – Agosto", "Sep-Dic": "Septiembre – Diciembre"}
-        periodo_ext = f"{mapa_periodos.get(periodo_col, periodo_col)} {anio}"
-
-        excel_buffer = exportar_excel_corporativo(
-            comp_out,
-            conteo_inscritos_por_carrera if 'conteo_inscritos_por_carrera' in locals() else pd.DataFrame(),
-            conteo_egresados_por_carrera if 'conteo_egresados_por_carrera' in locals() else pd.DataFrame(),
-            cuatrimestre_actual,
-            periodo_ext,
-            logo_path="unaq_logo.png",      # opcional
-        )
-
-
+    if G.disponible("comp_out") and not G.valor("comp_out").empty:
+        # Excel corporativo (conteos de Inscritos/Egresados si están cargados)
         st.download_button(
             "📊 Descargar Excel",
-            data=excel_buffer,
+            data=G.valor("excel_bytes"),
             file_name=f"Metas_{cuatrimestre_actual.replace(' ', '_')}.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         )
 
 with colR:
-    if 'comp_out' in locals() and not comp_out.empty \
-       and 'conteo_inscritos_por_carrera' in locals() and not conteo_inscritos_por_carrera.empty \
-       and 'conteo_egresados_por_carrera' in locals() and not conteo_egresados_por_carrera.empty:
+    if G.disponible("comp_out") and not G.valor("comp_out").empty \
+       and not G.valor_o("conteo_ins_carrera", pd.DataFrame()).empty \
+       and not G.valor_o("conteo_eg_carrera", pd.DataFrame()).empty:
 
         st.subheader("🖨️ Reporte PDF")
-        pdf_bytes = generar_reporte_pdf(
-            comp_out,
-            conteo_inscritos_por_carrera,
-            conteo_egresados_por_carrera,
-            cuatrimestre_actual,
-            periodo_col,  # ← ahora se pasa el periodo
-            anio,         # ← y el año para “Mayo – Agosto 2025”
-            logo_path="unaq_logo.png"
-        )
         st.download_button(
             "📥 Descargar PDF (estilo corporativo)",
-            data=pdf_bytes,
+            data=G.valor("pdf_bytes"),
             file_name=f"Reporte_{cuatrimestre_actual.replace(' ', '_')}.pdf",
             mime="application/pdf",
         )
     else:
         st.info("Carga Indicadores, Inscritos y Egresados y genera el comparativo para habilitar las descargas.")
+
+# Un PDF + XLSX por responsable en un solo ZIP (sólo se genera si se pide)
+if G.disponible("comp_out") and not G.valor("comp_out").empty and "Responsable" in G.valor("comp_out").columns:
+    with st.expander("🗂️ Reportes por responsable (ZIP)"):
+        z1, z2 = st.columns(2)
+        sin_proceso = "Proceso" not in G.valor("comp_out").columns
+        G.entrada("por_proceso", z1.checkbox("Separar también por Proceso", value=False, disabled=sin_proceso,
+                                             help="El comparativo no tiene columna Proceso" if sin_proceso else None))
+        if z2.toggle("Generar reportes", value=False, key="generar_zip_responsables"):
+            with st.spinner("Generando reportes por responsable…"):
+                datos_zip = G.valor("zip_responsables")
+            st.download_button(
+                "📦 Descargar ZIP",
+                data=datos_zip,
+                file_name=f"Reportes_responsables_{cuatrimestre_actual.replace(' ', '_')}.zip",
+                mime="application/zip",
+            )
+
+
+# ===== GUARDAR SESIÓN ===== #
+# Filtros, generaciones, ingresos, captura manual, periodo (PREFIJOS_SESION/CLAVES_SESION)
+# y los archivos ya parseados
+def archivos_de_sesion():
+    archivos = {}
+    for dataset, archivo, validacion, hojas in (
+        ("inscritos", archivo_inscritos, validacion_ins, {"datos": G.valor_o("df_ins")}),
+        ("egresados", archivo_egresados, validacion_eg, {"datos": G.valor_o("df_eg")}),
+        ("indicadores", archivo_indicadores, validacion_ind,
+         {"captura": G.valor_o("df_manual"), "metas": G.valor_o("df_metas")}),
+    ):
+        hojas = {rol: df for rol, df in hojas.items() if df is not None}
+        if archivo is not None and hojas:
+            archivos[dataset] = (archivo.name, huella_archivo(archivo), validacion, hojas)
+    return archivos
+
+with st.expander("💾 Guardar la sesión para continuar después"):
+    st.caption("Guarda archivos cargados, filtros, generaciones, ingresos y captura manual en un solo "
+               "archivo; súbelo en «Reanudar una sesión guardada» para seguir sin volver a cargar nada.")
+    if st.button("Preparar instantánea", key="instantanea::prep"):
+        valores_sesion = filtrar_valores(dict(st.session_state.items()), PREFIJOS_SESION, CLAVES_SESION)
+        st.session_state["instantanea::datos"] = empaquetar(valores_sesion, archivos_de_sesion())
+    if st.session_state.get("instantanea::datos"):
+        st.download_button(
+            f"📥 Descargar instantánea ({len(st.session_state['instantanea::datos']) / 2**20:.1f} MB)",
+            data=st.session_state["instantanea::datos"],
+            file_name=f"Sesion_{cuatrimestre_actual.replace(' ', '_')}{EXTENSION_INSTANTANEA}",
+            mime="application/octet-stream",
+            key="instantanea::dl",
+        )
+
+# ===== DIAGNÓSTICO ===== #
+with st.expander("🩺 Diagnóstico"):
+    uso = GOBERNADOR.uso()
+    d1, d2, d3, d4 = st.columns(4)
+    d1.metric("Memoria (MB)", uso["memoria_mb"], help=f"Presupuesto: {uso['presupuesto_mb']} MB")
+    d2.metric("En disco (MB)", uso["disco_mb"])
+    d3.metric("Sesiones", uso["sesiones"])
+    d4.metric("Desalojos", uso["derramados"] + uso["descartados"])
+    st.caption(f"Derramados: {uso['derramados']} · Descartados: {uso['descartados']} · Recargados: {uso['recargados']}")
+    st.dataframe(uso["detalle"], use_container_width=True)
+    st.caption(
+        "Trabajo deduplicado (single-flight) — lecturas: "
+        + ", ".join(f"{k} {v}" for k, v in LECTURAS.estadisticas.items())
+        + " · exportaciones: "
+        + ", ".join(f"{k} {v}" for k, v in EXPORTACIONES.estadisticas.items())
+        + f" ({EXPORTACIONES.uso_mb():.1f} MB recordados)"
+    )
+    st.caption("Motores de lectura: " + " · ".join(f"{ext} → {m}" for ext, m in motores_activos().items()))
+    if VIGILANTE is not None:
+        st.caption(f"Carpeta de datos: {VIGILANTE.directorio} · última revisión "
+                   f"{datetime.datetime.fromtimestamp(VIGILANTE.ultima_pasada):%H:%M:%S}"
+                   + (f" · ⚠️ {VIGILANTE.ultimo_error}" if VIGILANTE.ultimo_error else ""))
+        st.dataframe(pd.DataFrame(VIGILANTE.estado()), use_container_width=True, hide_index=True)
+    st.caption(f"Nodos recalculados en este rerun: {', '.join(G.ejecutados) or '—'}")
+    st.caption(f"Nodos reutilizados: {', '.join(G.reutilizados) or '—'}")
@@ -0,0 +1,41 @@
+# Histórico multiperiodo: sólo con raíz configurada, periodo de los datos y tipos nativos.
+import pandas as pd
+
+from almacen import AlmacenPeriodos
+
+
+def _inscritos():
+    return pd.DataFrame({
+        "Matrícula": [1, 2, 3, 4],
+        "Carrera": ["TSU A", "Ing B", "TSU A", "Ing C"],
+        "Periodo": ["2025-1", "2025-1", "2025-2", None],
+        "Ingreso": pd.to_datetime(["2023-09-01", "2024-01-08", "2024-01-08", "2024-05-06"]),
+    })
+
+
+def test_sin_raiz_no_guarda_nada():
+    almacen = AlmacenPeriodos(None)
+    assert not almacen.activo
+    assert almacen.anexar_por_periodo("inscritos", _inscritos(), "h1") == []
+    assert almacen.manifiesto("inscritos") == [] and almacen.leer("inscritos").empty
+
+
+def test_periodo_de_los_datos_y_tipos_nativos(tmp_path):
+    almacen = AlmacenPeriodos(str(tmp_path))
+    entradas = almacen.anexar_por_periodo("inscritos", _inscritos(), "h1")
+    assert [(e["periodo"], e["filas"]) for e in entradas] == [("2025-1", 2), ("2025-2", 1)]
+    assert almacen.periodos("inscritos") == ["2025-1", "2025-2"]     # la fila sin periodo no se guarda
+
+    leido = almacen.leer("inscritos")
+    assert leido["Matrícula"].dtype.kind == "i" and leido["Ingreso"].dtype.kind == "M"
+
+    # el mismo archivo otra vez no agrega nada; otro archivo con filas repetidas sólo lo nuevo
+    assert all(e["filas"] == 0 for e in almacen.anexar_por_periodo("inscritos", _inscritos(), "h1"))
+    otro = pd.concat([_inscritos(), _inscritos().iloc[[0]].assign(Matrícula=5)], ignore_index=True)
+    assert [e["filas"] for e in almacen.anexar_por_periodo("inscritos", otro, "h2")] == [1, 0]
+    assert len(almacen.manifiesto("inscritos")) == 3
+
+
+def test_sin_columna_periodo(tmp_path):
+    almacen = AlmacenPeriodos(str(tmp_path))
+    assert almacen.anexar_por_periodo("inscritos", _inscritos().drop(columns="Periodo"), "h1") == []
@@ -0,0 +1,25 @@
+# Eficiencia terminal por cohorte: generaciones acotadas a los egresados e histórico sin matrícula.
+import pandas as pd
+
+from cohortes import eficiencia_por_cohorte, eficiencia_por_programa, periodos_sin_id
+
+TSUA = "Técnico Superior Universitario en Aviónica"
+
+
+def test_eficiencia_solo_generaciones_de_los_egresados():
+    ins = pd.DataFrame({"Carrera": [TSUA] * 6, "Generación": [2020] * 2 + [2021] * 4})
+    eg = pd.DataFrame({"Carrera": [TSUA], "Generación": [2020]})     # selección: sólo 2020
+    cohortes = eficiencia_por_cohorte(ins, eg, programas=["TSUA"])
+    assert cohortes["Generación"].tolist() == ["2020"]
+    fila = eficiencia_por_programa(cohortes, ["TSUA"]).iloc[0]
+    assert (fila["Ingresos"], fila["Egresados"], fila["Eficiencia"]) == (2, 1, 0.5)
+
+
+def test_periodos_sin_id():
+    historico = pd.DataFrame({
+        "Carrera": [TSUA] * 3, "Generación": [2020] * 3,
+        "Matrícula": ["A1", None, None], "Periodo carga": ["C1 2024", "C2 2024", "C2 2024"],
+    })
+    assert periodos_sin_id(historico, "Matrícula") == ["C2 2024"]
+    assert periodos_sin_id(historico.drop(columns="Matrícula"), "Matrícula") == ["C1 2024", "C2 2024"]
+    assert periodos_sin_id(historico, None) == []
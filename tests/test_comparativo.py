@@ -0,0 +1,68 @@
+# Reglas de estatus y escala de porcentajes (la da el '%' de la celda, no la magnitud).
+import numpy as np
+import pandas as pd
+import pytest
+
+from comparativo import a_proporcion, construir_comparativo, evaluar_estatus, fmt_val
+
+
+def test_a_proporcion():
+    v = a_proporcion(pd.Series(["58%", "0.5%", "105 %", 0.85, 1.05, "1830", "N/A", None]))
+    np.testing.assert_allclose(v.to_numpy(), [0.58, 0.005, 1.05, 0.85, 1.05, 1830, np.nan, np.nan])
+
+
+@pytest.mark.parametrize("meta, resultado, esperado", [
+    (0.8, 0.85, "verde"),
+    (0.8, 0.8, "verde"),
+    (0.8, 0.795, "amarillo"),       # dentro de ±1% relativo a la meta
+    (0.8, 0.7, "rojo"),
+    (np.nan, 0.7, "pendiente"),
+    (0.8, np.nan, "sin dato"),
+    (2000, 1830, "rojo"),
+])
+def test_reglas_basicas(meta, resultado, esperado):
+    assert evaluar_estatus([meta], [resultado])[0] == esperado
+
+
+def test_reglas_con_parametros():
+    est = evaluar_estatus(
+        [0.1, 0.1, 0.8, 0.8, 0.8],
+        [0.05, 0.2, 0.9, 0.9, np.nan],
+        sentido=[-1, -1, 1, 1, 1],
+        muestra=[np.nan, np.nan, 10, 50, np.nan],
+        muestra_min=[np.nan, np.nan, 30, 30, np.nan],
+        no_aplica=[False, False, False, False, True],
+    )
+    assert est.tolist() == ["verde", "rojo", "no representativa", "verde", "n/a"]
+
+
+def test_escenarios_x_indicadores():
+    est = evaluar_estatus([[0.8, 0.5], [0.9, 0.5]], [[0.85, 0.4], [0.85, 0.6]], sentido=[1, -1])
+    assert est.tolist() == [["verde", "verde"], ["rojo", "rojo"]]
+
+
+def _metas(**periodo):
+    return pd.DataFrame({
+        "Indicador": list(periodo), "proceso": "Calidad", "Periodicidad": "C", "Responsable": "DIR",
+        "Ene-Abr": "N/A", "May-Ago": list(periodo.values()), "Sep-Dic": "N/A",
+    })
+
+
+def test_escala_por_celda_no_por_magnitud():
+    metas = _metas(a="0.5%", b="80%", c="2000", e="90%", f=0.85)
+    resultados = pd.DataFrame({
+        "Indicador": ["a", "b", "c", "e", "f"], "Responsable": "DIR",
+        "Resultado": ["0.4%", 1.05, 1830, "89.5%", "86%"],
+    })
+    comp, out = construir_comparativo(metas, resultados, "May-Ago")
+    estatus = dict(zip(comp["Indicador"], comp["Estatus"]))
+    assert estatus == {"a": "rojo", "b": "verde", "c": "rojo", "e": "amarillo", "f": "verde"}
+    res = dict(zip(out["Indicador"], out["Resultado"]))
+    assert res["a"] == "0.4%" and res["b"] == "105.0%" and res["c"] == "1830"
+
+
+def test_fmt_val():
+    assert fmt_val(0.005, True) == "0.5%"
+    assert fmt_val(1.05, True) == "105.0%"
+    assert fmt_val(1830.0, False) == "1830"
+    assert fmt_val(np.nan, True) == ""
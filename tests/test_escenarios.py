@@ -0,0 +1,75 @@
+# Simulación de escenarios: conteos por escenario × grupo iguales a re-evaluar cada escenario.
+import numpy as np
+import pandas as pd
+import pytest
+
+from comparativo import construir_comparativo, evaluar_estatus
+from escenarios import BASE, EscenarioInvalido, barrido, matrices, resumen, simular
+
+
+@pytest.fixture(scope="module")
+def comp():
+    metas = pd.DataFrame({
+        "Indicador": ["Aprobación", "Deserción", "Matrícula", "Satisfacción", "Titulación"],
+        "proceso": ["Académico", "Académico", "Vinculación", "Calidad", "Académico"],
+        "Periodicidad": "C",
+        "Responsable": ["IMA", "IMA", "DIR", "SAC", "IAM"],
+        "Ene-Abr": "N/A",
+        "May-Ago": ["80%", "10%", "2000", "90%", "70%"],
+        "Sep-Dic": "N/A",
+        "Sentido": ["Mayor", "Menor", "Mayor", "Mayor", "Mayor"],
+    })
+    resultados = pd.DataFrame({
+        "Indicador": ["Aprobación", "Deserción", "Matrícula", "Satisfacción"],
+        "Responsable": ["IMA", "IMA", "DIR", "SAC"],
+        "Resultado": ["78%", "9%", "1950", "91%"],
+    })
+    return construir_comparativo(metas, resultados, "May-Ago")[0]
+
+
+def test_base_igual_al_comparativo(comp):
+    conteos = simular(comp, barrido([-0.05]), por=())
+    base = conteos[conteos["Escenario"] == BASE].iloc[0]
+    for estatus, n in comp["Estatus"].value_counts().items():
+        assert base[estatus] == n
+    assert base["Total"] == len(comp)
+
+
+def test_conteos_iguales_a_reevaluar(comp):
+    esc = pd.concat([
+        barrido([-0.05, 0.1]),
+        pd.DataFrame([{"Escenario": "IMA +3 pts", "Ajusta": "resultado", "Delta": 3, "Responsable": "ima"},
+                      {"Escenario": "combo", "Ajusta": "meta", "Factor": 0.9, "Proceso": "Académico"},
+                      {"Escenario": "combo", "Ajusta": "resultado", "Factor": 1.02}]),
+    ])
+    nombres, metas, resultados = matrices(comp, esc)
+    assert nombres == [BASE, "Metas -5%", "Metas +10%", "IMA +3 pts", "combo"]
+    conteos = simular(comp, esc, por=("proceso",))
+    for i, nombre in enumerate(nombres):
+        directo = evaluar_estatus(metas[i], resultados[i], sentido=comp["_sentido"], muestra=comp["_muestra"],
+                                  muestra_min=comp["_muestra_min"], no_aplica=comp["_no_aplica"])
+        esperado = pd.crosstab(comp["proceso"].to_numpy(), directo)
+        fila = conteos[conteos["Escenario"] == nombre].set_index("Proceso")
+        for proceso, por_estatus in esperado.iterrows():
+            for estatus, n in por_estatus.items():
+                assert fila.loc[proceso, estatus] == n, (nombre, proceso, estatus)
+
+
+def test_delta_en_puntos_para_porcentajes(comp):
+    esc = pd.DataFrame([{"Escenario": "+3", "Ajusta": "resultado", "Delta": 3}])
+    _, _, resultados = matrices(comp, esc)
+    pct = comp["_es_pct"].to_numpy(dtype=bool)
+    base = comp["_resultado_num"].to_numpy(dtype=float)
+    np.testing.assert_allclose(resultados[1][pct], base[pct] + 0.03)
+    np.testing.assert_allclose(resultados[1][~pct], base[~pct] + 3)
+
+
+def test_resumen_verde_ganado(comp):
+    tot = resumen(simular(comp, barrido([-0.05])))
+    assert tot.loc[tot["Escenario"] == BASE, "Δ verde"].item() == 0
+    assert tot.loc[tot["Escenario"] == "Metas -5%", "Δ verde"].item() >= 1   # Aprobación 78% vs 76%
+
+
+def test_ajuste_invalido(comp):
+    with pytest.raises(EscenarioInvalido):
+        simular(comp, pd.DataFrame([{"Escenario": "x", "Ajusta": "ambos", "Factor": 2}]))
@@ -0,0 +1,44 @@
+# Reportes por responsable: particiones y columnas del índice del ZIP.
+import io
+import zipfile
+
+import pandas as pd
+import pytest
+
+import exportaciones
+
+
+def _comp(**extra):
+    return pd.DataFrame({
+        "Indicador": ["A", "B", "C"],
+        "Responsable": ["TSU A", "TSU-A", None],
+        **extra,
+    })
+
+
+def test_particiones_por_responsable():
+    partes = exportaciones.particiones_reporte(_comp())
+    assert [p[1]["Responsable"] for p in partes] == sorted(["TSU A", "TSU-A", exportaciones.SIN_RESPONSABLE])
+    assert len({p[0].lower() for p in partes}) == 3
+
+
+def test_sin_responsable_es_error_claro():
+    with pytest.raises(ValueError, match="Responsable"):
+        exportaciones.particiones_reporte(_comp().drop(columns="Responsable"))
+
+
+def test_por_proceso_sin_columna_es_error_claro():
+    with pytest.raises(ValueError, match="Proceso"):
+        exportaciones.generar_reportes_por_responsable(_comp(), "Ene–Abr", "Ene-Abr", 2025, por_proceso=True,
+                                                       formatos=())
+
+
+def test_indice_por_proceso(monkeypatch):
+    monkeypatch.setattr(exportaciones, "PROCESOS_PDF", 1)
+    datos = exportaciones.generar_reportes_por_responsable(
+        _comp(Proceso=["Calidad", "Calidad", "Académico"]), "Ene–Abr", "Ene-Abr", 2025,
+        por_proceso=True, formatos=())
+    with zipfile.ZipFile(io.BytesIO(datos)) as zf:
+        indice = pd.read_csv(io.BytesIO(zf.read("indice.csv")), encoding="utf-8-sig")
+    assert list(indice.columns) == ["Responsable", "Proceso", "Archivo", "Indicadores"]
+    assert indice["Indicadores"].sum() == 3
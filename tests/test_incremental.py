@@ -0,0 +1,71 @@
+# Re-subidas: el resultado incremental debe ser idéntico al de una carga completa.
+import numpy as np
+import pandas as pd
+
+from incremental import Versiones, delta_filas, versionar
+from memoria import GobernadorMemoria
+
+
+def _nivel(carrera):
+    return "TSU" if "tsu" in str(carrera).lower() else "ING"
+
+
+def _inscritos():
+    return pd.DataFrame({
+        "Matrícula": [1, 2, 3, 4, 5],
+        "Carrera": ["TSU A", "Ing B", "TSU A", "Ing C", "TSU D"],
+        "Sexo": ["H", "M", "M", None, "H"],
+    })
+
+
+def test_delta_con_duplicados():
+    d = delta_filas(np.array([10, 20, 20, 30]), np.array([20, 40, 20, 20]))
+    assert sorted(d.iguales_ant.tolist()) == [1, 2]
+    assert d.insertadas.tolist() == [1, 3]
+    assert d.eliminadas.tolist() == [0, 3]
+
+
+def test_resubida_igual_a_carga_completa():
+    v = Versiones()
+    versionar(("inscritos", ("s1", "a.xlsx")), _inscritos(), _nivel, versiones=v)
+    nuevo = _inscritos()
+    nuevo.loc[1, "Carrera"] = "TSU B"                     # modificada
+    nuevo = pd.concat([nuevo.drop(index=3), pd.DataFrame({"Matrícula": [6], "Carrera": ["Ing E"], "Sexo": ["M"]})],
+                      ignore_index=True)                  # eliminada + nueva
+    inc = versionar(("inscritos", ("s1", "a.xlsx")), nuevo, _nivel, versiones=v)
+    completa = versionar(("inscritos", ("s2", "a.xlsx")), nuevo, _nivel, versiones=Versiones())
+
+    assert inc.resumen == {"sin_cambios": 3, "nuevas": 1, "modificadas": 1, "eliminadas": 1}
+    pd.testing.assert_frame_equal(inc.df, completa.df)
+    for c in completa.conteos:
+        pd.testing.assert_series_equal(inc.conteos[c].sort_index(), completa.conteos[c].sort_index(),
+                                       check_dtype=False)
+    for c, p in completa.perfil.items():
+        assert inc.perfil[c].valores == p.valores
+        assert inc.perfil[c].nulos == p.nulos
+
+
+def test_otra_sesion_no_es_version_anterior():
+    v = Versiones()
+    versionar(("inscritos", ("s1", "a.xlsx")), _inscritos(), _nivel, versiones=v)
+    otra = versionar(("inscritos", ("s2", "a.xlsx")), _inscritos(), _nivel, versiones=v)
+    assert otra.resumen == {}
+
+
+def test_columnas_distintas_es_carga_completa():
+    v = Versiones()
+    versionar(("inscritos", ("s1", "a.xlsx")), _inscritos(), _nivel, versiones=v)
+    otra = versionar(("inscritos", ("s1", "a.xlsx")), _inscritos().drop(columns="Sexo"), _nivel, versiones=v)
+    assert otra.resumen == {}
+    assert otra.df["Nivel"].tolist() == ["TSU", "ING", "TSU", "ING", "TSU"]
+
+
+def test_versiones_por_sesion_en_el_gobernador():
+    gob = GobernadorMemoria(2**30)
+    v = Versiones(gob)
+    versionar(("inscritos", ("s1", "a.xlsx")), _inscritos(), _nivel, versiones=v)
+    for i in range(20):         # otras sesiones no desalojan la versión de s1
+        versionar(("inscritos", (f"otra{i}", "a.xlsx")), _inscritos(), _nivel, versiones=v)
+    assert v.anterior(("inscritos", ("s1", "a.xlsx"))) is not None
+    gob.liberar_sesion("s1")
+    assert v.anterior(("inscritos", ("s1", "a.xlsx"))) is None
@@ -0,0 +1,80 @@
+# Instantáneas de sesión: ida y vuelta de valores, tablas y validaciones; lista blanca al restaurar.
+import datetime as dt
+import io
+import json
+import zipfile
+
+import pandas as pd
+import pytest
+
+from esquemas import Problema, Validacion
+from instantanea import InstantaneaInvalida, desempaquetar, empaquetar
+
+PREFIJOS = ("fi_", "gen_")
+CLAVES = ("sel_anio", "captura_manual")
+
+
+def _archivos():
+    df = pd.DataFrame({
+        "Matrícula": [1, 2, 3],
+        "Carrera": ["TSU A", "Ing B", None],
+        "Promedio": [8.5, None, 9.0],
+        "Ingreso": pd.to_datetime(["2023-09-01", "2024-01-08", None]),
+    })
+    validacion = Validacion("inscritos", hojas={"datos": "Hoja1"}, columnas={"datos": list(df.columns)},
+                            mapeo={"datos": {"Matricula": "Matrícula"}},
+                            problemas=[Problema("aviso", "Columna renombrada", "datos", "Matrícula")])
+    return {"inscritos": ("ins.xlsx", "abc123", validacion, {"datos": df})}, df, validacion
+
+
+def test_ida_y_vuelta():
+    archivos, df, validacion = _archivos()
+    valores = {"fi_Carrera": ["TSU A"], "gen_TSU": {2023, 2024}, "sel_anio": 2025,
+               "captura_manual": [{"Indicador": "A", "Resultado": "80%"}]}
+    datos = empaquetar(valores | {"fi_fecha": dt.date(2025, 5, 1)}, archivos)
+
+    restaurados, otros, creada = desempaquetar(datos, PREFIJOS, CLAVES)
+    assert restaurados["fi_Carrera"] == ["TSU A"]
+    assert sorted(restaurados["gen_TSU"]) == [2023, 2024]
+    assert restaurados["fi_fecha"] == dt.date(2025, 5, 1)
+    assert restaurados["captura_manual"] == valores["captura_manual"]
+    assert creada
+
+    archivo = otros["inscritos"]
+    assert (archivo.name, archivo.huella) == ("ins.xlsx", "abc123")
+    assert archivo.validacion == validacion
+    pd.testing.assert_frame_equal(archivo.hojas["datos"], df, check_dtype=False)
+
+
+def _con_valores(datos: bytes, valores: dict) -> bytes:
+    """Misma instantánea con estado.json editado (como lo haría alguien a mano)."""
+    entrada, salida = zipfile.ZipFile(io.BytesIO(datos)), io.BytesIO()
+    with zipfile.ZipFile(salida, "w") as zf:
+        for nombre in entrada.namelist():
+            contenido = entrada.read(nombre)
+            if nombre == "estado.json":
+                estado = json.loads(contenido)
+                estado["valores"] = valores
+                contenido = json.dumps(estado).encode()
+            zf.writestr(nombre, contenido)
+    return salida.getvalue()
+
+
+def test_restaurar_solo_claves_permitidas():
+    datos = _con_valores(empaquetar({}, {}), {
+        "fi_Carrera": ["TSU A"], "sel_anio": 2025,
+        "_restaurados": {"x": 1}, "instantanea::datos": "x", "origen_archivos": "Carpeta de datos",
+    })
+    valores, _, _ = desempaquetar(datos, PREFIJOS, CLAVES)
+    assert valores == {"fi_Carrera": ["TSU A"], "sel_anio": 2025}
+
+
+def test_sin_lista_blanca_no_restaura_nada():
+    valores, _, _ = desempaquetar(empaquetar({"fi_Carrera": ["TSU A"]}, {}))
+    assert valores == {}
+
+
+@pytest.mark.parametrize("datos", [b"no es zip", _con_valores(empaquetar({}, {}), ["fi_x"])])
+def test_instantanea_invalida(datos):
+    with pytest.raises(InstantaneaInvalida):
+        desempaquetar(datos, PREFIJOS, CLAVES)
@@ -0,0 +1,113 @@
+# Motores de Excel: orden por defecto, respaldo sólo ante errores de lectura y equivalencia
+# de calamine contra los motores históricos (openpyxl/pyxlsb/xlrd).
+import datetime as dt
+import os
+
+import pandas as pd
+import pytest
+
+import lectores
+
+
+def _libro(ruta):
+    """Libro de prueba con los tipos que aparecen en Inscritos/Egresados/Indicadores."""
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["Matrícula", "Carrera", "Generación", "Promedio", "Fecha egreso", "Avance", "Nota"])
+    filas = [
+        (2301001, "TSU en Agricultura", 2023, 8.75, dt.datetime(2025, 7, 18), 0.85, "N/A"),
+        (2301002, "Ingeniería Mecatrónica", 2023, 9, dt.datetime(2025, 12, 5), 1.05, None),
+        (2301003, "Maestría en Ingeniería", None, None, None, None, "pendiente"),
+        (2301004, "TSU en Mantenimiento", 2022, 7.1, dt.datetime(2024, 8, 30), 0.5, ""),
+    ]
+    for f in filas:
+        ws.append(f)
+    for celda in ws["F"][1:]:
+        celda.number_format = "0%"
+    wb.save(ruta)
+    return ruta
+
+
+def test_orden_por_defecto(monkeypatch):
+    # calamine sólo por defecto donde test_calamine_equivale_a_openpyxl lo respalda
+    monkeypatch.setattr(lectores, "motor_instalado", lambda m: True)
+    assert lectores.motores_para(".xlsx", "") == ["calamine", "openpyxl"]
+    assert lectores.motores_para(".xlsm", "") == ["openpyxl", "calamine"]
+    assert lectores.motores_para(".xlsb", "") == ["pyxlsb", "calamine"]
+    assert lectores.motores_para(".xls", "") == ["xlrd", "calamine"]
+
+
+def test_configuracion_elige_motor(monkeypatch):
+    monkeypatch.setattr(lectores, "motor_instalado", lambda m: True)
+    assert lectores.motores_para(".xlsb", "calamine") == ["calamine", "pyxlsb"]
+    assert lectores.motores_para(".xlsx", "xlsx=openpyxl") == ["openpyxl", "calamine"]
+    assert lectores.motores_para(".xlsb", "xlsx=openpyxl") == ["pyxlsb", "calamine"]
+
+
+def _leer_falso(errores, llamados):
+    def leer(fuente, engine=None, **kw):
+        llamados.append(engine)
+        if engine in errores:
+            raise errores[engine]
+        return pd.DataFrame({"motor": [engine]})
+    return leer
+
+
+def test_respaldo_ante_error_de_lectura(monkeypatch):
+    llamados = []
+    monkeypatch.setattr(lectores, "motores_para", lambda ext: ["openpyxl", "calamine"])
+    monkeypatch.setattr(lectores.pd, "read_excel", _leer_falso({"openpyxl": ValueError("dañado")}, llamados))
+    assert lectores.leer_excel("a.xlsx")["motor"].iloc[0] == "calamine"
+    assert llamados == ["openpyxl", "calamine"]
+
+
+def test_otros_errores_no_caen_al_respaldo(monkeypatch):
+    llamados = []
+    monkeypatch.setattr(lectores, "motores_para", lambda ext: ["openpyxl", "calamine"])
+    monkeypatch.setattr(lectores.pd, "read_excel", _leer_falso({"openpyxl": TypeError("parámetro")}, llamados))
+    with pytest.raises(TypeError):
+        lectores.leer_excel("a.xlsx")
+    assert llamados == ["openpyxl"]
+
+
+def test_ultimo_error_se_propaga(monkeypatch):
+    monkeypatch.setattr(lectores, "motores_para", lambda ext: ["openpyxl", "calamine"])
+    monkeypatch.setattr(lectores.pd, "read_excel", _leer_falso(
+        {"openpyxl": ValueError("a"), "calamine": ValueError("b")}, []))
+    with pytest.raises(ValueError, match="b"):
+        lectores.leer_excel("a.xlsx")
+
+
+def test_lectura_xlsx(tmp_path):
+    df = lectores.leer_excel(str(_libro(tmp_path / "libro.xlsx")))
+    assert df.shape == (4, 7)
+    assert df["Fecha egreso"].dtype.kind == "M"
+    assert df["Avance"].tolist()[:2] == [0.85, 1.05]
+
+
+def _equivalentes(ruta, motores):
+    reporte = lectores.comparar_motores(str(ruta), motores=motores)
+    distintos = reporte[~(reporte["Mismos valores"] & reporte["Mismos tipos"])]
+    assert distintos.empty, distintos.to_string()
+
+
+def test_calamine_equivale_a_openpyxl(tmp_path):
+    pytest.importorskip("python_calamine")
+    _equivalentes(_libro(tmp_path / "libro.xlsx"), ["openpyxl", "calamine"])
+
+
+# Libros reales (p.ej. egresados .xlsb), separados por os.pathsep:
+#   REPORTES_LIBROS_PRUEBA=egresados.xlsb:inscritos.xlsx pytest tests/test_lectores.py
+LIBROS = [r for r in os.environ.get("REPORTES_LIBROS_PRUEBA", "").split(os.pathsep) if r]
+
+
+@pytest.mark.skipif(not LIBROS, reason="sin REPORTES_LIBROS_PRUEBA")
+@pytest.mark.parametrize("ruta", LIBROS)
+def test_calamine_equivale_en_libros_reales(ruta):
+    pytest.importorskip("python_calamine")
+    historico = lectores.MOTOR_HISTORICO[lectores.extension(ruta)]
+    if not lectores.motor_instalado(historico):
+        pytest.skip(f"{historico} no instalado")
+    _equivalentes(ruta, [historico, "calamine"])
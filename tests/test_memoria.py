@@ -0,0 +1,39 @@
+# Gobernador de memoria: tamaño de contenedores y columnas mapeadas (compartidos.py).
+import numpy as np
+import pandas as pd
+
+from compartidos import abrir, publicar
+from incremental import Versiones, versionar
+from memoria import GobernadorMemoria, huella, tamano
+
+
+def _df(n=20_000):
+    return pd.DataFrame({"Matrícula": np.arange(n), "Carrera": [f"C{i % 7}" for i in range(n)]})
+
+
+def test_version_cuenta_sus_dataframes():
+    df = _df()
+    version = versionar(("inscritos", ("s1", "a.xlsx")), df, lambda c: "TSU", versiones=Versiones())
+    assert tamano(version) > tamano(df) + version.hashes.nbytes
+
+
+def test_columnas_mapeadas_no_cuentan(tmp_path):
+    publicar("k", _df(), str(tmp_path))
+    mapeado = abrir("k", str(tmp_path))
+    propios, mapeados = huella(mapeado)
+    assert mapeados >= mapeado["Matrícula"].nbytes and propios < mapeados
+
+
+def test_no_se_derrama_lo_mapeado(tmp_path):
+    publicar("k", _df(), str(tmp_path))
+    mapeado = abrir("k", str(tmp_path))
+    con_nivel = mapeado.copy(deep=False)
+    con_nivel["Nivel"] = "TSU"
+    gob = GobernadorMemoria(1, dir_derrame=str(tmp_path / "derrame"))
+    gob.guardar("s1", "solo_mapeado", mapeado)
+    gob.guardar("s1", "mixto", con_nivel)
+    gob.guardar("s1", "nuevo", _df())
+    # lo sólo mapeado no libera nada; lo mixto se descarta en vez de copiarse a disco
+    assert gob.desalojos == {"derramados": 0, "descartados": 1, "recargados": 0}
+    assert gob.obtener("s1", "solo_mapeado") is mapeado
+    assert gob.obtener("s1", "mixto") is None
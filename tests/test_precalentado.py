@@ -0,0 +1,53 @@
+# Precalentado del vigilante: la primera sesión sobre la carpeta de datos reutiliza lo precalculado.
+# Corre en un subproceso porque los directorios (REPORTES_*) se leen al importar los módulos.
+import os
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _escenario(tmp):
+    for var, sub in (("REPORTES_COMPARTIDOS_DIR", "compartidos"), ("REPORTES_DERRAME_DIR", "derrame"),
+                     ("REPORTES_DETALLE_DIR", "detalle"), ("REPORTES_ALMACEN", "almacen"),
+                     ("REPORTES_DATOS_DIR", "datos")):
+        os.environ[var] = os.path.join(tmp, sub)
+    os.makedirs(os.environ["REPORTES_DATOS_DIR"])
+    sys.path.insert(0, RAIZ)
+    import carga
+    from streamlit.testing.v1 import AppTest
+
+    pasado = time.time() - 60      # que el vigilante los dé por estables en su primera pasada
+    for ruta in carga.libros_sinteticos(os.environ["REPORTES_DATOS_DIR"], 300, 6).values():
+        os.utime(ruta, (pasado, pasado))
+    app = os.path.join(RAIZ, "streamlit_app.py")
+    AppTest.from_file(app, default_timeout=120).run()
+
+    import vigilante
+    for _ in range(240):
+        if vigilante._vigilante.ultima_pasada:
+            break
+        time.sleep(0.5)
+    assert not vigilante._vigilante.ultimo_error, vigilante._vigilante.ultimo_error
+
+    at = AppTest.from_file(app, default_timeout=120)
+    at.run()
+    at.radio(key="origen_archivos").set_value("Carpeta de datos")
+    at.run()
+    assert not at.exception
+    captions = {c.value.split(":")[0]: c.value.split(":", 1)[1] for c in at.caption if c.value.startswith("Nodos")}
+    recalculados = {n.strip() for n in captions["Nodos recalculados en este rerun"].split(",")}
+    reutilizados = {n.strip() for n in captions["Nodos reutilizados"].split(",")}
+    for nodo in ("cohortes", "comp_out", "pdf_bytes"):
+        assert nodo not in recalculados and nodo in reutilizados, (nodo, recalculados)
+
+
+def test_primera_sesion_usa_el_precalentado(tmp_path):
+    resultado = subprocess.run([sys.executable, __file__, str(tmp_path)], capture_output=True, text=True,
+                               timeout=600, cwd=tmp_path)
+    assert resultado.returncode == 0, resultado.stdout + resultado.stderr
+
+
+if __name__ == "__main__":
+    _escenario(sys.argv[1])
@@ -0,0 +1,16 @@
+# Carga progresiva: una lectura fallida no se reinicia sola.
+from progresivo import Cargas
+
+
+def test_carga_fallida_no_se_reinicia():
+    cargas, intentos = Cargas(), []
+
+    def leer(carga):
+        intentos.append(1)
+        raise ValueError("libro dañado")
+
+    carga = cargas.iniciar("h-inscritos", leer)
+    assert carga.listo.wait(5) and isinstance(carga.error, ValueError)
+    assert cargas.iniciar("h-inscritos", leer) is carga and len(intentos) == 1
+    cargas.soltar("h-inscritos")        # quien mostró el error la suelta: la siguiente es nueva
+    assert cargas.iniciar("h-inscritos", leer) is not carga
@@ -0,0 +1,82 @@
+# Single-flight: tope de resultados recordados y qué reciben los que esperan al líder.
+import threading
+import time
+
+import pytest
+
+from vuelo_unico import VueloUnico
+
+
+def _en_paralelo(v, clave, funcion, n=4):
+    """n hilos piden `clave`; devuelve [(resultado|excepción)] en orden de hilo."""
+    salidas = [None] * n
+
+    def correr(i):
+        try:
+            salidas[i] = v.hacer(clave, funcion)
+        except BaseException as e:
+            salidas[i] = e
+
+    hilos = [threading.Thread(target=correr, args=(i,)) for i in range(n)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join(5)
+    return salidas
+
+
+def test_una_ejecucion_por_clave():
+    v, llamadas = VueloUnico(), []
+
+    def lento():
+        llamadas.append(1)
+        time.sleep(0.2)
+        return b"x"
+
+    assert _en_paralelo(v, "k", lento) == [b"x"] * 4
+    assert len(llamadas) == 1
+
+
+def test_error_se_entrega_a_todos():
+    v = VueloUnico()
+
+    def falla():
+        time.sleep(0.2)
+        raise ValueError("sin datos")
+
+    salidas = _en_paralelo(v, "k", falla)
+    assert all(isinstance(s, ValueError) for s in salidas)
+
+
+def test_interrupcion_del_lider_no_se_hereda():
+    v, llamadas = VueloUnico(), []
+
+    def interrumpe_la_primera():
+        llamadas.append(1)
+        time.sleep(0.2)
+        if len(llamadas) == 1:
+            raise KeyboardInterrupt
+        return b"ok"
+
+    salidas = _en_paralelo(v, "k", interrumpe_la_primera)
+    assert sum(isinstance(s, KeyboardInterrupt) for s in salidas) == 1
+    assert salidas.count(b"ok") == 3
+    assert len(llamadas) == 2
+
+
+def test_tope_en_bytes():
+    v = VueloUnico(recordar=16, max_mb=1)
+    for i in range(4):
+        v.hacer(i, lambda: b"\0" * 400_000)
+    assert v.uso_mb() <= 1
+    assert list(v._recientes) == [2, 3]
+    v.hacer("grande", lambda: b"\0" * 2_000_000)   # más que el tope: no se recuerda
+    assert "grande" not in v._recientes
+
+
+def test_tope_en_cantidad():
+    v = VueloUnico(recordar=2)
+    for i in range(3):
+        v.hacer(i, lambda: i)
+    assert list(v._recientes) == [1, 2]
+    assert v.hacer(2, lambda: pytest.fail("debía recordarse")) == 2
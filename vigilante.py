@@ -0,0 +1,208 @@
+# vigilante.py — carpeta de datos vigilada (p.ej. la unidad compartida donde el SIS deja
+# sus exportaciones). Un hilo en segundo plano revisa la carpeta cada INTERVALO segundos
+# (sólo stdlib: os.scandir + mtime/tamaño), detecta libros nuevos o modificados y llama a
+# `precalentar` para validarlos, parsearlos y dejar listos agregados y reportes antes de que
+# alguien los abra. Las sesiones eligen un archivo del catálogo en vez de subirlo.
+
+import hashlib
+import io
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+from lectores import extension
+
+DIR_DATOS = os.environ.get("REPORTES_DATOS_DIR", "")
+INTERVALO = float(os.environ.get("REPORTES_DATOS_INTERVALO", "30"))
+# Un archivo se procesa cuando lleva este tiempo sin cambiar (copias a medias)
+REPOSO = 2.0
+EXTENSIONES = (".xlsx", ".xlsm", ".xlsb", ".xls", ".csv", ".parquet")
+# Dataset según el nombre del archivo
+PALABRAS_DATASET = {
+    "inscritos": ("inscrit", "matricul"),
+    "egresados": ("egresad",),
+    "indicadores": ("indicador", "metas"),
+}
+# Sesión del gobernador de memoria donde se guardan los nodos precalculados
+SESION_PRECALENTADO = "__precalentado__"
+
+
+def dataset_de(nombre: str):
+    n = nombre.lower()
+    return next((ds for ds, palabras in PALABRAS_DATASET.items() if any(p in n for p in palabras)), None)
+
+
+class ArchivoEnDisco(io.BytesIO):
+    """Archivo de la carpeta con la interfaz de UploadedFile (name, file_id, getvalue)."""
+
+    def __init__(self, datos: bytes, nombre: str, huella: str, validacion=None, hojas=None):
+        super().__init__(datos)
+        self.name = nombre
+        self.huella = huella
+        self.file_id = f"carpeta::{huella}"   # estable entre sesiones: mismas huellas en el grafo
+        self.validacion = validacion          # validación de esquema ya hecha en segundo plano
+        self.hojas = hojas or {}              # rol -> DataFrame ya parseado (hojas chicas)
+
+
+@dataclass
+class ArchivoDatos:
+    ruta: str
+    nombre: str
+    dataset: str
+    tamano: int
+    mtime: float
+    huella: str = ""
+    estado: str = "pendiente"      # pendiente | listo | error
+    error: str = ""
+    validacion: object = None
+    hojas: dict = field(default_factory=dict)
+    listo_en: float = 0.0
+    _datos: bytes = field(default=None, repr=False)
+
+    def datos(self) -> bytes:
+        if self._datos is None:
+            with open(self.ruta, "rb") as fh:
+                self._datos = fh.read()
+        return self._datos
+
+    def abrir(self) -> ArchivoEnDisco:
+        # objeto nuevo por llamada: cada lector tiene su propia posición sobre los mismos bytes
+        return ArchivoEnDisco(self.datos(), self.nombre, self.huella, self.validacion, self.hojas)
+
+
+class Vigilante:
+    """
+    escanear(): una pasada (también la usa el hilo). `precalentar_archivo(entrada)` se llama
+    por cada archivo nuevo o modificado; `precalentar(vigilante)` una vez por pasada con
+    cambios, para el conjunto más reciente de cada dataset.
+    """
+
+    def __init__(self, directorio, intervalo=INTERVALO, precalentar_archivo=None, precalentar=None):
+        self.directorio = directorio
+        self.intervalo = intervalo
+        self.precalentar_archivo = precalentar_archivo
+        self.precalentar = precalentar
+        self._archivos = {}            # ruta -> ArchivoDatos
+        self._lock = threading.Lock()
+        self._hilo = None
+        self._alto = threading.Event()
+        self.ultima_pasada = 0.0
+        self.ultimo_error = ""
+
+    # ---- catálogo ---- #
+    def catalogo(self, dataset=None) -> list:
+        """Archivos listos (y con error), el más reciente primero."""
+        with self._lock:
+            entradas = [a for a in self._archivos.values() if dataset is None or a.dataset == dataset]
+        return sorted(entradas, key=lambda a: -a.mtime)
+
+    def mas_recientes(self) -> dict:
+        """{dataset: ArchivoDatos} listo más reciente por dataset."""
+        out = {}
+        for a in self.catalogo():
+            if a.estado == "listo":
+                out.setdefault(a.dataset, a)
+        return out
+
+    def abrir(self, ruta) -> ArchivoEnDisco:
+        with self._lock:
+            entrada = self._archivos[ruta]
+        return entrada.abrir()
+
+    # ---- escaneo ---- #
+    def _listar(self):
+        try:
+            with os.scandir(self.directorio) as it:
+                for e in it:
+                    if e.is_file() and extension(e.name) in EXTENSIONES and not e.name.startswith(("~$", ".")):
+                        ds = dataset_de(e.name)
+                        if ds:
+                            info = e.stat()
+                            yield e.path, e.name, ds, info.st_size, info.st_mtime
+        except OSError as err:
+            self.ultimo_error = str(err)
+
+    def escanear(self) -> int:
+        """Una pasada; devuelve cuántos archivos se (re)procesaron."""
+        ahora = time.time()
+        vistos, cambiados = set(), []
+        for ruta, nombre, ds, tamano, mtime in self._listar():
+            vistos.add(ruta)
+            previo = self._archivos.get(ruta)
+            if previo is not None and (previo.tamano, previo.mtime) == (tamano, mtime):
+                continue
+            if ahora - mtime < REPOSO:
+                continue                 # se está copiando: la siguiente pasada lo toma
+            cambiados.append(ArchivoDatos(ruta, nombre, ds, tamano, mtime))
+
+        for entrada in cambiados:
+            try:
+                entrada.huella = hashlib.sha1(entrada.datos()).hexdigest()
+                previo = self._archivos.get(entrada.ruta)
+                if previo is not None and previo.huella == entrada.huella and previo.estado == "listo":
+                    # sólo cambió el mtime: se conserva lo ya preparado
+                    entrada.validacion, entrada.hojas, entrada.estado = previo.validacion, previo.hojas, "listo"
+                else:
+                    if self.precalentar_archivo:
+                        self.precalentar_archivo(entrada)
+                    entrada.estado = "listo"
+            except Exception as e:
+                entrada.estado, entrada.error = "error", str(e)
+            entrada.listo_en = time.time()
+            entrada._datos = None        # los bytes se vuelven a leer sólo si alguien lo abre
+            with self._lock:
+                self._archivos[entrada.ruta] = entrada
+
+        with self._lock:
+            for ruta in set(self._archivos) - vistos:
+                del self._archivos[ruta]
+        if cambiados and self.precalentar:
+            try:
+                self.precalentar(self)
+                self.ultimo_error = ""
+            except Exception as e:
+                self.ultimo_error = f"Precálculo: {e}"
+        self.ultima_pasada = time.time()
+        return len(cambiados)
+
+    # ---- hilo ---- #
+    def _bucle(self):
+        while not self._alto.is_set():
+            try:
+                self.escanear()
+            except Exception as e:       # el hilo no debe morir por un archivo raro
+                self.ultimo_error = str(e)
+            self._alto.wait(self.intervalo)
+
+    def iniciar(self):
+        if self._hilo is None or not self._hilo.is_alive():
+            self._alto.clear()
+            self._hilo = threading.Thread(target=self._bucle, name="vigilante-datos", daemon=True)
+            self._hilo.start()
+        return self
+
+    def detener(self):
+        self._alto.set()
+
+    def estado(self) -> list:
+        return [
+            {"Archivo": a.nombre, "Dataset": a.dataset, "Estado": a.estado, "Error": a.error,
+             "Modificado": time.strftime("%Y-%m-%d %H:%M", time.localtime(a.mtime)), "MB": round(a.tamano / 2**20, 2)}
+            for a in self.catalogo()
+        ]
+
+
+_vigilante = None
+_lock_global = threading.Lock()
+
+
+def vigilante_global(directorio=DIR_DATOS, **kw):
+    """Un solo vigilante por proceso (la primera sesión lo arranca); None si no hay carpeta."""
+    global _vigilante
+    if not directorio or not os.path.isdir(directorio):
+        return None
+    with _lock_global:
+        if _vigilante is None:
+            _vigilante = Vigilante(directorio, **kw).iniciar()
+    return _vigilante
@@ -0,0 +1,122 @@
+# vuelo_unico.py — deduplicación "single-flight" de trabajo caro dentro del proceso.
+# Si varias sesiones piden el mismo parseo o la misma exportación (misma huella de
+# contenido) al mismo tiempo, sólo una lo ejecuta y las demás esperan su resultado.
+# Opcionalmente recuerda los últimos N resultados para quien llegue poco después.
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from memoria import tamano
+
+
+def huella_objetos(*objs) -> str:
+    """Huella de contenido de DataFrames/bytes/valores simples."""
+    h = hashlib.sha1()
+    for o in objs:
+        if isinstance(o, pd.DataFrame):
+            h.update(",".join(map(str, o.columns)).encode())
+            h.update(pd.util.hash_pandas_object(o.astype("string"), index=False).to_numpy().tobytes())
+        elif isinstance(o, (bytes, bytearray)):
+            h.update(o)
+        else:
+            h.update(repr(o).encode())
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class _Llamada:
+    __slots__ = ("evento", "resultado", "error", "reintentar")
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.error = None
+        self.reintentar = False
+
+
+class VueloUnico:
+    """
+    hacer(clave, funcion): ejecuta funcion() una sola vez por clave entre los hilos que la
+    pidan a la vez; el resultado (o la excepción) se entrega a todos.
+    `recordar`: cuántos resultados recientes se conservan (0 = sólo deduplicar en vuelo).
+    `max_mb`: tope en MB de esos resultados (memoria.tamano); se desalojan los menos usados.
+    Si el líder se interrumpe con algo que no es Exception (rerun/cierre de su sesión,
+    KeyboardInterrupt), los que esperaban no heredan la interrupción: lo intentan de nuevo.
+    """
+
+    def __init__(self, recordar: int = 0, max_mb: float = None):
+        self.recordar = recordar
+        self.max_bytes = None if max_mb is None else int(max_mb * 2**20)
+        self._lock = threading.Lock()
+        self._en_curso = {}
+        self._recientes = OrderedDict()   # clave -> (resultado, bytes)
+        self._bytes = 0
+        self.estadisticas = {"ejecutadas": 0, "compartidas": 0, "recordadas": 0, "reintentos": 0}
+
+    def hacer(self, clave, funcion):
+        while True:
+            with self._lock:
+                if clave in self._recientes:
+                    self._recientes.move_to_end(clave)
+                    self.estadisticas["recordadas"] += 1
+                    return self._recientes[clave][0]
+                llamada = self._en_curso.get(clave)
+                lider = llamada is None
+                if lider:
+                    llamada = self._en_curso[clave] = _Llamada()
+                    self.estadisticas["ejecutadas"] += 1
+                else:
+                    self.estadisticas["compartidas"] += 1
+            if lider:
+                return self._ejecutar(clave, funcion, llamada)
+
+            llamada.evento.wait()
+            if llamada.reintentar:
+                with self._lock:
+                    self.estadisticas["reintentos"] += 1
+                continue
+            if llamada.error is not None:
+                raise llamada.error
+            return llamada.resultado
+
+    def _ejecutar(self, clave, funcion, llamada):
+        try:
+            llamada.resultado = funcion()
+        except Exception as e:
+            llamada.error = e
+            raise
+        except BaseException:
+            llamada.reintentar = True
+            raise
+        finally:
+            with self._lock:
+                del self._en_curso[clave]
+                if llamada.error is None and not llamada.reintentar and self.recordar:
+                    self._recordar(clave, llamada.resultado)
+            llamada.evento.set()
+        return llamada.resultado
+
+    def _recordar(self, clave, resultado):
+        tam = tamano(resultado) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and tam > self.max_bytes:
+            return
+        self._recientes[clave] = (resultado, tam)
+        self._bytes += tam
+        while len(self._recientes) > self.recordar or \
+                (self.max_bytes is not None and self._bytes > self.max_bytes):
+            _, (_, t) = self._recientes.popitem(last=False)
+            self._bytes -= t
+
+    def uso_mb(self) -> float:
+        with self._lock:
+            return self._bytes / 2**20
+
+
+# Una instancia por tipo de trabajo (por proceso del servidor)
+LECTURAS = VueloUnico()              # los parseos ya se comparten en disco (compartidos.py)
+# xlsx/pdf/zip ya generados: tope por cantidad y por bytes (un zip de responsables puede pesar decenas de MB)
+EXPORTACIONES = VueloUnico(recordar=16, max_mb=float(os.environ.get("REPORTES_EXPORTACIONES_MB", "256")))